@@ -1,19 +1,37 @@
-from datetime import datetime
-from typing import Optional
-
-from exceptions import EntityNotFoundError, ValidationError, StorageError
-from classes import ContactInfo, Guest, StaffMember, Location, Service, TimeSlot, Booking
+import argparse
+import sys
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from exceptions import EntityNotFoundError, ResortError, ValidationError, StorageError
+from classes import ContactInfo, Guest, StaffMember, Location, Service, TimeSlot, Booking, DaySchedule
 from storage import ResortStorage
 
+# Автосохранение, история отмены и версии сущностей импортируются при
+# запуске меню: пакетному режиму и batch.py они не нужны
+if TYPE_CHECKING:
+    from autosave import Autosaver
+    from history import History
+    from versioning import VersionedStore
+
+DEFAULT_JSON_PATH = "lab1/storage_data.json"
+VERSIONS_RETENTION = timedelta(days=7)  # сколько хранить старые версии сущностей
+
 # --- Простое состояние файла данных ---
 FILE_PATH: Optional[str] = None  # последний загруженный/сохранённый путь
 FILE_FORMAT: Optional[str] = None  # 'json' | 'xml' | None
 DIRTY: bool = False  # есть несохранённые изменения
+AUTOSAVER: Optional["Autosaver"] = None  # фоновое автосохранение, если включено
+HISTORY: Optional["History"] = None  # история для отмены/повтора изменений
+VERSIONS: Optional["VersionedStore"] = None  # версии сущностей для запросов «на момент»
 
 
 def mark_dirty() -> None:
     global DIRTY
     DIRTY = True
+    if AUTOSAVER:
+        AUTOSAVER.notify()
 
 
 def set_loaded(path: str, fmt: str) -> None:
@@ -21,6 +39,17 @@ def set_loaded(path: str, fmt: str) -> None:
     FILE_PATH = path
     FILE_FORMAT = fmt.lower()
     DIRTY = False
+    if AUTOSAVER:
+        from autosave import autosave_path
+
+        AUTOSAVER.reset(autosave_path(path))
+    if VERSIONS:
+        from versioning import versions_path
+
+        try:
+            VERSIONS.load(versions_path(path))
+        except StorageError as e:
+            print(f"⚠ История версий не загружена: {e}")
 
 
 def set_saved(path: str, fmt: str) -> None:
@@ -28,6 +57,20 @@ def set_saved(path: str, fmt: str) -> None:
     FILE_PATH = path
     FILE_FORMAT = fmt.lower()
     DIRTY = False
+    if AUTOSAVER:
+        from autosave import autosave_path
+
+        AUTOSAVER.reset(autosave_path(path))
+
+
+def autosave_state_text() -> str:
+    if not AUTOSAVER:
+        return "Автосохранение: выключено"
+    last = AUTOSAVER.last_saved.strftime("%H:%M:%S") if AUTOSAVER.last_saved else "-"
+    text = f"Автосохранение: {AUTOSAVER.path} | последнее: {last}"
+    if AUTOSAVER.last_error:
+        text += f" | ошибка: {AUTOSAVER.last_error}"
+    return text
 
 
 def current_state_text() -> str:
@@ -95,6 +138,20 @@ def prompt_datetime(message: str, allow_exit: bool = True) -> datetime:
         except ValueError:
             print("Некорректный формат даты/времени.")
 
+
+def prompt_date(message: str, allow_exit: bool = True) -> date:
+    """Запросить дату; пустой ввод означает сегодняшний день."""
+    while True:
+        value = input(message + " (формат YYYY-MM-DD, Enter — сегодня): ").strip()
+        if allow_exit and value.lower() in ("q", "exit", "выход", "отмена"):
+            raise MenuExit()
+        if not value:
+            return date.today()
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            print("Некорректный формат даты.")
+
 # --- Валидации ввода ---
 import re
 ID_PATTERNS = {
@@ -159,6 +216,109 @@ def prompt_phone(allow_exit: bool = True) -> str:
         return value
 
 
+def staff_with_services(staff: StaffMember, service_ids: List[str]) -> StaffMember:
+    """Копия сотрудника с другим списком услуг.
+
+    Сотрудника в хранилище не меняем на месте: история отмены хранит
+    прежний объект как значение для отката.
+    """
+    updated = StaffMember(staff_id=staff.staff_id, name=staff.name, role=staff.role, contact=staff.contact)
+    for sid in service_ids:
+        updated.assign_service(sid)
+    return updated
+
+
+class RowCache:
+    """Кэш отформатированных строк списков.
+
+    Строки действительны, пока не изменилась ревизия хранилища
+    (ResortStorage.revision), поэтому повторный показ списка не
+    пересобирает их заново.
+    """
+
+    def __init__(self):
+        self._storage: Optional[ResortStorage] = None
+        self._revision: Optional[int] = None
+        self._rows: Dict[str, List[str]] = {}
+
+    def get(self, storage: ResortStorage, kind: str, build: Callable[[ResortStorage], List[str]]) -> List[str]:
+        if storage is not self._storage or storage.revision != self._revision:
+            self._storage = storage
+            self._revision = storage.revision
+            self._rows.clear()
+        rows = self._rows.get(kind)
+        if rows is None:
+            rows = self._rows[kind] = build(storage)
+        return rows
+
+
+ROW_CACHE = RowCache()
+
+
+def _service_rows(storage: ResortStorage) -> List[str]:
+    rows = []
+    for i, view in enumerate(storage.list_service_views(), 1):
+        srv = view.service
+        if not srv.location_id:
+            location_info = "(не назначено)"
+        elif view.location:
+            location_info = f"{srv.location_id} ({view.location.name})"
+        else:
+            location_info = f"{srv.location_id} (не найдено)"
+        if not srv.staff_id:
+            staff_info = "(не назначен)"
+        elif view.staff_member:
+            staff_info = f"{srv.staff_id} ({view.staff_member.name}, {view.staff_member.role})"
+        else:
+            staff_info = f"{srv.staff_id} (не найден)"
+        rows.append(
+            f"\n{i}. Услуга ID={srv.service_id}\n"
+            f"   Название: {srv.name}\n"
+            f"   Длительность: {srv.duration_minutes} мин\n"
+            f"   Место: {location_info}\n"
+            f"   Сотрудник: {staff_info}"
+        )
+    return rows
+
+
+def _service_choice_rows(storage: ResortStorage) -> List[str]:
+    rows = []
+    for view in storage.list_service_views():
+        srv = view.service
+        if not srv.location_id:
+            location_info = ", место: (не назначено)"
+        elif view.location:
+            location_info = f", место: {srv.location_id} ({view.location.name})"
+        else:
+            location_info = f", место: {srv.location_id} (не найдено)"
+        if not srv.staff_id:
+            staff_info = ", сотрудник: (не назначен)"
+        elif view.staff_member:
+            staff_info = f", сотрудник: {srv.staff_id} ({view.staff_member.name})"
+        else:
+            staff_info = f", сотрудник: {srv.staff_id} (не найден)"
+        status = "✓" if srv.location_id and srv.staff_id else "⚠"
+        rows.append(f"  {status} {srv.service_id}: {srv.name} ({srv.duration_minutes} мин){location_info}{staff_info}")
+    return rows
+
+
+def _booking_rows(storage: ResortStorage) -> List[str]:
+    rows = []
+    for i, booking in enumerate(storage.list_bookings(), 1):
+        staff = booking.staff_member
+        staff_info = f"{staff.staff_id} ({staff.name}, {staff.role})" if staff else "(не назначен)"
+        slot = booking.time_slot
+        rows.append(
+            f"\n{i}. Бронирование ID={booking.booking_id}\n"
+            f"   Гость: {booking.guest.guest_id} ({booking.guest.name})\n"
+            f"   Услуга: {booking.service.service_id} ({booking.service.name}, {booking.service.duration_minutes} мин)\n"
+            f"   Место: {booking.location.location_id} ({booking.location.name})\n"
+            f"   Сотрудник: {staff_info}\n"
+            f"   Время: {slot.start_time.strftime('%Y-%m-%d %H:%M')} - {slot.end_time.strftime('%H:%M')}"
+        )
+    return rows
+
+
 def create_guest(storage: ResortStorage) -> None:
     while True:
         try:
@@ -525,8 +685,7 @@ def create_service(storage: ResortStorage) -> None:
             storage.create_service(srv)
             # двунаправленно: привяжем услугу к сотруднику
             staff = storage.get_staff_member_by_id(staff_id)
-            staff.assign_service(service_id)
-            storage.update_staff_member(staff_id, staff)
+            storage.update_staff_member(staff_id, staff_with_services(staff, staff.service_ids + [service_id]))
             print("✓ Услуга создана")
             mark_dirty()
             break
@@ -538,30 +697,11 @@ def create_service(storage: ResortStorage) -> None:
 
 
 def list_services(storage: ResortStorage) -> None:
-    services = storage.list_services()
-    if not services:
+    rows = ROW_CACHE.get(storage, "services", _service_rows)
+    if not rows:
         print("Услуг нет.")
         return
-    for i, srv in enumerate(services, 1):
-        print(f"\n{i}. Услуга ID={srv.service_id}")
-        print(f"   Название: {srv.name}")
-        print(f"   Длительность: {srv.duration_minutes} мин")
-        if srv.location_id:
-            try:
-                location = storage.get_location_by_id(srv.location_id)
-                print(f"   Место: {srv.location_id} ({location.name})")
-            except EntityNotFoundError:
-                print(f"   Место: {srv.location_id} (не найдено)")
-        else:
-            print(f"   Место: (не назначено)")
-        if srv.staff_id:
-            try:
-                staff = storage.get_staff_member_by_id(srv.staff_id)
-                print(f"   Сотрудник: {srv.staff_id} ({staff.name}, {staff.role})")
-            except EntityNotFoundError:
-                print(f"   Сотрудник: {srv.staff_id} (не найден)")
-        else:
-            print(f"   Сотрудник: (не назначен)")
+    print("\n".join(rows))
 
 
 def update_service_admin(storage: ResortStorage) -> None:
@@ -632,12 +772,11 @@ def update_service_admin(storage: ResortStorage) -> None:
             # уберём услугу из всех сотрудников и добавим только выбранному
             for staff in storage.list_staff_members():
                 if service_id in staff.service_ids and staff.staff_id != staff_id:
-                    staff.service_ids.remove(service_id)
-                    storage.update_staff_member(staff.staff_id, staff)
+                    remaining = [sid for sid in staff.service_ids if sid != service_id]
+                    storage.update_staff_member(staff.staff_id, staff_with_services(staff, remaining))
             staff = storage.get_staff_member_by_id(staff_id)
             if service_id not in staff.service_ids:
-                staff.assign_service(service_id)
-                storage.update_staff_member(staff_id, staff)
+                storage.update_staff_member(staff_id, staff_with_services(staff, staff.service_ids + [service_id]))
 
             print("✓ Услуга обновлена")
             mark_dirty()
@@ -665,8 +804,8 @@ def delete_service_admin(storage: ResortStorage) -> None:
                     # также уберём ссылку на услугу у сотрудников
                     for staff in storage.list_staff_members():
                         if service_id in staff.service_ids:
-                            staff.service_ids.remove(service_id)
-                            storage.update_staff_member(staff.staff_id, staff)
+                            remaining = [sid for sid in staff.service_ids if sid != service_id]
+                            storage.update_staff_member(staff.staff_id, staff_with_services(staff, remaining))
                     storage.delete_service(service_id)
                     print("✓ Услуга удалена")
                     mark_dirty()
@@ -705,32 +844,10 @@ def create_booking(storage: ResortStorage) -> None:
                 continue
             
             # Показываем доступные услуги с их местами и сотрудниками
-            services = storage.list_services()
-            if services:
+            service_choices = ROW_CACHE.get(storage, "service_choices", _service_choice_rows)
+            if service_choices:
                 print("\nДоступные услуги:")
-                for srv in services:
-                    location_info = ""
-                    staff_info = ""
-                    if srv.location_id:
-                        try:
-                            loc = storage.get_location_by_id(srv.location_id)
-                            location_info = f", место: {srv.location_id} ({loc.name})"
-                        except EntityNotFoundError:
-                            location_info = f", место: {srv.location_id} (не найдено)"
-                    else:
-                        location_info = ", место: (не назначено)"
-                    
-                    if srv.staff_id:
-                        try:
-                            staff = storage.get_staff_member_by_id(srv.staff_id)
-                            staff_info = f", сотрудник: {srv.staff_id} ({staff.name})"
-                        except EntityNotFoundError:
-                            staff_info = f", сотрудник: {srv.staff_id} (не найден)"
-                    else:
-                        staff_info = ", сотрудник: (не назначен)"
-                    
-                    status = "✓" if srv.location_id and srv.staff_id else "⚠"
-                    print(f"  {status} {srv.service_id}: {srv.name} ({srv.duration_minutes} мин){location_info}{staff_info}")
+                print("\n".join(service_choices))
             else:
                 print("\n⚠ Услуг пока нет. Сначала создайте услугу.")
             print()
@@ -771,20 +888,11 @@ def create_booking(storage: ResortStorage) -> None:
 
 
 def list_bookings(storage: ResortStorage) -> None:
-    bookings = storage.list_bookings()
-    if not bookings:
+    rows = ROW_CACHE.get(storage, "bookings", _booking_rows)
+    if not rows:
         print("Бронирований нет.")
         return
-    for i, booking in enumerate(bookings, 1):
-        print(f"\n{i}. Бронирование ID={booking.booking_id}")
-        print(f"   Гость: {booking.guest.guest_id} ({booking.guest.name})")
-        print(f"   Услуга: {booking.service.service_id} ({booking.service.name}, {booking.service.duration_minutes} мин)")
-        print(f"   Место: {booking.location.location_id} ({booking.location.name})")
-        if booking.staff_member:
-            print(f"   Сотрудник: {booking.staff_member.staff_id} ({booking.staff_member.name}, {booking.staff_member.role})")
-        else:
-            print(f"   Сотрудник: (не назначен)")
-        print(f"   Время: {booking.time_slot.start_time.strftime('%Y-%m-%d %H:%M')} - {booking.time_slot.end_time.strftime('%H:%M')}")
+    print("\n".join(rows))
 
 
 def update_booking(storage: ResortStorage) -> None:
@@ -815,32 +923,10 @@ def update_booking(storage: ResortStorage) -> None:
                 continue
             
             # Показываем доступные услуги с их местами и сотрудниками
-            services = storage.list_services()
-            if services:
+            service_choices = ROW_CACHE.get(storage, "service_choices", _service_choice_rows)
+            if service_choices:
                 print("\nДоступные услуги:")
-                for srv in services:
-                    location_info = ""
-                    staff_info = ""
-                    if srv.location_id:
-                        try:
-                            loc = storage.get_location_by_id(srv.location_id)
-                            location_info = f", место: {srv.location_id} ({loc.name})"
-                        except EntityNotFoundError:
-                            location_info = f", место: {srv.location_id} (не найдено)"
-                    else:
-                        location_info = ", место: (не назначено)"
-                    
-                    if srv.staff_id:
-                        try:
-                            staff = storage.get_staff_member_by_id(srv.staff_id)
-                            staff_info = f", сотрудник: {srv.staff_id} ({staff.name})"
-                        except EntityNotFoundError:
-                            staff_info = f", сотрудник: {srv.staff_id} (не найден)"
-                    else:
-                        staff_info = ", сотрудник: (не назначен)"
-                    
-                    status = "✓" if srv.location_id and srv.staff_id else "⚠"
-                    print(f"  {status} {srv.service_id}: {srv.name} ({srv.duration_minutes} мин){location_info}{staff_info}")
+                print("\n".join(service_choices))
             else:
                 print("\n⚠ Услуг пока нет. Сначала создайте услугу.")
             print()
@@ -883,6 +969,59 @@ def update_booking(storage: ResortStorage) -> None:
             print(f"✗ Ошибка: {e}")
 
 
+def _print_day_schedule(schedule: DaySchedule) -> None:
+    day = schedule.day
+    print(f"\n=== {day.strftime('%Y-%m-%d')} ({len(schedule.bookings)} бронирований) ===")
+    if not schedule.bookings:
+        print("   Бронирований нет.")
+        return
+    for location_id, bookings in schedule.by_location.items():
+        print(f"\n   Место: {location_id} ({bookings[0].location.name})")
+        for booking in bookings:
+            slot = booking.time_slot
+            staff = booking.staff_member.name if booking.staff_member else "(не назначен)"
+            print(
+                f"     {slot.start_time.strftime('%H:%M')}-{slot.end_time.strftime('%H:%M')} "
+                f"{booking.booking_id}: {booking.service.name} | гость: {booking.guest.name} | сотрудник: {staff}"
+            )
+    print("\n   Загрузка сотрудников:")
+    for staff_id, bookings in schedule.by_staff.items():
+        print(f"     {staff_id} ({bookings[0].staff_member.name}): {len(bookings)} бронирований")
+
+
+def show_day_schedule(storage: ResortStorage) -> None:
+    try:
+        day = prompt_date("День")
+    except MenuExit:
+        print("Отмена просмотра расписания.")
+        return
+    _print_day_schedule(storage.get_day_schedule(day))
+
+
+def show_week_schedule(storage: ResortStorage) -> None:
+    try:
+        start = prompt_date("Первый день недели")
+    except MenuExit:
+        print("Отмена просмотра расписания.")
+        return
+    for schedule in storage.get_week_schedule(start):
+        _print_day_schedule(schedule)
+
+
+def show_day_schedule_as_of(storage: ResortStorage) -> None:
+    """Показать расписание дня в том виде, в каком оно было в указанный момент."""
+    try:
+        day = prompt_date("День")
+        moment = prompt_datetime("На момент")
+    except MenuExit:
+        print("Отмена просмотра расписания.")
+        return
+    try:
+        _print_day_schedule(VERSIONS.day_schedule_as_of(day, moment))
+    except ValidationError as e:
+        print(f"✗ Ошибка: {e}")
+
+
 def delete_booking(storage: ResortStorage) -> None:
     while True:
         try:
@@ -913,9 +1052,11 @@ def delete_booking(storage: ResortStorage) -> None:
 
 def save_data(storage: ResortStorage) -> None:
     """Сохранить данные в оба формата (JSON и XML) синхронно."""
+    from versioning import versions_path
+
     json_path = prompt("Путь к JSON для сохранения (например, lab1/storage_data.json) [Enter — по умолчанию]: ")
     if not json_path:
-        json_path = "lab1/storage_data.json"
+        json_path = DEFAULT_JSON_PATH
     
     # Генерируем путь к XML на основе пути к JSON
     if json_path.endswith(".json"):
@@ -926,10 +1067,12 @@ def save_data(storage: ResortStorage) -> None:
     try:
         storage.save_to_json(json_path)
         storage.save_to_xml(xml_path)
+        VERSIONS.save(versions_path(json_path))
         set_saved(json_path, "json")
         print(f"✓ Данные сохранены в оба формата:")
         print(f"  - JSON: {json_path}")
         print(f"  - XML: {xml_path}")
+        print(f"  - история версий: {versions_path(json_path)}")
     except StorageError as e:
         print(f"✗ Ошибка сохранения: {e}")
 
@@ -938,11 +1081,15 @@ def load_data_json(storage: ResortStorage) -> None:
     """Загрузить данные из JSON."""
     path = prompt("Путь к JSON для загрузки (например, lab1/storage_data.json) [Enter — по умолчанию]: ")
     if not path:
-        path = "lab1/storage_data.json"
+        path = DEFAULT_JSON_PATH
     try:
-        storage.load_from_json(path)
+        if AUTOSAVER:
+            with AUTOSAVER.paused():
+                cached = storage.load_from_json_cached(path)
+        else:
+            cached = storage.load_from_json_cached(path)
         set_loaded(path, "json")
-        print("✓ Данные загружены из JSON")
+        print("✓ Данные загружены из JSON" + (" (из кэша)" if cached else ""))
     except StorageError as e:
         print(f"✗ Ошибка: {e}")
 
@@ -953,16 +1100,84 @@ def load_data_xml(storage: ResortStorage) -> None:
     if not path:
         path = "lab1/storage_data.xml"
     try:
-        storage.load_from_xml(path)
+        if AUTOSAVER:
+            with AUTOSAVER.paused():
+                storage.load_from_xml(path)
+        else:
+            storage.load_from_xml(path)
         set_loaded(path, "xml")
         print("✓ Данные загружены из XML")
     except StorageError as e:
         print(f"✗ Ошибка: {e}")
 
 
+def validate_data_file(storage: ResortStorage) -> None:
+    """Проверить файл данных на целостность, не загружая его в хранилище."""
+    from snapshot import validate_snapshot
+
+    path = prompt("Путь к JSON/XML для проверки (например, lab1/storage_data.json) [Enter — по умолчанию]: ")
+    if not path:
+        path = DEFAULT_JSON_PATH
+    try:
+        report = validate_snapshot(path)
+    except StorageError as e:
+        print(f"✗ Ошибка: {e}")
+        return
+    print(report)
+
+
+def undo_last(storage: ResortStorage) -> None:
+    """Отменить последнее изменение."""
+    try:
+        print(f"✓ Отменено: {HISTORY.undo()}")
+        mark_dirty()
+    except ResortError as e:
+        print(f"✗ {e}")
+
+
+def redo_last(storage: ResortStorage) -> None:
+    """Повторить последнее отменённое изменение."""
+    try:
+        print(f"✓ Повторено: {HISTORY.redo()}")
+        mark_dirty()
+    except ResortError as e:
+        print(f"✗ {e}")
+
+
+def restore_deleted(storage: ResortStorage) -> None:
+    """Восстановить удалённую сущность (история версий хранится рядом с файлом данных)."""
+    from history import ENTITY_NAMES
+
+    deleted = [(entity, entity_id, item) for entity in ENTITY_NAMES for entity_id, item in VERSIONS.deleted(entity)]
+    if not deleted:
+        print("Удалённых сущностей нет.")
+        return
+    for number, (entity, _, item) in enumerate(deleted, 1):
+        print(f"{number}) {ENTITY_NAMES[entity]}: {item}")
+    while True:
+        try:
+            number = prompt_int("Номер для восстановления: ")
+        except MenuExit:
+            print("Отмена восстановления.")
+            return
+        if not 1 <= number <= len(deleted):
+            print("Нет такого номера.")
+            continue
+        entity, entity_id, _ = deleted[number - 1]
+        try:
+            VERSIONS.restore(entity, entity_id)
+            mark_dirty()
+            print(f"✓ Восстановлено: {ENTITY_NAMES[entity]} {entity_id}")
+            return
+        except (EntityNotFoundError, ValidationError) as e:
+            print(f"✗ Ошибка: {e}")
+            return
+
+
 def print_menu() -> None:
     print("\n=== Консольная админка курорта ===")
     print(current_state_text())
+    print(autosave_state_text())
     print("\n--- ПРОСМОТР ---")
     print("1) Список гостей")
     print("2) Список сотрудников")
@@ -987,16 +1202,73 @@ def print_menu() -> None:
     print("18) Удалить место")
     print("19) Удалить услугу")
     print("20) Удалить бронирование")
+    print("\n--- РАСПИСАНИЕ ---")
+    print("21) Расписание на день")
+    print("22) Расписание на неделю")
+    print("23) Расписание на день на момент времени")
     print("\n--- ФАЙЛЫ ---")
     print("s) Сохранить (JSON + XML)")
     print("lj) Загрузить из JSON")
     print("lx) Загрузить из XML")
+    print("v) Проверить файл перед загрузкой")
+    print("\n--- ИСТОРИЯ ---")
+    print("u) Отменить последнее изменение")
+    print("r) Повторить отменённое изменение")
+    print("d) Восстановить удалённое")
     print("q) Выход")
     print("\n(В любой момент ввода можно ввести 'q' или 'exit' для возврата в меню)")
 
 
-def run_admin() -> None:
+def open_data_file(storage: ResortStorage, path: str) -> None:
+    """Загрузить файл данных при запуске (JSON — через кэш разобранного снапшота)."""
+    if path.lower().endswith(".xml"):
+        storage.load_from_xml(path)
+        set_loaded(path, "xml")
+    else:
+        storage.load_from_json_cached(path)
+        set_loaded(path, "json")
+
+
+def run_admin(
+    autosave_interval: Optional[float] = None,
+    autosave_every: Optional[int] = None,
+    open_path: Optional[str] = None,
+) -> None:
+    """Запустить интерактивное меню (None — параметры автосохранения по умолчанию из autosave)."""
+    from autosave import AUTOSAVE_EVERY, AUTOSAVE_INTERVAL, Autosaver, autosave_path
+    from history import History
+    from versioning import VersionedStore
+
+    global AUTOSAVER, HISTORY, VERSIONS
+    if autosave_interval is None:
+        autosave_interval = AUTOSAVE_INTERVAL
+    if autosave_every is None:
+        autosave_every = AUTOSAVE_EVERY
     storage = ResortStorage()
+    HISTORY = History(storage)
+    VERSIONS = VersionedStore(storage)
+    VERSIONS.start_compaction(VERSIONS_RETENTION)
+    if open_path:
+        try:
+            open_data_file(storage, open_path)
+        except StorageError as e:
+            print(f"✗ Ошибка: {e}")
+    if autosave_interval > 0:
+        AUTOSAVER = Autosaver(storage, autosave_path(FILE_PATH or DEFAULT_JSON_PATH), autosave_interval, autosave_every)
+        AUTOSAVER.start()
+    try:
+        _menu_loop(storage)
+    finally:
+        if AUTOSAVER:
+            AUTOSAVER.stop()
+            AUTOSAVER = None
+        HISTORY.close()
+        HISTORY = None
+        VERSIONS.close()
+        VERSIONS = None
+
+
+def _menu_loop(storage: ResortStorage) -> None:
     actions = {
         # Просмотр
         "1": list_guests,
@@ -1022,10 +1294,19 @@ def run_admin() -> None:
         "18": delete_location,
         "19": delete_service_admin,
         "20": delete_booking,
+        # Расписание
+        "21": show_day_schedule,
+        "22": show_week_schedule,
+        "23": show_day_schedule_as_of,
         # Файлы
         "s": save_data,
         "lj": load_data_json,
         "lx": load_data_xml,
+        "v": validate_data_file,
+        # История
+        "u": undo_last,
+        "r": redo_last,
+        "d": restore_deleted,
     }
 
     while True:
@@ -1048,7 +1329,10 @@ def run_admin() -> None:
                 pass
             continue
         try:
-            action(storage)
+            # Все изменения одной команды меню отменяются одним шагом, а
+            # автосохранение не снимает снимок посреди команды
+            with AUTOSAVER.paused() if AUTOSAVER else nullcontext(), HISTORY.group():
+                action(storage)
         except MenuExit:
             # Пользователь вышел в меню - это нормально, не показываем ошибку
             pass
@@ -1066,5 +1350,19 @@ def run_admin() -> None:
 
 
 if __name__ == "__main__":
-    run_admin()
+    parser = argparse.ArgumentParser(description="Консольная админка курорта")
+    parser.add_argument("--autosave-interval", type=float, default=None,
+                        help="секунд между автосохранениями при наличии изменений (0 — выключить)")
+    parser.add_argument("--autosave-every", type=int, default=None,
+                        help="сохранять сразу после стольких изменений (0 — только по интервалу)")
+    parser.add_argument("--open", metavar="PATH", help="сразу загрузить файл данных (.json или .xml)")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="выполнить команды из файла (.jsonl или .csv) без интерактивного меню")
+    parser.add_argument("--load", metavar="PATH", help="пакетный режим: загрузить данные перед выполнением")
+    parser.add_argument("--save", metavar="PATH", help="пакетный режим: сохранить данные после выполнения")
+    args = parser.parse_args()
+    if args.batch:
+        from batch import run_batch_file
+        sys.exit(run_batch_file(args.batch, load_path=args.load, save_path=args.save))
+    run_admin(autosave_interval=args.autosave_interval, autosave_every=args.autosave_every, open_path=args.open)
 
@@ -0,0 +1,329 @@
+"""
+Аналитика загрузки курорта по бронированиям: занятость мест, сотрудников и
+услуг по часам, тепловая карта пиковых часов и нагрузка сотрудников.
+
+Занятость считается через накопленные суммы по временным ячейкам, без
+перебора минут или ячеек для каждого бронирования. Если установлен NumPy,
+вычисления векторизованы; без него используется та же схема на списках.
+
+Запуск: python analytics.py <файл.json|файл.xml> [--by location|staff|service] [--bin 60]
+"""
+
+import argparse
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from exceptions import StorageError, ValidationError
+from classes import Booking
+from storage import ResortStorage
+
+MINUTES_PER_DAY = 24 * 60
+WEEKDAYS = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+
+# Как получить ключ ресурса из бронирования
+RESOURCE_KEYS = {
+    "location": lambda booking: booking.location.location_id,
+    "staff": lambda booking: booking.staff_member.staff_id if booking.staff_member else None,
+    "service": lambda booking: booking.service.service_id,
+}
+
+
+def _minutes(value: datetime) -> int:
+    """Момент времени в минутах от начала эпохи datetime (секунды отбрасываются)."""
+    return value.toordinal() * MINUTES_PER_DAY + value.hour * 60 + value.minute
+
+
+def _busy_minutes_numpy(
+    resources: Sequence[int], starts: Sequence[int], ends: Sequence[int], count: int, bins: int, bin_minutes: int
+) -> Any:
+    """Занятые минуты в каждой ячейке для каждого ресурса (массив count x bins)."""
+    edges = bins + 1
+    resources = np.asarray(resources, dtype=np.int64)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    # Событие влияет на все границы ячеек не раньше себя: первая такая граница
+    start_slots = resources * edges + (starts + bin_minutes - 1) // bin_minutes
+    end_slots = resources * edges + (ends + bin_minutes - 1) // bin_minutes
+    size = count * edges
+    active = np.bincount(start_slots, minlength=size) - np.bincount(end_slots, minlength=size)
+    offsets = (np.bincount(start_slots, weights=starts, minlength=size)
+               - np.bincount(end_slots, weights=ends, minlength=size))
+    active = np.cumsum(active.reshape(count, edges), axis=1)
+    offsets = np.cumsum(offsets.reshape(count, edges), axis=1)
+    # Занятые минуты до границы t: сумма (t - начало) минус сумма (t - конец)
+    busy_before = np.arange(edges, dtype=np.int64) * bin_minutes * active - offsets
+    return np.rint(np.diff(busy_before, axis=1)).astype(np.int64)
+
+
+def _busy_minutes_python(
+    resources: Sequence[int], starts: Sequence[int], ends: Sequence[int], count: int, bins: int, bin_minutes: int
+) -> List[List[int]]:
+    """То же, что _busy_minutes_numpy, но на списках Python."""
+    edges = bins + 1
+    active = [0] * (count * edges)
+    offsets = [0] * (count * edges)
+    for resource, start, end in zip(resources, starts, ends):
+        slot = resource * edges + (start + bin_minutes - 1) // bin_minutes
+        active[slot] += 1
+        offsets[slot] += start
+        slot = resource * edges + (end + bin_minutes - 1) // bin_minutes
+        active[slot] -= 1
+        offsets[slot] -= end
+    result = []
+    for resource in range(count):
+        row = slice(resource * edges, (resource + 1) * edges)
+        busy_before = [
+            edge * bin_minutes * running - offset
+            for edge, (running, offset) in enumerate(zip(accumulate(active[row]), accumulate(offsets[row])))
+        ]
+        result.append([busy_before[i + 1] - busy_before[i] for i in range(bins)])
+    return result
+
+
+class UtilizationReport:
+    """Занятость ресурсов (мест, сотрудников или услуг) по временным ячейкам.
+
+    busy[i][k] — сколько минут ресурс keys[i] был занят в ячейке k,
+    ячейка k начинается в start + k * bin_minutes минут.
+    """
+
+    def __init__(
+        self,
+        by: str,
+        keys: List[str],
+        start: datetime,
+        bin_minutes: int,
+        busy: Any,
+        bookings: Dict[str, int],
+    ):
+        self.by: str = by
+        self.keys: List[str] = keys
+        self.start: datetime = start
+        self.bin_minutes: int = bin_minutes
+        self.busy: Any = busy
+        self.bookings: Dict[str, int] = bookings
+        self._index: Dict[str, int] = {key: i for i, key in enumerate(keys)}
+
+    @property
+    def bins(self) -> int:
+        return len(self.busy[0]) if self.keys else 0
+
+    def bin_start(self, index: int) -> datetime:
+        """Начало ячейки с номером index."""
+        return self.start + timedelta(minutes=index * self.bin_minutes)
+
+    def busy_minutes(self, key: str) -> List[int]:
+        """Занятые минуты ресурса по ячейкам."""
+        return [int(value) for value in self.busy[self._index[key]]]
+
+    def utilization(self, key: str) -> List[float]:
+        """Доля занятого времени ресурса в каждой ячейке (0..1)."""
+        return [value / self.bin_minutes for value in self.busy_minutes(key)]
+
+    def total_minutes(self, key: str) -> int:
+        return int(sum(self.busy[self._index[key]]))
+
+    def mean_utilization(self, key: str) -> float:
+        """Средняя занятость ресурса за весь период."""
+        return self.total_minutes(key) / (self.bins * self.bin_minutes) if self.bins else 0.0
+
+    def peak(self, key: str) -> Tuple[Optional[datetime], int]:
+        """Ячейка с наибольшей занятостью ресурса и занятые в ней минуты."""
+        row = self.busy_minutes(key)
+        if not row or max(row) == 0:
+            return None, 0
+        index = max(range(len(row)), key=row.__getitem__)
+        return self.bin_start(index), row[index]
+
+    def heatmap(self) -> List[List[float]]:
+        """Средняя занятость всех ресурсов по дням недели (строки) и часам (столбцы)."""
+        if np is not None and self.keys:
+            return self._heatmap_numpy()
+        booked = [[0] * 24 for _ in range(7)]
+        capacity = [[0] * 24 for _ in range(7)]
+        totals = [sum(column) for column in zip(*self.busy)] if self.keys else []
+        for index, total in enumerate(totals):
+            moment = self.bin_start(index)
+            booked[moment.weekday()][moment.hour] += total
+            capacity[moment.weekday()][moment.hour] += self.bin_minutes * len(self.keys)
+        return [
+            [booked[day][hour] / capacity[day][hour] if capacity[day][hour] else 0.0 for hour in range(24)]
+            for day in range(7)
+        ]
+
+    def _heatmap_numpy(self) -> List[List[float]]:
+        offsets = self.start.hour * 60 + self.start.minute + np.arange(self.bins, dtype=np.int64) * self.bin_minutes
+        days = (self.start.weekday() + offsets // MINUTES_PER_DAY) % 7
+        hours = (offsets % MINUTES_PER_DAY) // 60
+        cells = days * 24 + hours
+        booked = np.bincount(cells, weights=np.asarray(self.busy).sum(axis=0), minlength=7 * 24)
+        capacity = np.bincount(cells, minlength=7 * 24) * self.bin_minutes * len(self.keys)
+        ratio = np.divide(booked, capacity, out=np.zeros(7 * 24), where=capacity > 0)
+        return ratio.reshape(7, 24).tolist()
+
+    def __str__(self) -> str:
+        lines = [f"Занятость ({self.by}), ячейка {self.bin_minutes} мин, с {self.start:%Y-%m-%d}, ячеек: {self.bins}"]
+        for key in self.keys:
+            moment, minutes = self.peak(key)
+            peak = f"{moment:%Y-%m-%d %H:%M} ({minutes} мин)" if moment else "-"
+            lines.append(
+                f"  {key:<8} бронирований: {self.bookings.get(key, 0):>7}  "
+                f"средняя: {self.mean_utilization(key) * 100:5.1f} %  пик: {peak}"
+            )
+        return "\n".join(lines)
+
+
+class StaffLoad:
+    """Нагрузка одного сотрудника за период."""
+
+    def __init__(self, staff_id: str, name: str, bookings: int, busy_minutes: int, utilization: float):
+        self.staff_id: str = staff_id
+        self.name: str = name
+        self.bookings: int = bookings
+        self.busy_minutes: int = busy_minutes
+        self.utilization: float = utilization
+
+    def __str__(self) -> str:
+        return (f"Нагрузка(сотрудник={self.staff_id}, бронирований={self.bookings}, "
+                f"часов={self.busy_minutes / 60:.1f}, занятость={self.utilization * 100:.1f} %)")
+
+
+def utilization(
+    storage: ResortStorage,
+    by: str = "location",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bin_minutes: int = 60,
+    bookings: Optional[List[Booking]] = None,
+) -> UtilizationReport:
+    """Посчитать занятость мест, сотрудников или услуг по временным ячейкам.
+
+    Args:
+        storage: Хранилище с бронированиями
+        by: Ресурс: "location", "staff" или "service"
+        start: Начало периода; по умолчанию — полночь дня первого бронирования
+        end: Конец периода; по умолчанию — полночь после последнего бронирования
+        bin_minutes: Размер ячейки в минутах, должен делить сутки нацело
+        bookings: Бронирования для анализа; по умолчанию — все из хранилища
+
+    Returns:
+        Отчёт о занятости; бронирования за пределами периода обрезаются по его границам
+
+    Raises:
+        ValidationError: При неизвестном ресурсе или некорректном размере ячейки
+    """
+    if by not in RESOURCE_KEYS:
+        raise ValidationError(f"Неизвестный ресурс '{by}', ожидается: {', '.join(RESOURCE_KEYS)}")
+    if bin_minutes <= 0 or MINUTES_PER_DAY % bin_minutes:
+        raise ValidationError(f"Размер ячейки должен делить сутки нацело, получено: {bin_minutes}")
+    if bookings is None:
+        bookings = storage.list_bookings()
+    key_of = RESOURCE_KEYS[by]
+
+    if start is None or end is None:
+        if bookings:
+            first = min(booking.time_slot.start_time for booking in bookings)
+            last = max(booking.time_slot.end_time for booking in bookings)
+        else:
+            first = last = datetime.now()
+        if start is None:
+            start = datetime.combine(first.date(), datetime.min.time())
+        if end is None:
+            end = datetime.combine(last.date(), datetime.min.time()) + timedelta(days=1)
+    origin = _minutes(start)
+    total = max(0, _minutes(end) - origin)
+    bins = -(-total // bin_minutes)
+
+    index: Dict[str, int] = {}
+    counts: Dict[str, int] = {}
+    resources: List[int] = []
+    starts: List[int] = []
+    ends: List[int] = []
+    for booking in bookings:
+        key = key_of(booking)
+        if key is None:
+            continue
+        slot_start = min(max(_minutes(booking.time_slot.start_time) - origin, 0), total)
+        slot_end = min(max(_minutes(booking.time_slot.end_time) - origin, 0), total)
+        if slot_end <= slot_start:
+            continue
+        resources.append(index.setdefault(key, len(index)))
+        starts.append(slot_start)
+        ends.append(slot_end)
+        counts[key] = counts.get(key, 0) + 1
+
+    keys = list(index)
+    backend = _busy_minutes_numpy if np is not None else _busy_minutes_python
+    busy = backend(resources, starts, ends, len(keys), bins, bin_minutes) if keys else []
+    # Ресурсы в отчёте упорядочены по ID
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    if np is not None and keys:
+        busy = busy[order]
+    else:
+        busy = [busy[i] for i in order]
+    return UtilizationReport(by, [keys[i] for i in order], start, bin_minutes, busy, counts)
+
+
+def staff_load(
+    storage: ResortStorage,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[StaffLoad]:
+    """Нагрузка сотрудников за период, от самых загруженных к наименее.
+
+    Сотрудники без бронирований тоже попадают в список с нулевой нагрузкой.
+    """
+    report = utilization(storage, by="staff", start=start, end=end, bin_minutes=MINUTES_PER_DAY)
+    loads = []
+    for staff in storage.list_staff_members():
+        if staff.staff_id in report.bookings:
+            busy = report.total_minutes(staff.staff_id)
+            share = report.mean_utilization(staff.staff_id)
+        else:
+            busy, share = 0, 0.0
+        loads.append(StaffLoad(staff.staff_id, staff.name, report.bookings.get(staff.staff_id, 0), busy, share))
+    loads.sort(key=lambda load: (-load.busy_minutes, load.staff_id))
+    return loads
+
+
+def format_heatmap(heatmap: List[List[float]]) -> str:
+    """Тепловая карта в виде таблицы: строки — дни недели, столбцы — часы, значения в %."""
+    lines = ["    " + "".join(f"{hour:>4}" for hour in range(24))]
+    for day, row in zip(WEEKDAYS, heatmap):
+        lines.append(f"{day:<4}" + "".join(f"{value * 100:>4.0f}" for value in row))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Аналитика загрузки курорта")
+    parser.add_argument("path", help="файл данных (.json или .xml)")
+    parser.add_argument("--by", choices=sorted(RESOURCE_KEYS), default="location", help="по какому ресурсу считать занятость")
+    parser.add_argument("--bin", type=int, default=60, help="размер ячейки в минутах")
+    args = parser.parse_args(argv)
+    storage = ResortStorage()
+    try:
+        if args.path.lower().endswith(".xml"):
+            storage.load_from_xml(args.path)
+        else:
+            storage.load_from_json_cached(args.path)
+        report = utilization(storage, by=args.by, bin_minutes=args.bin)
+    except (StorageError, ValidationError) as e:
+        print(f"✗ Ошибка: {e}")
+        raise SystemExit(1)
+    print(report)
+    print("\nСредняя занятость по дням недели и часам, %:")
+    print(format_heatmap(report.heatmap()))
+    print("\nНагрузка сотрудников:")
+    for load in staff_load(storage):
+        print(f"  {load.staff_id:<8} {load.name:<20} бронирований: {load.bookings:>7}  "
+              f"часов: {load.busy_minutes / 60:9.1f}  занятость: {load.utilization * 100:5.1f} %")
+
+
+if __name__ == "__main__":
+    main()
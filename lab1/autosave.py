@@ -0,0 +1,123 @@
+"""
+Фоновое автосохранение хранилища курорта.
+Запись на диск выполняется в отдельном потоке, чтобы консоль не блокировалась.
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+from exceptions import StorageError
+from storage import ResortStorage
+
+AUTOSAVE_INTERVAL = 5.0  # секунд между проверками наличия изменений
+AUTOSAVE_EVERY = 20  # сохранять сразу после стольких изменений
+
+
+def autosave_path(json_path: str) -> str:
+    """Путь файла автосохранения рядом с основным JSON-файлом."""
+    base = json_path[:-5] if json_path.endswith(".json") else json_path
+    return base + ".autosave.json"
+
+
+class Autosaver:
+    """Сохраняет хранилище в JSON в фоновом потоке.
+
+    Сохранение запускается, если с момента последнего сохранения были
+    изменения и прошло interval секунд, либо сразу после every изменений.
+    Поток пишет неизменяемый снимок хранилища (ResortStorage.snapshot),
+    поэтому изменения в консоли во время записи не ждут её окончания.
+    """
+
+    def __init__(
+        self,
+        storage: ResortStorage,
+        path: str,
+        interval: float = AUTOSAVE_INTERVAL,
+        every: int = AUTOSAVE_EVERY,
+    ):
+        self.storage: ResortStorage = storage
+        self.path: str = path
+        self.interval: float = interval
+        self.every: int = every
+        self.last_saved: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._pending: int = 0
+        # Реентерабельная: внутри paused() тот же поток вызывает notify и reset
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Запустить фоновый поток автосохранения."""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self._thread.start()
+
+    def stop(self, flush: bool = True) -> None:
+        """Остановить поток; при flush=True сохранить оставшиеся изменения."""
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+        if flush:
+            self._save_pending()
+
+    def notify(self) -> None:
+        """Отметить изменение хранилища."""
+        with self._lock:
+            self._pending += 1
+            if self.every and self._pending >= self.every:
+                self._wakeup.set()
+
+    def reset(self, path: Optional[str] = None) -> None:
+        """Забыть накопленные изменения (после ручного сохранения или загрузки)."""
+        with self._lock:
+            self._pending = 0
+            if path is not None:
+                self.path = path
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """Не снимать снимок, пока идёт команда или хранилище перезаписывается целиком.
+
+        Изменения одной команды (например, создание услуги и обновление
+        сотрудника) попадают в файл автосохранения только вместе.
+        """
+        with self._lock:
+            yield
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if not self._stopped.is_set():
+                self._save_pending()
+
+    def _save_pending(self) -> None:
+        with self._lock:
+            pending = self._pending
+            if not pending:
+                return
+            self._pending = 0
+            snapshot = self.storage.snapshot()
+            path = self.path
+        try:
+            snapshot.save_to_json(path)
+        except StorageError as e:
+            self.last_error = str(e)
+            with self._lock:
+                self._pending += pending
+            return
+        self.last_error = None
+        self.last_saved = datetime.now()
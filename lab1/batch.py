@@ -0,0 +1,353 @@
+"""
+Пакетный (неинтерактивный) режим консольной админки курорта.
+
+Команды читаются из файла JSON Lines (.jsonl) или CSV (.csv). Каждая команда —
+плоская запись с полями op (create/update/delete), entity
+(guest/staff/location/service/booking), id и полями сущности:
+
+    guest:    name, email, phone, address
+    staff:    name, role, email, phone, service_ids (через запятую)
+    location: name
+    service:  name, duration_minutes, location_id, staff_id
+    booking:  guest_id, service_id, start (YYYY-MM-DD HH:MM)
+
+При создании id можно не указывать — он будет сгенерирован. При обновлении
+неуказанные поля сохраняют текущие значения.
+"""
+
+import csv
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from exceptions import ResortError, StorageError
+from classes import Booking, ContactInfo, Guest, Location, Service, StaffMember, TimeSlot
+from storage import ResortStorage
+from admin_console import EMAIL_RE, ID_PATTERNS, NAME_RE, PHONE_RE, staff_with_services
+
+OPERATIONS = ("create", "update", "delete")
+
+# Обязательные поля при создании
+REQUIRED_FIELDS = {
+    "guest": ("name", "email", "phone"),
+    "staff": ("name", "role", "email", "phone"),
+    "location": ("name",),
+    "service": ("name", "duration_minutes", "location_id", "staff_id"),
+    "booking": ("guest_id", "service_id", "start"),
+}
+
+# Проверки формата полей: поле -> (проверка, сообщение об ошибке)
+FIELD_CHECKS: Dict[str, Tuple[Callable[[str], bool], str]] = {
+    "name": (lambda v: bool(NAME_RE.match(v)), "только буквы и пробелы"),
+    "role": (lambda v: bool(NAME_RE.match(v)), "только буквы и пробелы"),
+    "email": (lambda v: bool(EMAIL_RE.match(v)), "неверный формат email"),
+    "phone": (lambda v: bool(PHONE_RE.match(v)), "только + и цифры"),
+    "location_id": (lambda v: bool(ID_PATTERNS["location"].match(v)), "неверный формат ID"),
+    "staff_id": (lambda v: bool(ID_PATTERNS["staff"].match(v)), "неверный формат ID"),
+    "guest_id": (lambda v: bool(ID_PATTERNS["guest"].match(v)), "неверный формат ID"),
+    "service_id": (lambda v: bool(ID_PATTERNS["service"].match(v)), "неверный формат ID"),
+}
+
+
+class BatchCommand:
+    """Одна команда пакетного файла."""
+
+    def __init__(self, line: int, op: str, entity: str, entity_id: Optional[str], fields: Dict[str, Any]):
+        self.line: int = line
+        self.op: str = op
+        self.entity: str = entity
+        self.entity_id: Optional[str] = entity_id
+        self.fields: Dict[str, Any] = fields
+
+    def __str__(self) -> str:
+        return f"Команда(строка={self.line}, {self.op} {self.entity} {self.entity_id or ''})"
+
+
+class BatchResult:
+    """Итог выполнения пакетного файла."""
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.total: int = 0
+        self.succeeded: int = 0
+        self.elapsed: float = 0.0
+        # (номер строки, сообщение)
+        self.errors: List[Tuple[int, str]] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def __str__(self) -> str:
+        rate = self.succeeded / self.elapsed if self.elapsed > 0 else 0.0
+        lines = [
+            f"Файл команд: {self.path}",
+            f"Команд: {self.total}, выполнено: {self.succeeded}, ошибок: {len(self.errors)}",
+            f"Время: {self.elapsed:.3f} с ({rate:.0f} команд/с)",
+        ]
+        for line, message in self.errors:
+            lines.append(f"✗ строка {line}: {message}")
+        return "\n".join(lines)
+
+
+def _read_records(path: str) -> List[Tuple[int, Dict[str, Any]]]:
+    """Прочитать записи команд из CSV или JSON Lines."""
+    records: List[Tuple[int, Dict[str, Any]]] = []
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as file:
+            if path.lower().endswith(".csv"):
+                reader = csv.DictReader(file)
+                for record in reader:
+                    records.append((reader.line_num, {k: v for k, v in record.items() if k and v not in (None, "")}))
+            else:
+                for number, line in enumerate(file, 1):
+                    if line.strip():
+                        records.append((number, json.loads(line)))
+    except FileNotFoundError:
+        raise StorageError(f"Файл '{path}' не найден")
+    except (IOError, OSError) as e:
+        raise StorageError(f"Ошибка чтения файла команд '{path}': {e}") from e
+    except (json.JSONDecodeError, csv.Error) as e:
+        raise StorageError(f"Ошибка парсинга файла команд '{path}': {e}") from e
+    return records
+
+
+def _parse_command(line: int, record: Any) -> BatchCommand:
+    """Проверить формат команды, не обращаясь к хранилищу.
+
+    Raises:
+        ValueError: Если команда некорректна
+    """
+    if not isinstance(record, dict):
+        raise ValueError("команда должна быть объектом")
+    fields = {key: value.strip() if isinstance(value, str) else value for key, value in record.items()}
+    op = str(fields.pop("op", "")).lower()
+    entity = str(fields.pop("entity", "")).lower()
+    entity_id = fields.pop("id", None) or None
+    if op not in OPERATIONS:
+        raise ValueError(f"неизвестная операция '{op}'")
+    if entity not in REQUIRED_FIELDS:
+        raise ValueError(f"неизвестная сущность '{entity}'")
+    if entity_id is not None and not ID_PATTERNS[entity].match(str(entity_id)):
+        raise ValueError(f"неверный формат ID '{entity_id}'")
+    if op != "create" and entity_id is None:
+        raise ValueError(f"для {op} нужен id")
+    if op == "delete":
+        return BatchCommand(line, op, entity, entity_id, {})
+    if op == "create":
+        missing = [name for name in REQUIRED_FIELDS[entity] if not fields.get(name)]
+        if missing:
+            raise ValueError(f"не заданы поля: {', '.join(missing)}")
+    for name, value in fields.items():
+        check = FIELD_CHECKS.get(name)
+        if check and value and not check[0](str(value)):
+            raise ValueError(f"{name}: {check[1]}")
+    if "duration_minutes" in fields:
+        fields["duration_minutes"] = int(fields["duration_minutes"])
+        if fields["duration_minutes"] <= 0:
+            raise ValueError("длительность должна быть положительной")
+    if "start" in fields:
+        fields["start"] = datetime.strptime(str(fields["start"]), "%Y-%m-%d %H:%M")
+    if "service_ids" in fields:
+        service_ids = fields["service_ids"]
+        if isinstance(service_ids, str):
+            service_ids = [sid.strip() for sid in service_ids.split(",") if sid.strip()]
+        fields["service_ids"] = list(service_ids)
+    return BatchCommand(line, op, entity, str(entity_id) if entity_id else None, fields)
+
+
+def _apply_guest(storage: ResortStorage, command: BatchCommand) -> None:
+    fields = command.fields
+    if command.op == "delete":
+        storage.delete_guest(command.entity_id)
+        return
+    if command.op == "create":
+        guest_id = command.entity_id or storage.generate_guest_id()
+        contact = ContactInfo(email=fields["email"], phone=fields["phone"], address=fields.get("address"))
+        storage.create_guest(Guest(guest_id=guest_id, name=fields["name"], contact=contact))
+        return
+    current = storage.get_guest_by_id(command.entity_id)
+    contact = ContactInfo(
+        email=fields.get("email", current.contact.email),
+        phone=fields.get("phone", current.contact.phone),
+        address=fields.get("address", current.contact.address),
+    )
+    storage.update_guest(command.entity_id, Guest(command.entity_id, fields.get("name", current.name), contact))
+
+
+def _apply_staff(storage: ResortStorage, command: BatchCommand) -> None:
+    fields = command.fields
+    if command.op == "delete":
+        storage.delete_staff_member(command.entity_id)
+        return
+    if command.op == "create":
+        staff_id = command.entity_id or storage.generate_staff_id()
+        contact = ContactInfo(email=fields["email"], phone=fields["phone"])
+        staff = StaffMember(staff_id=staff_id, name=fields["name"], role=fields["role"], contact=contact)
+        for sid in fields.get("service_ids", []):
+            staff.assign_service(sid)
+        storage.create_staff_member(staff)
+        return
+    current = storage.get_staff_member_by_id(command.entity_id)
+    contact = ContactInfo(
+        email=fields.get("email", current.contact.email),
+        phone=fields.get("phone", current.contact.phone),
+        address=current.contact.address,
+    )
+    staff = StaffMember(
+        staff_id=command.entity_id,
+        name=fields.get("name", current.name),
+        role=fields.get("role", current.role),
+        contact=contact,
+    )
+    for sid in fields.get("service_ids", current.service_ids):
+        staff.assign_service(sid)
+    storage.update_staff_member(command.entity_id, staff)
+
+
+def _apply_location(storage: ResortStorage, command: BatchCommand) -> None:
+    if command.op == "delete":
+        storage.delete_location(command.entity_id)
+    elif command.op == "create":
+        location_id = command.entity_id or storage.generate_location_id()
+        storage.create_location(Location(location_id=location_id, name=command.fields["name"]))
+    else:
+        current = storage.get_location_by_id(command.entity_id)
+        storage.update_location(command.entity_id, Location(command.entity_id, command.fields.get("name", current.name)))
+
+
+def _apply_service(storage: ResortStorage, command: BatchCommand) -> None:
+    fields = command.fields
+    if command.op == "delete":
+        storage.get_service_by_id(command.entity_id)
+        storage.delete_service(command.entity_id)
+        # как и в консоли, убираем ссылку на услугу у сотрудников
+        for staff in storage.list_staff_members():
+            if command.entity_id in staff.service_ids:
+                remaining = [sid for sid in staff.service_ids if sid != command.entity_id]
+                storage.update_staff_member(staff.staff_id, staff_with_services(staff, remaining))
+        return
+    if command.op == "create":
+        service_id = command.entity_id or storage.generate_service_id()
+        current = None
+    else:
+        service_id = command.entity_id
+        current = storage.get_service_by_id(service_id)
+    service = Service(
+        service_id=service_id,
+        name=fields.get("name", current.name if current else ""),
+        duration_minutes=fields.get("duration_minutes", current.duration_minutes if current else 0),
+    )
+    service.assign_location(fields.get("location_id", current.location_id if current else None))
+    service.assign_staff(fields.get("staff_id", current.staff_id if current else None))
+    if current is None:
+        storage.create_service(service)
+    else:
+        storage.update_service(service_id, service)
+    # двунаправленная привязка услуги к сотруднику, как в консоли
+    for staff in storage.list_staff_members():
+        if service_id in staff.service_ids and staff.staff_id != service.staff_id:
+            remaining = [sid for sid in staff.service_ids if sid != service_id]
+            storage.update_staff_member(staff.staff_id, staff_with_services(staff, remaining))
+    staff = storage.get_staff_member_by_id(service.staff_id)
+    if service_id not in staff.service_ids:
+        storage.update_staff_member(staff.staff_id, staff_with_services(staff, staff.service_ids + [service_id]))
+
+
+def _apply_booking(storage: ResortStorage, command: BatchCommand) -> None:
+    fields = command.fields
+    if command.op == "delete":
+        storage.delete_booking(command.entity_id)
+        return
+    current = storage.get_booking_by_id(command.entity_id) if command.op == "update" else None
+    guest = storage.get_guest_by_id(fields["guest_id"]) if "guest_id" in fields else current.guest
+    service = storage.get_service_by_id(fields["service_id"]) if "service_id" in fields else current.service
+    start = fields.get("start", current.time_slot.start_time if current else None)
+    if not service.location_id or not service.staff_id:
+        raise StorageError("Услуга должна иметь назначенные место и сотрудника")
+    booking = Booking(
+        booking_id=command.entity_id or storage.generate_booking_id(),
+        guest=guest,
+        service=service,
+        time_slot=TimeSlot(start_time=start, end_time=start + timedelta(minutes=service.duration_minutes)),
+        location=storage.get_location_by_id(service.location_id),
+    )
+    booking.assign_staff(storage.get_staff_member_by_id(service.staff_id))
+    if current is None:
+        storage.create_booking(booking)
+    else:
+        storage.update_booking(command.entity_id, booking)
+
+
+APPLIERS: Dict[str, Callable[[ResortStorage, BatchCommand], None]] = {
+    "guest": _apply_guest,
+    "staff": _apply_staff,
+    "location": _apply_location,
+    "service": _apply_service,
+    "booking": _apply_booking,
+}
+
+
+def run_batch(storage: ResortStorage, path: str) -> BatchResult:
+    """Выполнить файл команд над хранилищем.
+
+    Сначала проверяется формат всех команд; если хотя бы одна некорректна,
+    ни одна команда не выполняется. Затем команды выполняются по порядку;
+    ошибки отдельных команд (конфликты, несуществующие ID) попадают в отчёт,
+    не прерывая остальные.
+
+    Args:
+        storage: Хранилище, над которым выполняются команды
+        path: Путь к файлу команд (.jsonl или .csv)
+
+    Returns:
+        Отчёт с числом выполненных команд, ошибками и скоростью
+
+    Raises:
+        StorageError: Если файл команд не удаётся прочитать
+    """
+    result = BatchResult(path)
+    started = time.perf_counter()
+    commands: List[BatchCommand] = []
+    for line, record in _read_records(path):
+        result.total += 1
+        try:
+            commands.append(_parse_command(line, record))
+        except (ValueError, TypeError) as e:
+            result.errors.append((line, str(e)))
+    if not result.errors:
+        for command in commands:
+            try:
+                APPLIERS[command.entity](storage, command)
+                result.succeeded += 1
+            except ResortError as e:
+                result.errors.append((command.line, f"{command.op} {command.entity}: {e}"))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def run_batch_file(path: str, load_path: Optional[str] = None, save_path: Optional[str] = None) -> int:
+    """Загрузить данные, выполнить файл команд и один раз сохранить результат.
+
+    Returns:
+        Код завершения процесса: 0 — все команды выполнены, 1 — были ошибки
+    """
+    storage = ResortStorage()
+    try:
+        if load_path:
+            if load_path.lower().endswith(".xml"):
+                storage.load_from_xml(load_path)
+            else:
+                storage.load_from_json_cached(load_path)
+        result = run_batch(storage, path)
+        print(result)
+        if save_path and result.succeeded:
+            xml_path = (save_path[:-5] if save_path.endswith(".json") else save_path) + ".xml"
+            storage.save_to_json(save_path)
+            storage.save_to_xml(xml_path)
+            print(f"✓ Данные сохранены: {save_path}, {xml_path}")
+    except StorageError as e:
+        print(f"✗ Ошибка: {e}")
+        return 1
+    return 0 if result.ok else 1
@@ -0,0 +1,210 @@
+"""
+Замеры производительности хранилища курорта на синтетических данных.
+
+Запуск: python bench.py <замер> [параметры], список замеров — python bench.py -h.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from storage import ResortStorage
+
+ROLES = ["Массажист", "Банщик", "Проводник", "Грязетерапевт", "Инструктор"]
+CITIES = ["Москва, Россия", "Казань, Россия", "Тверь, Россия", "Болото, Тридевятое королевство"]
+SERVICE_NAMES = ["Грязевая ванна", "Массаж", "Прогулка по тропе", "Банный ритуал", "Травяной чай"]
+DURATIONS = [30, 60, 90]
+
+
+def make_snapshot_data(
+    bookings: int,
+    guests: Optional[int] = None,
+    locations: int = 20,
+    start: datetime = datetime(2024, 1, 1, 9, 0),
+    seed: int = 1,
+) -> Dict[str, Any]:
+    """Сгенерировать сериализованные данные хранилища без пересечений бронирований.
+
+    На каждое место приходится одна услуга и один сотрудник; бронирования
+    места идут по сетке полуторачасовых слотов с 9:00 до 21:00 и переходят
+    на следующий день.
+    Гость выбирается так, чтобы у него не было одновременных бронирований.
+    """
+    rng = random.Random(seed)
+    guests = guests or max(1, bookings // 10)
+    data: Dict[str, Any] = {
+        "guests": [
+            {
+                "guest_id": f"G{i:03d}",
+                "name": f"Гость {i}",
+                "contact": {
+                    "email": f"guest{i}@shrek.com",
+                    "phone": f"+7900{i:07d}",
+                    "address": rng.choice(CITIES),
+                },
+            }
+            for i in range(1, guests + 1)
+        ],
+        "staff_members": [],
+        "services": [],
+        "locations": [],
+        "bookings": [],
+    }
+    for i in range(1, locations + 1):
+        data["locations"].append({"location_id": f"L{i:03d}", "name": f"{rng.choice(SERVICE_NAMES)} №{i}"})
+        data["staff_members"].append({
+            "staff_id": f"S{i:03d}",
+            "name": f"Сотрудник {i}",
+            "role": rng.choice(ROLES),
+            "contact": {"email": f"staff{i}@shrek.com", "phone": f"+7901{i:07d}", "address": rng.choice(CITIES)},
+            "service_ids": [f"SRV{i:03d}"],
+        })
+        data["services"].append({
+            "service_id": f"SRV{i:03d}",
+            "name": rng.choice(SERVICE_NAMES),
+            "duration_minutes": rng.choice(DURATIONS),
+            "location_id": f"L{i:03d}",
+            "staff_id": f"S{i:03d}",
+        })
+
+    # Все места работают синхронно по сетке слотов: одинаковые интервалы
+    # повторяются у разных мест, как в реальном расписании курорта
+    slot = 0
+    number = 1
+    while number <= bookings:
+        day, index = divmod(slot, 8)
+        slot_start = start + timedelta(days=day, minutes=90 * index)
+        for i in range(min(locations, guests)):
+            if number > bookings:
+                break
+            service = data["services"][i]
+            data["bookings"].append({
+                "booking_id": f"B{number:03d}",
+                "guest_id": f"G{(slot * locations + i) % guests + 1:03d}",
+                "service_id": service["service_id"],
+                "location_id": service["location_id"],
+                "staff_id": service["staff_id"],
+                "time_slot": {
+                    "start_time": slot_start.isoformat(),
+                    "end_time": (slot_start + timedelta(minutes=service["duration_minutes"])).isoformat(),
+                },
+            })
+            number += 1
+        slot += 1
+    return data
+
+
+def make_storage(bookings: int, **kwargs: Any) -> ResortStorage:
+    """Создать хранилище, заполненное синтетическими данными."""
+    storage = ResortStorage()
+    storage._load_serializable_data(make_snapshot_data(bookings, **kwargs))
+    return storage
+
+
+def _retained_memory(data_path: str, dedupe: bool) -> int:
+    """Объём памяти, который удерживает хранилище после загрузки снапшота."""
+    gc.collect()
+    tracemalloc.start()
+    with open(data_path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    storage = ResortStorage()
+    storage._load_serializable_data(data, dedupe=dedupe)
+    del data
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del storage
+    return current
+
+
+def bench_memory(args: argparse.Namespace) -> None:
+    """Сравнить память хранилища при загрузке с дедупликацией и без неё."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "snapshot.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(make_snapshot_data(args.bookings), file, ensure_ascii=False)
+        plain = _retained_memory(path, dedupe=False)
+        shared = _retained_memory(path, dedupe=True)
+    print(f"Бронирований: {args.bookings}")
+    print(f"  без дедупликации: {plain / 1024 / 1024:8.1f} МБ")
+    print(f"  с дедупликацией:  {shared / 1024 / 1024:8.1f} МБ")
+    print(f"  экономия:         {(1 - shared / plain) * 100:8.1f} %")
+
+
+def _run_python(code: str, repeat: int) -> float:
+    """Медианное время запуска отдельного интерпретатора с кодом code."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=here, check=True)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def bench_startup(args: argparse.Namespace) -> None:
+    """Время запуска: импорт консоли и загрузка снапшота из JSON и из кэша."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "snapshot.json")
+        make_storage(args.bookings).save_to_json(path)
+        load = f"from storage import ResortStorage; ResortStorage().{{}}({path!r})"
+        # Первый запуск создаёт кэш, дальнейшие его читают
+        _run_python(load.format("load_from_json_cached"), 1)
+        results = [
+            ("пустой интерпретатор", _run_python("pass", args.repeat)),
+            ("импорт admin_console", _run_python("import admin_console", args.repeat)),
+            ("загрузка JSON", _run_python(load.format("load_from_json"), args.repeat)),
+            ("загрузка из кэша", _run_python(load.format("load_from_json_cached"), args.repeat)),
+        ]
+    print(f"Бронирований: {args.bookings}, медиана из {args.repeat} запусков")
+    for name, seconds in results:
+        print(f"  {name:<22} {seconds * 1000:10.1f} мс")
+
+
+def bench_analytics(args: argparse.Namespace) -> None:
+    """Время расчёта почасовой занятости, тепловой карты и нагрузки сотрудников."""
+    import analytics
+
+    storage = make_storage(args.bookings)
+    bookings = storage.list_bookings()
+    days = (max(b.time_slot.end_time for b in bookings) - min(b.time_slot.start_time for b in bookings)).days + 1
+    print(f"Бронирований: {args.bookings} (дней: {days}), NumPy: {'да' if analytics.np is not None else 'нет'}")
+    for by in ("location", "staff", "service"):
+        started = time.perf_counter()
+        report = analytics.utilization(storage, by=by)
+        report.heatmap()
+        label = f"занятость по часам ({by})"
+        print(f"  {label:<30} {(time.perf_counter() - started) * 1000:8.1f} мс")
+    started = time.perf_counter()
+    analytics.staff_load(storage)
+    print(f"  {'нагрузка сотрудников':<30} {(time.perf_counter() - started) * 1000:8.1f} мс")
+
+
+BENCHMARKS: Dict[str, Callable[[argparse.Namespace], None]] = {
+    "analytics": bench_analytics,
+    "memory": bench_memory,
+    "startup": bench_startup,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Замеры производительности хранилища курорта")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS), help="какой замер выполнить")
+    parser.add_argument("--bookings", type=int, default=100_000, help="число бронирований в синтетических данных")
+    parser.add_argument("--repeat", type=int, default=5, help="число повторов для замеров времени")
+    args = parser.parse_args(argv)
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,8 @@
 Описывает ключевые сущности: гостей, сотрудников, локации, услуги, бронирования.
 """
 
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime
+from typing import Dict, Optional, List
 
 
 class ContactInfo:
@@ -114,3 +114,32 @@ class Booking:
     def __str__(self) -> str:
         return f"Бронирование(id={self.booking_id}, гость={self.guest.name}, услуга={self.service.name})"
 
+
+class DaySchedule:
+    """Расписание на один день: бронирования, сгруппированные по местам и сотрудникам."""
+    
+    def __init__(self, day: date, bookings: List[Booking]):
+        self.day: date = day
+        self.bookings: List[Booking] = sorted(bookings, key=lambda b: b.time_slot.start_time)
+        self.by_location: Dict[str, List[Booking]] = {}
+        self.by_staff: Dict[str, List[Booking]] = {}
+        for booking in self.bookings:
+            self.by_location.setdefault(booking.location.location_id, []).append(booking)
+            if booking.staff_member:
+                self.by_staff.setdefault(booking.staff_member.staff_id, []).append(booking)
+    
+    def __str__(self) -> str:
+        return f"Расписание(день={self.day.isoformat()}, бронирований={len(self.bookings)})"
+
+
+class ServiceView:
+    """Услуга вместе с уже найденными местом и сотрудником (None — не назначено или не найдено)."""
+    
+    def __init__(self, service: Service, location: Optional[Location], staff_member: Optional[StaffMember]):
+        self.service: Service = service
+        self.location: Optional[Location] = location
+        self.staff_member: Optional[StaffMember] = staff_member
+    
+    def __str__(self) -> str:
+        return f"ПредставлениеУслуги(id={self.service.service_id})"
+
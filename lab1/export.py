@@ -0,0 +1,333 @@
+"""
+Выгрузка бронирований курорта в плоские таблицы для BI-инструментов.
+
+Каждое бронирование превращается в одну денормализованную строку (гость,
+услуга, сотрудник, место, начало, конец). Строки порождает генератор и
+записывают порциями по chunk_rows, поэтому память не растёт с числом
+бронирований. Поддерживаются CSV и компактный колоночный формат RCOL:
+
+    заголовок: b"RCOL", версия (u16), число колонок (u16),
+               для каждой колонки — имя и тип (u16 длина + UTF-8)
+    группы строк до конца файла: число строк (u32), затем для каждой
+               колонки блок (u32 длина + данные, сжатые zlib)
+
+Строковые колонки внутри группы кодируются словарём (уникальные значения
+и индексы), целочисленные и временные — массивом int64 (время — секунды
+от 1970-01-01 без учёта часового пояса).
+
+Запуск: python export.py <файл.json|файл.xml> <выходной файл> [--format csv|rcol] [--chunk-rows 10000]
+"""
+
+import argparse
+import os
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from exceptions import StorageError, ValidationError
+from classes import Booking
+from storage import ResortStorage
+
+CHUNK_ROWS = 10000  # строк в одной порции записи / группе строк RCOL
+
+# Колонки выгрузки и их типы в формате RCOL
+EXPORT_COLUMNS: List[Tuple[str, str]] = [
+    ("booking_id", "str"),
+    ("guest_id", "str"),
+    ("guest_name", "str"),
+    ("service_id", "str"),
+    ("service_name", "str"),
+    ("staff_id", "str"),
+    ("staff_name", "str"),
+    ("location_id", "str"),
+    ("location_name", "str"),
+    ("start", "datetime"),
+    ("end", "datetime"),
+    ("duration_minutes", "int"),
+]
+
+RCOL_MAGIC = b"RCOL"
+RCOL_VERSION = 1
+EPOCH = datetime(1970, 1, 1)
+
+Row = Tuple[Any, ...]
+
+
+def iter_booking_rows(storage: ResortStorage, bookings: Optional[Iterable[Booking]] = None) -> Iterator[Row]:
+    """Денормализованные строки бронирований в порядке EXPORT_COLUMNS.
+
+    Args:
+        storage: Хранилище (используется, если bookings не переданы)
+        bookings: Бронирования для выгрузки (по умолчанию — все бронирования хранилища)
+    """
+    if bookings is None:
+        bookings = storage.list_bookings()
+    for booking in bookings:
+        slot = booking.time_slot
+        staff = booking.staff_member
+        yield (
+            booking.booking_id,
+            booking.guest.guest_id,
+            booking.guest.name,
+            booking.service.service_id,
+            booking.service.name,
+            staff.staff_id if staff else "",
+            staff.name if staff else "",
+            booking.location.location_id,
+            booking.location.name,
+            slot.start_time,
+            slot.end_time,
+            (slot.end_time - slot.start_time) // timedelta(minutes=1),
+        )
+
+
+def iter_chunks(rows: Iterable[Row], chunk_rows: int = CHUNK_ROWS) -> Iterator[List[Row]]:
+    """Разбить поток строк на списки не длиннее chunk_rows."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _check_chunk_rows(chunk_rows: int) -> None:
+    if chunk_rows < 1:
+        raise ValidationError("Размер порции должен быть положительным")
+
+
+def _discard(tmp_path: str) -> None:
+    """Удалить недописанный временный файл выгрузки."""
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+
+# ========== CSV ==========
+
+def export_csv(
+    storage: ResortStorage,
+    path: str,
+    bookings: Optional[Iterable[Booking]] = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> int:
+    """Выгрузить бронирования в CSV (UTF-8, разделитель — запятая).
+
+    Время записывается как YYYY-MM-DD HH:MM, отсутствующий сотрудник — пустыми полями.
+
+    Returns:
+        Число выгруженных строк
+
+    Raises:
+        ValidationError: Если размер порции не положителен
+        StorageError: При ошибках записи файла
+    """
+    import csv
+
+    _check_chunk_rows(chunk_rows)
+    count = 0
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow([name for name, _ in EXPORT_COLUMNS])
+            for chunk in iter_chunks(iter_booking_rows(storage, bookings), chunk_rows):
+                writer.writerows(
+                    row[:9] + (f"{row[9]:%Y-%m-%d %H:%M}", f"{row[10]:%Y-%m-%d %H:%M}", row[11])
+                    for row in chunk
+                )
+                count += len(chunk)
+        os.replace(tmp_path, path)
+    except (IOError, OSError) as e:
+        _discard(tmp_path)
+        raise StorageError(f"Ошибка выгрузки в CSV-файл '{path}': {e}") from e
+    return count
+
+
+# ========== Колоночный формат RCOL ==========
+
+def _little_endian(data: array) -> array:
+    """Привести массив к порядку байтов файла (little-endian) и обратно."""
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data
+
+
+def _encode_column(kind: str, values: List[Any]) -> bytes:
+    if kind == "str":
+        # Словарь уникальных значений группы и индексы строк в нём
+        positions: Dict[str, int] = {}
+        indexes = array("I", (positions.setdefault(value, len(positions)) for value in values))
+        words = [value.encode("utf-8") for value in positions]
+        lengths = array("I", (len(word) for word in words))
+        payload = b"".join((
+            struct.pack("<I", len(words)),
+            _little_endian(lengths).tobytes(),
+            b"".join(words),
+            _little_endian(indexes).tobytes(),
+        ))
+    elif kind == "datetime":
+        payload = _little_endian(array("q", ((value - EPOCH) // timedelta(seconds=1) for value in values))).tobytes()
+    else:
+        payload = _little_endian(array("q", values)).tobytes()
+    return zlib.compress(payload)
+
+
+def _decode_column(kind: str, block: bytes, rows: int) -> List[Any]:
+    """Разобрать блок колонки; ValueError, если он не соответствует числу строк."""
+    payload = zlib.decompress(block)
+    if kind == "str":
+        (size,) = struct.unpack_from("<I", payload)
+        offset = 4 + 4 * size
+        if offset > len(payload):
+            raise ValueError("словарь колонки обрезан")
+        lengths = array("I")
+        lengths.frombytes(payload[4:offset])
+        words = []
+        for length in _little_endian(lengths):
+            if offset + length > len(payload):
+                raise ValueError("словарь колонки обрезан")
+            words.append(payload[offset:offset + length].decode("utf-8"))
+            offset += length
+        if len(payload) - offset != 4 * rows:
+            raise ValueError(f"число индексов колонки не равно числу строк {rows}")
+        indexes = array("I")
+        indexes.frombytes(payload[offset:])
+        _little_endian(indexes)
+        if rows and max(indexes) >= size:
+            raise ValueError("индекс колонки вне словаря")
+        return [words[index] for index in indexes]
+    if len(payload) != 8 * rows:
+        raise ValueError(f"число значений колонки не равно числу строк {rows}")
+    values = array("q")
+    values.frombytes(payload)
+    _little_endian(values)
+    if kind == "datetime":
+        return [EPOCH + timedelta(seconds=value) for value in values]
+    return values.tolist()
+
+
+def export_rcol(
+    storage: ResortStorage,
+    path: str,
+    bookings: Optional[Iterable[Booking]] = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> int:
+    """Выгрузить бронирования в колоночный формат RCOL (группами по chunk_rows строк).
+
+    Returns:
+        Число выгруженных строк
+
+    Raises:
+        ValidationError: Если размер порции не положителен
+        StorageError: При ошибках записи файла
+    """
+    _check_chunk_rows(chunk_rows)
+    count = 0
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as file:
+            file.write(RCOL_MAGIC + struct.pack("<HH", RCOL_VERSION, len(EXPORT_COLUMNS)))
+            for name, kind in EXPORT_COLUMNS:
+                for text in (name, kind):
+                    encoded = text.encode("utf-8")
+                    file.write(struct.pack("<H", len(encoded)) + encoded)
+            for chunk in iter_chunks(iter_booking_rows(storage, bookings), chunk_rows):
+                file.write(struct.pack("<I", len(chunk)))
+                for index, (_, kind) in enumerate(EXPORT_COLUMNS):
+                    block = _encode_column(kind, [row[index] for row in chunk])
+                    file.write(struct.pack("<I", len(block)) + block)
+                count += len(chunk)
+        os.replace(tmp_path, path)
+    except (IOError, OSError) as e:
+        _discard(tmp_path)
+        raise StorageError(f"Ошибка выгрузки в RCOL-файл '{path}': {e}") from e
+    return count
+
+
+def _read_exact(file: BinaryIO, size: int, path: str) -> bytes:
+    data = file.read(size)
+    if len(data) != size:
+        raise StorageError(f"Файл '{path}' обрезан или повреждён")
+    return data
+
+
+def _read_text(file: BinaryIO, path: str) -> str:
+    (size,) = struct.unpack("<H", _read_exact(file, 2, path))
+    return _read_exact(file, size, path).decode("utf-8")
+
+
+def read_rcol(path: str) -> Iterator[Dict[str, List[Any]]]:
+    """Читать RCOL-файл по группам строк: словарь колонка -> значения группы.
+
+    Raises:
+        StorageError: Если файл не найден, не в формате RCOL или повреждён
+    """
+    try:
+        with open(path, "rb") as file:
+            header = file.read(8)
+            if len(header) != 8 or header[:4] != RCOL_MAGIC:
+                raise StorageError(f"Файл '{path}' не в формате RCOL")
+            version, columns = struct.unpack("<HH", header[4:])
+            if version != RCOL_VERSION:
+                raise StorageError(f"Неподдерживаемая версия RCOL: {version}")
+            schema = [(_read_text(file, path), _read_text(file, path)) for _ in range(columns)]
+            while True:
+                head = file.read(4)
+                if not head:
+                    return
+                if len(head) != 4:
+                    raise StorageError(f"Файл '{path}' обрезан или повреждён")
+                (rows,) = struct.unpack("<I", head)
+                group = {}
+                for name, kind in schema:
+                    (size,) = struct.unpack("<I", _read_exact(file, 4, path))
+                    group[name] = _decode_column(kind, _read_exact(file, size, path), rows)
+                yield group
+    except FileNotFoundError as e:
+        raise StorageError(f"Файл '{path}' не найден") from e
+    except (IOError, OSError, zlib.error, struct.error, ValueError, OverflowError) as e:
+        raise StorageError(f"Ошибка чтения RCOL-файла '{path}': {e}") from e
+
+
+def iter_rcol_rows(path: str) -> Iterator[Row]:
+    """Строки RCOL-файла в порядке колонок файла."""
+    for group in read_rcol(path):
+        yield from zip(*group.values())
+
+
+EXPORTERS = {
+    "csv": export_csv,
+    "rcol": export_rcol,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Выгрузка бронирований курорта в плоские таблицы")
+    parser.add_argument("path", help="файл данных (.json или .xml)")
+    parser.add_argument("output", help="выходной файл")
+    parser.add_argument("--format", choices=sorted(EXPORTERS), default=None,
+                        help="формат выгрузки (по умолчанию — по расширению выходного файла)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="строк в одной порции записи")
+    args = parser.parse_args(argv)
+    export_format = args.format or ("rcol" if args.output.lower().endswith(".rcol") else "csv")
+    storage = ResortStorage()
+    try:
+        if args.path.lower().endswith(".xml"):
+            storage.load_from_xml(args.path)
+        else:
+            storage.load_from_json_cached(args.path)
+        count = EXPORTERS[export_format](storage, args.output, chunk_rows=args.chunk_rows)
+    except (StorageError, ValidationError) as e:
+        print(f"✗ Ошибка: {e}")
+        raise SystemExit(1)
+    print(f"✓ Выгружено бронирований: {count} -> {args.output} ({export_format})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+История изменений хранилища курорта для отмены и повтора операций.
+
+История подписывается на изменения ResortStorage и хранит для каждого из
+них пару (старое, новое значение) — этого достаточно, чтобы выполнить
+обратную операцию без снимков всего хранилища. Объём истории ограничен
+числом шагов.
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Iterator, List, Optional, Tuple
+
+from exceptions import ResortError
+from storage import ResortStorage
+
+HISTORY_LIMIT = 100  # шагов отмены по умолчанию
+
+ENTITY_NAMES = {
+    "guest": "гость",
+    "staff_member": "сотрудник",
+    "service": "услуга",
+    "location": "место",
+    "booking": "бронирование",
+}
+
+# Одно изменение: (сущность, ID, старое значение, новое значение)
+Change = Tuple[str, str, Any, Any]
+
+
+def describe(changes: List[Change]) -> str:
+    """Краткое описание шага истории для сообщений консоли."""
+    parts = []
+    for entity, entity_id, old, new in changes:
+        action = "создание" if old is None else "удаление" if new is None else "изменение"
+        parts.append(f"{action}: {ENTITY_NAMES.get(entity, entity)} {entity_id}")
+    return ", ".join(parts)
+
+
+class History:
+    """Стек отмены и повтора изменений хранилища.
+
+    Шаг истории — список изменений; изменения внутри group() образуют один
+    шаг, остальные записываются по одному. Отмена и повтор выполняются
+    через обычные методы хранилища (create_*/update_*/delete_*), поэтому
+    проходят те же проверки. Полная очистка хранилища (загрузка из файла)
+    сбрасывает историю.
+    """
+
+    def __init__(self, storage: ResortStorage, limit: int = HISTORY_LIMIT):
+        self.storage: ResortStorage = storage
+        self._undo: Deque[List[Change]] = deque(maxlen=limit)
+        self._redo: Deque[List[Change]] = deque(maxlen=limit)
+        self._group: Optional[List[Change]] = None
+        self._replaying: bool = False
+        storage.add_listener(self._record)
+
+    def close(self) -> None:
+        """Отписаться от изменений хранилища."""
+        self.storage.remove_listener(self._record)
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+
+    @contextmanager
+    def group(self) -> Iterator[None]:
+        """Объединить изменения внутри блока в один шаг истории."""
+        if self._group is not None:
+            yield
+            return
+        self._group = []
+        try:
+            yield
+        finally:
+            changes, self._group = self._group, None
+            if changes:
+                self._push(changes)
+
+    def undo(self) -> str:
+        """Отменить последний шаг.
+
+        Returns:
+            Описание отменённого шага
+
+        Raises:
+            ResortError: Если отменять нечего или обратная операция не прошла проверки
+        """
+        if not self._undo:
+            raise ResortError("Нечего отменять")
+        changes = self._undo.pop()
+        try:
+            self._apply([(entity, entity_id, new, old) for entity, entity_id, old, new in reversed(changes)])
+        except ResortError:
+            self._undo.append(changes)
+            raise
+        self._redo.append(changes)
+        return describe(changes)
+
+    def redo(self) -> str:
+        """Повторить последний отменённый шаг.
+
+        Returns:
+            Описание повторённого шага
+
+        Raises:
+            ResortError: Если повторять нечего или операция не прошла проверки
+        """
+        if not self._redo:
+            raise ResortError("Нечего повторять")
+        changes = self._redo.pop()
+        try:
+            self._apply(changes)
+        except ResortError:
+            self._redo.append(changes)
+            raise
+        self._undo.append(changes)
+        return describe(changes)
+
+    def _record(self, entity: Optional[str], entity_id: Optional[str], old: Any, new: Any) -> None:
+        if self._replaying:
+            return
+        if entity is None:
+            self.clear()
+            return
+        if self._group is not None:
+            self._group.append((entity, entity_id, old, new))
+        else:
+            self._push([(entity, entity_id, old, new)])
+
+    def _push(self, changes: List[Change]) -> None:
+        self._undo.append(changes)
+        self._redo.clear()
+
+    def _apply(self, changes: List[Change]) -> None:
+        """Привести хранилище к новым значениям изменений, откатив частично выполненное при ошибке."""
+        done: List[Change] = []
+        self._replaying = True
+        try:
+            try:
+                for change in changes:
+                    self._apply_one(*change)
+                    done.append(change)
+            except ResortError:
+                for entity, entity_id, old, new in reversed(done):
+                    self._apply_one(entity, entity_id, new, old)
+                raise
+        finally:
+            self._replaying = False
+
+    def _apply_one(self, entity: str, entity_id: str, current: Any, target: Any) -> None:
+        if target is None:
+            getattr(self.storage, f"delete_{entity}")(entity_id)
+        elif current is None:
+            getattr(self.storage, f"create_{entity}")(target)
+        else:
+            getattr(self.storage, f"update_{entity}")(entity_id, target)
@@ -0,0 +1,451 @@
+"""
+Хранилище курорта с бронированиями, разбитыми по месяцам (шардам).
+
+Справочники (гости, сотрудники, места, услуги) общие для всех шардов,
+а бронирования лежат в шарде месяца, в котором начинаются. Проверка
+конфликтов при создании и изменении бронирования затрагивает только шард
+его месяца; соседние шарды проверяются лишь для бронирований, переходящих
+границу месяца. Старые шарды можно выгрузить в архивные файлы — они
+загрузятся обратно при первом обращении. save() записывает все шарды и
+манифест (справочники и реестр бронирований), после чего хранилище можно
+открыть заново из каталога через ShardedStorage.open().
+"""
+
+import os
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from exceptions import EntityNotFoundError, StorageError, ValidationError
+from classes import Booking, DaySchedule
+from storage import (
+    ResortStorage,
+    _booking_conflict,
+    _booking_days,
+    _booking_from_dict,
+    _booking_to_dict,
+    _upgrade_snapshot,
+    _write_json_snapshot,
+    read_json_sections,
+)
+
+
+# Операции каталога, которые ShardedStorage передаёт общему ResortStorage
+# (удаление он выполняет сам: каталог не видит бронирований шардов)
+CATALOG_METHODS = frozenset(
+    f"{action}_{entity}"
+    for action in ("create", "update")
+    for entity in ("guest", "staff_member", "service", "location")
+) | frozenset(
+    f"get_{entity}_by_id" for entity in ("guest", "staff_member", "service", "location")
+) | frozenset(
+    f"generate_{entity}_id" for entity in ("guest", "staff", "service", "location")
+) | frozenset({"list_guests", "list_staff_members", "list_services", "list_locations", "list_service_views"})
+
+
+# Сущности справочников, на которые ссылается бронирование, в порядке BookingRefs
+REFERENCED_ENTITIES: List[Tuple[str, str]] = [
+    ("guest", "Гость"),
+    ("service", "Услуга"),
+    ("location", "Место"),
+    ("staff_member", "Сотрудник"),
+]
+
+# ID гостя, услуги, места и сотрудника (или None) одного бронирования
+BookingRefs = Tuple[str, str, str, Optional[str]]
+
+# Сводка ссылок шарда: сущность -> ID сущности -> одно из ссылающихся бронирований
+ShardRefs = Dict[str, Dict[str, str]]
+
+MANIFEST_FILE = "manifest.json"
+CATALOG_SECTIONS = ("guests", "staff_members", "services", "locations", "id_counters")
+
+
+def _booking_refs(booking: Booking) -> BookingRefs:
+    staff = booking.staff_member
+    return (
+        booking.guest.guest_id,
+        booking.service.service_id,
+        booking.location.location_id,
+        staff.staff_id if staff else None,
+    )
+
+
+def _shard_refs(bookings: Iterable[Booking]) -> ShardRefs:
+    """Сводка ссылок бронирований шарда на справочники."""
+    refs: ShardRefs = {entity: {} for entity, _ in REFERENCED_ENTITIES}
+    for booking in bookings:
+        for (entity, _), entity_id in zip(REFERENCED_ENTITIES, _booking_refs(booking)):
+            if entity_id is not None:
+                refs[entity].setdefault(entity_id, booking.booking_id)
+    return refs
+
+
+def shard_key(moment: date) -> str:
+    """Ключ шарда (месяц) для даты или момента времени, например '2024-05'."""
+    return f"{moment.year:04d}-{moment.month:02d}"
+
+
+class ShardedStorage:
+    """Хранилище с общими справочниками и помесячными шардами бронирований.
+
+    Операции со справочниками (CATALOG_METHODS: create_guest, list_services
+    и т.д.) выполняет общий каталог — обычный ResortStorage без бронирований.
+    ID всех бронирований, включая архивные, хранятся в памяти, чтобы ID
+    оставались уникальными и бронирование находилось без загрузки шардов.
+    Для архивного шарда в памяти остаётся только сводка его ссылок на
+    справочники (по одному бронированию на каждую используемую сущность),
+    поэтому удалить сущность, используемую хоть в одном бронировании (в том
+    числе архивном), нельзя. В этом ShardedStorage строже ResortStorage:
+    там delete_guest бронирования не проверяет.
+
+    Args:
+        directory: Каталог для архивных файлов шардов и манифеста
+    """
+
+    def __init__(self, directory: str = "shards"):
+        self.directory: str = directory
+        self.catalog: ResortStorage = ResortStorage()
+        self._shards: Dict[str, ResortStorage] = {}
+        self._archived: Dict[str, str] = {}
+        # Ключ архивного шарда -> сводка ссылок его бронирований на справочники
+        self._archived_refs: Dict[str, ShardRefs] = {}
+        # ID бронирования -> ключ шарда, где оно хранится
+        self._booking_shards: Dict[str, str] = {}
+        # Бронирования, заходящие за границу месяца своего шарда
+        self._spanning: Dict[str, Booking] = {}
+
+    @classmethod
+    def open(cls, directory: str) -> "ShardedStorage":
+        """Открыть хранилище, сохранённое в каталог методом save().
+
+        Справочники и реестр бронирований читаются из манифеста, все шарды
+        остаются в архиве и загружаются при первом обращении.
+
+        Raises:
+            StorageError: Если манифеста нет или он повреждён
+        """
+        storage = cls(directory)
+        path = os.path.join(directory, MANIFEST_FILE)
+        data = read_json_sections(path, CATALOG_SECTIONS + ("shards", "booking_shards", "spanning"))
+        if not isinstance(data.get("shards"), dict) or not isinstance(data.get("booking_shards"), dict):
+            raise StorageError(f"Файл '{path}' не является манифестом шардов")
+        catalog = {name: data[name] for name in CATALOG_SECTIONS if name in data}
+        storage.catalog._load_serializable_data(_upgrade_snapshot(catalog))
+        try:
+            for key, entry in data["shards"].items():
+                storage._archived[key] = os.path.join(directory, entry["path"])
+                storage._archived_refs[key] = {entity: dict(entry["refs"].get(entity, {})) for entity, _ in REFERENCED_ENTITIES}
+            storage._booking_shards.update(data["booking_shards"])
+            for record in data.get("spanning", []):
+                booking = storage._booking_from_record(record, path)
+                storage._spanning[booking.booking_id] = booking
+        except (KeyError, TypeError, AttributeError) as e:
+            raise StorageError(f"Ошибка формата манифеста шардов '{path}': {e}") from e
+        return storage
+
+    def save(self) -> str:
+        """Записать загруженные шарды и манифест в каталог (шарды остаются в памяти).
+
+        Returns:
+            Путь к манифесту
+
+        Raises:
+            StorageError: При ошибках записи файлов
+        """
+        shards: Dict[str, Any] = {}
+        for key in self.loaded_shards:
+            self._write_shard(key)
+            shards[key] = self._shard_entry(self._shard_path(key), _shard_refs(self._shards[key]._bookings.values()))
+        for key, path in self._archived.items():
+            shards[key] = self._shard_entry(path, self._archived_refs[key])
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        sections = {
+            name: value for name, value in self.catalog._iter_serializable_sections().items() if name in CATALOG_SECTIONS
+        }
+        sections["shards"] = shards
+        sections["booking_shards"] = self._booking_shards
+        sections["spanning"] = (_booking_to_dict(booking) for booking in self._spanning.values())
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            _write_json_snapshot(path, sections)
+        except (IOError, OSError, TypeError, ValueError) as e:
+            raise StorageError(f"Ошибка записи манифеста шардов '{path}': {e}") from e
+        return path
+
+    @staticmethod
+    def _shard_entry(path: str, refs: ShardRefs) -> Dict[str, Any]:
+        return {"path": os.path.basename(path), "refs": refs}
+
+    def __getattr__(self, name: str) -> Any:
+        # Вызывается только для атрибутов, которых нет у самого ShardedStorage
+        if name in CATALOG_METHODS:
+            return getattr(self.catalog, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    # ========== Шарды ==========
+
+    @property
+    def loaded_shards(self) -> List[str]:
+        """Ключи шардов, находящихся в памяти."""
+        return sorted(self._shards)
+
+    @property
+    def archived_shards(self) -> List[str]:
+        """Ключи выгруженных в файлы шардов."""
+        return sorted(self._archived)
+
+    def shard(self, key: str) -> ResortStorage:
+        """Получить шард месяца, загрузив его из архива или создав пустой."""
+        shard = self._shards.get(key)
+        if shard is None:
+            shard = self._new_shard()
+            if key in self._archived:
+                self._load_shard(shard, self._archived[key])
+                del self._archived[key]
+                del self._archived_refs[key]
+            self._shards[key] = shard
+        return shard
+
+    def archive(self, key: str) -> str:
+        """Выгрузить шард месяца в файл и освободить память.
+
+        Returns:
+            Путь к архивному файлу шарда
+
+        Raises:
+            EntityNotFoundError: Если шард не загружен
+            StorageError: При ошибках записи файла
+        """
+        if key not in self._shards:
+            raise EntityNotFoundError(f"Шард '{key}' не загружен")
+        path = self._write_shard(key)
+        self._archived_refs[key] = _shard_refs(self._shards[key]._bookings.values())
+        del self._shards[key]
+        self._archived[key] = path
+        return path
+
+    def archive_before(self, moment: date) -> List[str]:
+        """Выгрузить все загруженные шарды месяцев раньше указанной даты.
+
+        Returns:
+            Ключи выгруженных шардов
+        """
+        current = shard_key(moment)
+        keys = [key for key in self.loaded_shards if key < current]
+        for key in keys:
+            self.archive(key)
+        return keys
+
+    def _shard_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"bookings-{key}.json")
+
+    def _write_shard(self, key: str) -> str:
+        """Записать бронирования загруженного шарда в его файл."""
+        path = self._shard_path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            _write_json_snapshot(path, {
+                "bookings": (_booking_to_dict(booking) for booking in self._shards[key]._bookings.values()),
+            })
+        except (IOError, OSError, TypeError, ValueError) as e:
+            raise StorageError(f"Ошибка архивации шарда '{key}' в файл '{path}': {e}") from e
+        return path
+
+    def _new_shard(self) -> ResortStorage:
+        # Шард разделяет словари справочников с каталогом, поэтому его
+        # собственные проверки бронирований видят актуальные справочники
+        shard = ResortStorage()
+        shard._guests = self.catalog._guests
+        shard._staff_members = self.catalog._staff_members
+        shard._services = self.catalog._services
+        shard._locations = self.catalog._locations
+        return shard
+
+    def _load_shard(self, shard: ResortStorage, path: str) -> None:
+        records = read_json_sections(path, ["bookings"]).get("bookings", [])
+        for record in records:
+            booking = self._booking_from_record(record, path)
+            shard._bookings[booking.booking_id] = booking
+            shard._index_booking(booking)
+
+    def _booking_from_record(self, record: Dict[str, Any], path: str) -> Booking:
+        try:
+            return _booking_from_dict(
+                record,
+                guests=self.catalog._guests,
+                services=self.catalog._services,
+                locations=self.catalog._locations,
+                staff_members=self.catalog._staff_members,
+            )
+        except KeyError as e:
+            # Удаление используемых сущностей запрещено, значит файл изменён вручную
+            raise StorageError(
+                f"Бронирование {record.get('booking_id')} в архиве '{path}' "
+                f"ссылается на отсутствующую сущность {e}"
+            ) from e
+
+    # ========== Удаление из справочников ==========
+
+    def delete_guest(self, guest_id: str) -> None:
+        """Удалить гостя, если он не используется ни в одном бронировании.
+
+        В отличие от ResortStorage.delete_guest, который бронирования не
+        проверяет: архивное бронирование без гостя не загрузилось бы.
+        """
+        self._delete_referenced("guest", guest_id)
+
+    def delete_staff_member(self, staff_id: str) -> None:
+        """Удалить сотрудника, если он не используется в услугах и бронированиях."""
+        self._delete_referenced("staff_member", staff_id)
+
+    def delete_service(self, service_id: str) -> None:
+        """Удалить услугу, если она не используется ни в одном бронировании."""
+        self._delete_referenced("service", service_id)
+
+    def delete_location(self, location_id: str) -> None:
+        """Удалить место, если оно не используется в услугах и бронированиях."""
+        self._delete_referenced("location", location_id)
+
+    def _delete_referenced(self, entity: str, entity_id: str) -> None:
+        """Удалить сущность каталога, проверив бронирования всех шардов, включая архивные.
+
+        Raises:
+            EntityNotFoundError: Если сущность не найдена
+            ValidationError: Если сущность используется в бронировании
+        """
+        getattr(self.catalog, f"get_{entity}_by_id")(entity_id)
+        position = [name for name, _ in REFERENCED_ENTITIES].index(entity)
+        label = REFERENCED_ENTITIES[position][1]
+        for shard in self._shards.values():
+            for booking in shard._bookings.values():
+                if _booking_refs(booking)[position] == entity_id:
+                    raise ValidationError(f"{label} {entity_id} используется в бронировании {booking.booking_id}")
+        for refs in self._archived_refs.values():
+            booking_id = refs[entity].get(entity_id)
+            if booking_id is not None:
+                raise ValidationError(f"{label} {entity_id} используется в бронировании {booking_id}")
+        getattr(self.catalog, f"delete_{entity}")(entity_id)
+
+    # ========== Бронирования ==========
+
+    def generate_booking_id(self) -> str:
+        """Сгенерировать ID бронирования, уникальный среди всех шардов."""
+        while True:
+            booking_id = self.catalog.generate_booking_id()
+            if booking_id not in self._booking_shards:
+                return booking_id
+
+    def create_booking(self, booking: Booking) -> str:
+        """Создать бронирование в шарде месяца его начала.
+
+        Raises:
+            ValidationError: Если ID занят или бронирование конфликтует с другими
+        """
+        if booking.booking_id in self._booking_shards:
+            raise ValidationError(f"Бронирование с ID='{booking.booking_id}' уже существует")
+        key = shard_key(booking.time_slot.start_time)
+        # Сначала те же проверки, что в ResortStorage: чужие шарды
+        # сравниваются только с корректным бронированием
+        self.shard(key)._validate_booking(booking)
+        self._check_other_shards(booking, key)
+        self.shard(key).create_booking(booking)
+        self._register(booking.booking_id, booking, key)
+        return booking.booking_id
+
+    def get_booking_by_id(self, booking_id: str) -> Booking:
+        """Получить бронирование по ID (архивный шард загружается при необходимости)."""
+        if booking_id not in self._booking_shards:
+            raise EntityNotFoundError(f"Бронирование с ID='{booking_id}' не найдено")
+        return self.shard(self._booking_shards[booking_id]).get_booking_by_id(booking_id)
+
+    def list_bookings(self) -> List[Booking]:
+        """Бронирования всех загруженных шардов (архивные не загружаются)."""
+        return [booking for key in self.loaded_shards for booking in self._shards[key].list_bookings()]
+
+    def update_booking(self, booking_id: str, booking: Booking) -> None:
+        """Обновить бронирование, при смене месяца перенеся его в другой шард.
+
+        Перенос выполняется удалением из прежнего шарда и созданием в новом,
+        поэтому подписчики шардов видят оба изменения.
+
+        Raises:
+            EntityNotFoundError: Если бронирование не найдено
+            ValidationError: Если новое бронирование конфликтует с другими
+                или при переносе в другой шард у него другой ID
+        """
+        if booking_id not in self._booking_shards:
+            raise EntityNotFoundError(f"Бронирование с ID='{booking_id}' не найдено")
+        old_key = self._booking_shards[booking_id]
+        key = shard_key(booking.time_slot.start_time)
+        self.shard(key)._validate_booking(booking)
+        self._check_other_shards(booking, key, exclude_id=booking_id)
+        if key == old_key:
+            self.shard(key).update_booking(booking_id, booking)
+        else:
+            # Бронирование переезжает в шард другого месяца: проверяем его
+            # там до удаления из прежнего шарда, чтобы отказ ничего не менял
+            if booking.booking_id != booking_id:
+                raise ValidationError("Нельзя менять ID бронирования при переносе в другой месяц")
+            target = self.shard(key)
+            conflict = target._find_conflict(booking)
+            if conflict:
+                raise ValidationError(conflict)
+            self.shard(old_key).delete_booking(booking_id)
+            target.create_booking(booking)
+        self._register(booking_id, booking, key)
+
+    def delete_booking(self, booking_id: str) -> None:
+        """Удалить бронирование из его шарда."""
+        if booking_id not in self._booking_shards:
+            raise EntityNotFoundError(f"Бронирование с ID='{booking_id}' не найдено")
+        self.shard(self._booking_shards[booking_id]).delete_booking(booking_id)
+        del self._booking_shards[booking_id]
+        self._spanning.pop(booking_id, None)
+
+    def get_day_schedule(self, day: date) -> DaySchedule:
+        """Расписание дня, включая бронирования, начавшиеся в прошлых месяцах."""
+        key = shard_key(day)
+        bookings: Dict[str, Booking] = {}
+        if key in self._shards or key in self._archived:
+            bookings.update(self.shard(key)._bookings_by_day.get(day, {}))
+        for booking_id, booking in self._spanning.items():
+            if booking_id not in bookings and day in _booking_days(booking):
+                bookings[booking_id] = booking
+        return DaySchedule(day, list(bookings.values()))
+
+    def get_week_schedule(self, start_day: date) -> List[DaySchedule]:
+        """Расписания на семь дней, начиная с указанного."""
+        return [self.get_day_schedule(start_day + timedelta(days=i)) for i in range(7)]
+
+    def _register(self, booking_id: str, booking: Booking, key: str) -> None:
+        self._booking_shards[booking_id] = key
+        if shard_key(_booking_days(booking)[-1]) != key:
+            self._spanning[booking_id] = booking
+        else:
+            self._spanning.pop(booking_id, None)
+
+    def _check_other_shards(self, booking: Booking, key: str, exclude_id: Optional[str] = None) -> None:
+        """Проверить конфликты с бронированиями из других шардов.
+
+        Внутри своего шарда бронирование проверяет сам ResortStorage.
+        Из чужих шардов с ним могут пересекаться только бронирования,
+        переходящие границу месяца, и — если само бронирование переходит
+        границу — бронирования шардов следующих месяцев.
+        """
+        for other_id, other in self._spanning.items():
+            if other_id != exclude_id and self._booking_shards[other_id] != key:
+                conflict = _booking_conflict(other, booking)
+                if conflict:
+                    raise ValidationError(conflict)
+        checked: Set[str] = {key}
+        for day in _booking_days(booking):
+            day_key = shard_key(day)
+            if day_key in checked:
+                continue
+            checked.add(day_key)
+            if day_key not in self._shards and day_key not in self._archived:
+                continue
+            shard = self.shard(day_key)
+            conflict = shard._find_conflict(booking, exclude_id=exclude_id)
+            if conflict:
+                raise ValidationError(conflict)
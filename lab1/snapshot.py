@@ -0,0 +1,641 @@
+"""
+Потоковая работа со снапшотами хранилища курорта (JSON и XML).
+Позволяет проверить файл данных за один проход, не загружая его в ResortStorage.
+"""
+
+import argparse
+import codecs
+import hashlib
+import json
+import re
+import sys
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import xml.etree.ElementTree as ET
+
+from exceptions import StorageError, ValidationError
+from storage import SNAPSHOT_SECTIONS, _read_json_toc, _write_json_snapshot, _xml_to_data
+
+ENTITY_SECTIONS = ("guests", "staff_members", "services", "locations", "bookings")
+
+ID_FIELDS = {
+    "guests": "guest_id",
+    "staff_members": "staff_id",
+    "services": "service_id",
+    "locations": "location_id",
+    "bookings": "booking_id",
+}
+
+# Ссылки между сущностями: (секция, поле) -> секция, на которую ссылается поле
+REFERENCES = {
+    ("staff_members", "service_ids"): "services",
+    ("services", "location_id"): "locations",
+    ("services", "staff_id"): "staff_members",
+    ("bookings", "guest_id"): "guests",
+    ("bookings", "service_id"): "services",
+    ("bookings", "location_id"): "locations",
+    ("bookings", "staff_id"): "staff_members",
+}
+
+# Ресурсы, которые не могут быть заняты двумя бронированиями одновременно
+BOOKING_RESOURCES = (("гость", "guest_id"), ("сотрудник", "staff_id"), ("место", "location_id"))
+
+_CHUNK_SIZE = 1 << 16
+# Наибольшая длина одной записи в символах: повреждённая запись иначе
+# дочитывала бы в буфер весь оставшийся файл
+_MAX_RECORD_SIZE = 16 * 1024 * 1024
+_DIFF_PREVIEW = 20
+_WHITESPACE = re.compile(r"\s*")
+_DECODER = json.JSONDecoder()
+
+
+class _JsonStream:
+    """Инкрементальный разбор JSON-файла по частям фиксированного размера."""
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Дочитать следующую порцию файла; False, если файл закончился."""
+        if self._eof:
+            return False
+        raw = self._file.read(_CHUNK_SIZE)
+        chunk = self._decoder.decode(raw, final=not raw)
+        if not raw:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Вернуть следующий непробельный символ, не потребляя его."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        """Потребить ожидаемый символ структуры JSON."""
+        if self.peek() != char:
+            raise StorageError(f"Ожидался символ '{char}' в JSON-снапшоте")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Разобрать очередное JSON-значение целиком."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                if len(self._buffer) - self._pos > _MAX_RECORD_SIZE:
+                    raise StorageError(
+                        f"Ошибка парсинга JSON-снапшота: запись длиннее {_MAX_RECORD_SIZE} символов ({e})"
+                    ) from e
+                if self._fill():
+                    continue
+                raise StorageError(f"Ошибка парсинга JSON-снапшота: {e}") from e
+            # Число на границе буфера может продолжаться в следующей порции
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def _iter_json_value(stream: _JsonStream, name: str) -> Iterator[Tuple[str, Any]]:
+    """Выдать элементы секции-списка по одному либо значение секции целиком."""
+    if stream.peek() != "[":
+        yield name, stream.value()
+        return
+    stream.expect("[")
+    if stream.peek() != "]":
+        while True:
+            yield name, stream.value()
+            if stream.peek() != ",":
+                break
+            stream.expect(",")
+    stream.expect("]")
+
+
+def _iter_json_sections(path: str, sections: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Any]]:
+    with open(path, "rb") as file:
+        if sections is not None:
+            toc = _read_json_toc(file)
+            if toc is not None:
+                # Снапшот версии 2 с проверенным оглавлением: переходим сразу
+                # к нужным секциям; иначе разбираем файл целиком
+                for name in sections:
+                    if name in toc:
+                        file.seek(toc[name][0])
+                        yield from _iter_json_value(_JsonStream(file), name)
+                return
+            file.seek(0)
+            sections = set(sections)
+        stream = _JsonStream(file)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            name = stream.value()
+            stream.expect(":")
+            if sections is None or name in sections:
+                yield from _iter_json_value(stream, name)
+            else:
+                # Пропускаем секцию по записям: целиком она может быть длиннее
+                # предела одной записи
+                for _ in _iter_json_value(stream, name):
+                    pass
+            if stream.peek() != ",":
+                break
+            stream.expect(",")
+        stream.expect("}")
+
+
+def _iter_xml_sections(path: str, sections: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Any]]:
+    wanted = set(sections) if sections is not None else None
+    depth = 0
+    section: Optional[ET.Element] = None
+    for event, element in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 2:
+                section = element
+            continue
+        depth -= 1
+        if depth == 2 and section is not None and section.tag != "id_counters":
+            if wanted is None or section.tag in wanted:
+                yield section.tag, _xml_to_data(element)
+            section.remove(element)
+        elif depth == 1 and section is not None:
+            if section.tag == "id_counters" and (wanted is None or section.tag in wanted):
+                yield section.tag, _xml_to_data(section)
+            section.clear()
+
+
+def iter_snapshot(path: str, sections: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Any]]:
+    """Последовательно прочитать снапшот, не загружая его в память целиком.
+
+    Для секций-списков (guests, bookings, ...) выдаётся по одной паре
+    (секция, запись) на каждый элемент, для остальных секций (id_counters)
+    — одна пара со всем значением.
+
+    Args:
+        path: Путь к JSON- или XML-снапшоту
+        sections: Читать только указанные секции; в JSON-снапшоте версии 2
+            остальные секции пропускаются по оглавлению без разбора, если
+            оглавление совпадает с содержимым файла
+
+    Raises:
+        StorageError: При ошибках чтения или парсинга файла
+    """
+    reader = _iter_xml_sections if path.lower().endswith(".xml") else _iter_json_sections
+    try:
+        yield from reader(path, sections)
+    except FileNotFoundError:
+        raise StorageError(f"Файл '{path}' не найден")
+    except (IOError, OSError) as e:
+        raise StorageError(f"Ошибка чтения снапшота '{path}': {e}") from e
+    except ET.ParseError as e:
+        raise StorageError(f"Ошибка парсинга XML-снапшота '{path}': {e}") from e
+    except UnicodeDecodeError as e:
+        raise StorageError(f"Снапшот '{path}' не в кодировке UTF-8: {e}") from e
+
+
+class SnapshotReport:
+    """Результат проверки снапшота: все найденные нарушения целостности."""
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.counts: Dict[str, int] = {name: 0 for name in ENTITY_SECTIONS}
+        # (секция, ID)
+        self.duplicates: List[Tuple[str, str]] = []
+        # (секция, ID записи, поле, ID, на который указывает ссылка)
+        self.dangling: List[Tuple[str, str, str, str]] = []
+        # (тип ресурса, ID ресурса, ID бронирования, ID пересекающегося бронирования)
+        self.overlaps: List[Tuple[str, str, str, str]] = []
+        # Ошибки формата отдельных записей
+        self.errors: List[str] = []
+
+    @property
+    def ok(self) -> bool:
+        return not (self.duplicates or self.dangling or self.overlaps or self.errors)
+
+    def __str__(self) -> str:
+        counts = ", ".join(f"{name}={count}" for name, count in self.counts.items())
+        lines = [f"Снапшот: {self.path}", f"Записей: {counts}"]
+        if self.ok:
+            lines.append("✓ Нарушений не найдено")
+            return "\n".join(lines)
+        for section, entity_id in self.duplicates:
+            lines.append(f"✗ Повторяющийся ID в {section}: {entity_id}")
+        for section, entity_id, field, ref_id in self.dangling:
+            lines.append(f"✗ {section}/{entity_id}: {field} ссылается на несуществующий ID '{ref_id}'")
+        for kind, resource_id, booking_id, other_id in self.overlaps:
+            lines.append(f"✗ Пересечение бронирований {booking_id} и {other_id} ({kind} {resource_id})")
+        for error in self.errors:
+            lines.append(f"✗ {error}")
+        return "\n".join(lines)
+
+
+def _sweep_overlaps(intervals: List[Tuple[str, str, datetime, datetime, str]]) -> List[Tuple[str, str, str, str]]:
+    """Найти пересекающиеся интервалы одного ресурса сортировкой и одним проходом.
+
+    Каждый интервал сравнивается с интервалом, заканчивающимся позже всех
+    среди предыдущих интервалов того же ресурса.
+    """
+    overlaps: List[Tuple[str, str, str, str]] = []
+    intervals.sort(key=lambda item: (item[0], item[1], item[2]))
+    current_resource: Optional[Tuple[str, str]] = None
+    max_end: Optional[datetime] = None
+    max_booking = ""
+    for kind, resource_id, start, end, booking_id in intervals:
+        if current_resource != (kind, resource_id):
+            current_resource = (kind, resource_id)
+            max_end, max_booking = end, booking_id
+            continue
+        if start < max_end:
+            overlaps.append((kind, resource_id, booking_id, max_booking))
+        if end > max_end:
+            max_end, max_booking = end, booking_id
+    return overlaps
+
+
+def validate_snapshot(path: str) -> SnapshotReport:
+    """Проверить ссылочную целостность снапшота за один потоковый проход.
+
+    Находит повторяющиеся ID, ссылки на несуществующие сущности и
+    пересекающиеся бронирования одного гостя, сотрудника или места.
+    Файл не загружается в ResortStorage, поэтому проверку можно выполнить
+    до замены рабочих данных.
+
+    Args:
+        path: Путь к JSON- или XML-снапшоту
+
+    Returns:
+        Отчёт со всеми найденными нарушениями
+
+    Raises:
+        StorageError: Если файл не удаётся прочитать или разобрать
+    """
+    report = SnapshotReport(path)
+    ids: Dict[str, Set[str]] = {name: set() for name in ENTITY_SECTIONS}
+    # Секции, прочитанные полностью: ссылки на них проверяются сразу,
+    # откладываются только ссылки вперёд по файлу
+    finished: Set[str] = set()
+    current_section = ""
+    pending: List[Tuple[str, str, str, str, str]] = []
+    intervals: List[Tuple[str, str, datetime, datetime, str]] = []
+
+    for section, record in iter_snapshot(path):
+        if section != current_section:
+            finished.add(current_section)
+            current_section = section
+        if section not in ids:
+            continue
+        if not isinstance(record, dict):
+            report.errors.append(f"{section}: запись не является объектом")
+            continue
+        report.counts[section] += 1
+        entity_id = record.get(ID_FIELDS[section]) or ""
+        if not entity_id:
+            report.errors.append(f"{section}: запись без {ID_FIELDS[section]}")
+            continue
+        if entity_id in ids[section]:
+            report.duplicates.append((section, entity_id))
+        ids[section].add(entity_id)
+
+        for (ref_section, field), target in REFERENCES.items():
+            if ref_section != section:
+                continue
+            refs = record.get(field) or []
+            for ref_id in refs if isinstance(refs, list) else [refs]:
+                if target not in finished:
+                    pending.append((section, entity_id, field, ref_id, target))
+                elif ref_id not in ids[target]:
+                    report.dangling.append((section, entity_id, field, ref_id))
+
+        if section == "bookings":
+            slot = record.get("time_slot") or {}
+            try:
+                start = datetime.fromisoformat(slot["start_time"])
+                end = datetime.fromisoformat(slot["end_time"])
+            except (KeyError, TypeError, ValueError):
+                report.errors.append(f"bookings/{entity_id}: некорректный time_slot")
+                continue
+            if end <= start:
+                report.errors.append(f"bookings/{entity_id}: конец интервала не позже начала")
+                continue
+            for kind, field in BOOKING_RESOURCES:
+                if record.get(field):
+                    intervals.append((kind, record[field], start, end, entity_id))
+
+    for section, entity_id, field, ref_id, target in pending:
+        if ref_id not in ids[target]:
+            report.dangling.append((section, entity_id, field, ref_id))
+    report.overlaps = _sweep_overlaps(intervals)
+    return report
+
+
+def _record_digest(record: Any) -> bytes:
+    """Хэш записи, не зависящий от порядка полей."""
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+
+
+def _preview(ids: List[str]) -> str:
+    shown = ", ".join(ids[:_DIFF_PREVIEW])
+    if len(ids) > _DIFF_PREVIEW:
+        shown += f" … и ещё {len(ids) - _DIFF_PREVIEW}"
+    return shown
+
+
+class _SnapshotIndex:
+    """Компактный индекс снапшота: хэши записей по ID и интервалы бронирований."""
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.digests: Dict[str, Dict[str, bytes]] = {name: {} for name in ENTITY_SECTIONS}
+        # ID бронирования -> (начало, конец, занятые ресурсы)
+        self.intervals: Dict[str, Tuple[datetime, datetime, List[Tuple[str, str]]]] = {}
+        self.id_counters: Dict[str, Any] = {}
+        for section, record in iter_snapshot(path):
+            if section == "id_counters" and isinstance(record, dict):
+                self.id_counters = record
+                continue
+            if section not in self.digests or not isinstance(record, dict):
+                continue
+            entity_id = record.get(ID_FIELDS[section])
+            if not entity_id:
+                continue
+            self.digests[section][entity_id] = _record_digest(record)
+            if section == "bookings":
+                slot = record.get("time_slot") or {}
+                try:
+                    start = datetime.fromisoformat(slot["start_time"])
+                    end = datetime.fromisoformat(slot["end_time"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                resources = [(kind, record[field]) for kind, field in BOOKING_RESOURCES if record.get(field)]
+                self.intervals[entity_id] = (start, end, resources)
+
+
+class SnapshotDiff:
+    """Различия двух снапшотов на уровне сущностей."""
+
+    def __init__(self, left: str, right: str):
+        self.left: str = left
+        self.right: str = right
+        # секция -> ID, которые есть только справа / только слева / отличаются
+        self.added: Dict[str, List[str]] = {name: [] for name in ENTITY_SECTIONS}
+        self.removed: Dict[str, List[str]] = {name: [] for name in ENTITY_SECTIONS}
+        self.changed: Dict[str, List[str]] = {name: [] for name in ENTITY_SECTIONS}
+
+    @property
+    def identical(self) -> bool:
+        return not any(self.added.values()) and not any(self.removed.values()) and not any(self.changed.values())
+
+    def __str__(self) -> str:
+        lines = [f"Сравнение: {self.left} -> {self.right}"]
+        if self.identical:
+            lines.append("✓ Снапшоты совпадают")
+            return "\n".join(lines)
+        for name in ENTITY_SECTIONS:
+            for label, ids in (("+", self.added[name]), ("-", self.removed[name]), ("~", self.changed[name])):
+                if ids:
+                    lines.append(f"{label} {name} ({len(ids)}): {_preview(ids)}")
+        return "\n".join(lines)
+
+
+def _diff_indexes(left: _SnapshotIndex, right: _SnapshotIndex) -> SnapshotDiff:
+    diff = SnapshotDiff(left.path, right.path)
+    for name in ENTITY_SECTIONS:
+        left_digests, right_digests = left.digests[name], right.digests[name]
+        for entity_id, digest in right_digests.items():
+            other = left_digests.get(entity_id)
+            if other is None:
+                diff.added[name].append(entity_id)
+            elif other != digest:
+                diff.changed[name].append(entity_id)
+        diff.removed[name] = [entity_id for entity_id in left_digests if entity_id not in right_digests]
+    return diff
+
+
+def diff_snapshots(left: str, right: str) -> SnapshotDiff:
+    """Сравнить два снапшота по сущностям.
+
+    Каждый файл читается потоково один раз; в памяти остаются только
+    хэши записей по ID, а не сами сущности.
+
+    Args:
+        left: Путь к первому снапшоту
+        right: Путь ко второму снапшоту
+
+    Returns:
+        Добавленные, удалённые и изменённые ID по секциям
+
+    Raises:
+        StorageError: Если файл не удаётся прочитать или разобрать
+    """
+    return _diff_indexes(_SnapshotIndex(left), _SnapshotIndex(right))
+
+
+class MergeReport:
+    """Результат слияния двух снапшотов."""
+
+    def __init__(self, diff: SnapshotDiff, output: str, prefer: str):
+        self.diff: SnapshotDiff = diff
+        self.output: str = output
+        self.prefer: str = prefer
+        self.counts: Dict[str, int] = {name: 0 for name in ENTITY_SECTIONS}
+        # (ID отброшенного бронирования, ID оставленного, тип ресурса, ID ресурса)
+        self.rejected: List[Tuple[str, str, str, str]] = []
+        # Пересечения, которые уже были внутри одного из исходных файлов
+        self.overlaps: List[Tuple[str, str, str, str]] = []
+
+    def __str__(self) -> str:
+        counts = ", ".join(f"{name}={count}" for name, count in self.counts.items())
+        side = "первого" if self.prefer == "left" else "второго"
+        lines = [f"Слияние записано в {self.output}", f"Записей: {counts}"]
+        for name in ENTITY_SECTIONS:
+            if self.diff.changed[name]:
+                lines.append(
+                    f"⚠ Конфликт версий в {name}, оставлены записи {side} файла: {_preview(self.diff.changed[name])}"
+                )
+        for booking_id, kept_id, kind, resource_id in self.rejected:
+            lines.append(f"✗ Бронирование {booking_id} отброшено: пересекается с {kept_id} ({kind} {resource_id})")
+        for kind, resource_id, booking_id, other_id in self.overlaps:
+            lines.append(f"⚠ Пересечение {booking_id} и {other_id} ({kind} {resource_id}) было в исходном файле")
+        return "\n".join(lines)
+
+
+def _by_resource(
+    intervals: Dict[str, Tuple[datetime, datetime, List[Tuple[str, str]]]]
+) -> Dict[Tuple[str, str], List[Tuple[datetime, datetime, str]]]:
+    grouped: Dict[Tuple[str, str], List[Tuple[datetime, datetime, str]]] = {}
+    for booking_id, (start, end, resources) in intervals.items():
+        for resource in resources:
+            grouped.setdefault(resource, []).append((start, end, booking_id))
+    return grouped
+
+
+def _sweep_crossing(
+    primary: Dict[str, Tuple[datetime, datetime, List[Tuple[str, str]]]],
+    secondary: Dict[str, Tuple[datetime, datetime, List[Tuple[str, str]]]],
+) -> List[Tuple[str, str, str, str]]:
+    """Найти бронирования secondary, пересекающиеся с бронированиями primary.
+
+    Для каждого ресурса один проход: бронирования secondary перебираются по
+    возрастанию конца, а бронирования primary — по возрастанию начала.
+    Интервал secondary пересекается с каким-либо интервалом primary, если
+    среди начавшихся раньше его конца есть заканчивающийся после его начала;
+    достаточно сравнить с заканчивающимся позже всех. Пересечения внутри
+    одного файла здесь не ищутся.
+
+    Returns:
+        Список (ID бронирования secondary, ID бронирования primary, тип ресурса,
+        ID ресурса); бронирование secondary может встретиться по разным ресурсам
+    """
+    crossing: List[Tuple[str, str, str, str]] = []
+    primary_by_resource = _by_resource(primary)
+    for resource, incoming in sorted(_by_resource(secondary).items()):
+        kept = sorted(primary_by_resource.get(resource, ()))
+        if not kept:
+            continue
+        position = 0
+        max_end: Optional[datetime] = None
+        max_booking = ""
+        for start, end, booking_id in sorted(incoming, key=lambda item: (item[1], item[0], item[2])):
+            while position < len(kept) and kept[position][0] < end:
+                if max_end is None or kept[position][1] > max_end:
+                    max_end, max_booking = kept[position][1], kept[position][2]
+                position += 1
+            if max_end is not None and max_end > start:
+                crossing.append((booking_id, max_booking, resource[0], resource[1]))
+    return crossing
+
+
+def merge_snapshots(left: str, right: str, output: str, prefer: str = "left") -> MergeReport:
+    """Слить два снапшота в один.
+
+    Сущности объединяются по ID. Если запись с одним ID в файлах
+    различается, берётся версия из приоритетного файла (prefer), а ID
+    попадает в отчёт о конфликтах. Бронирования из разных файлов, которые
+    пересекаются по гостю, сотруднику или месту, не попадают в результат
+    вместе: бронирование из неприоритетного файла отбрасывается.
+
+    Оба файла читаются потоково: первый проход строит хэши записей и
+    интервалы бронирований, второй переписывает выбранные записи в
+    результат без загрузки сущностей в память.
+
+    Args:
+        left: Путь к первому снапшоту
+        right: Путь ко второму снапшоту
+        output: Путь к итоговому JSON-снапшоту
+        prefer: Приоритетный файл при конфликтах: "left" или "right"
+
+    Returns:
+        Отчёт о слиянии
+
+    Raises:
+        ValidationError: Если prefer имеет недопустимое значение
+        StorageError: При ошибках чтения или записи файлов
+    """
+    if prefer not in ("left", "right"):
+        raise ValidationError(f"prefer должен быть 'left' или 'right', получено: {prefer}")
+    left_index, right_index = _SnapshotIndex(left), _SnapshotIndex(right)
+    report = MergeReport(_diff_indexes(left_index, right_index), output, prefer)
+    primary, secondary = (left_index, right_index) if prefer == "left" else (right_index, left_index)
+    from_secondary = {
+        name: {entity_id for entity_id in secondary.digests[name] if entity_id not in primary.digests[name]}
+        for name in ENTITY_SECTIONS
+    }
+
+    # Бронирования из разных файлов не должны пересекаться: бронирование из
+    # неприоритетного файла проигрывает любому пересекающемуся с ним
+    # бронированию приоритетного. Оставшиеся пересечения были в исходных файлах
+    incoming = {booking_id: secondary.intervals[booking_id]
+                for booking_id in from_secondary["bookings"] if booking_id in secondary.intervals}
+    rejected: Set[str] = set()
+    for loser, winner, kind, resource_id in _sweep_crossing(primary.intervals, incoming):
+        if loser not in rejected:
+            rejected.add(loser)
+            report.rejected.append((loser, winner, kind, resource_id))
+    intervals = dict(primary.intervals)
+    intervals.update(item for item in incoming.items() if item[0] not in rejected)
+    report.overlaps = _sweep_overlaps([
+        (kind, resource_id, start, end, booking_id)
+        for booking_id, (start, end, resources) in intervals.items()
+        for kind, resource_id in resources
+    ])
+
+    def records(name: str) -> Iterator[Dict[str, Any]]:
+        id_field = ID_FIELDS[name]
+        for source, wanted in ((primary, None), (secondary, from_secondary[name])):
+            for _, record in iter_snapshot(source.path, [name]):
+                if not isinstance(record, dict):
+                    continue
+                entity_id = record.get(id_field)
+                if wanted is not None and entity_id not in wanted:
+                    continue
+                if name == "bookings" and entity_id in rejected:
+                    continue
+                report.counts[name] += 1
+                yield record
+
+    id_counters: Dict[str, int] = {}
+    for counters in (left_index.id_counters, right_index.id_counters):
+        for key, value in counters.items():
+            try:
+                id_counters[key] = max(id_counters.get(key, 1), int(value))
+            except (TypeError, ValueError):
+                continue
+
+    sections: Dict[str, Any] = {name: records(name) for name in SNAPSHOT_SECTIONS if name in ENTITY_SECTIONS}
+    sections["id_counters"] = id_counters
+    try:
+        _write_json_snapshot(output, sections)
+    except (IOError, OSError) as e:
+        raise StorageError(f"Ошибка записи снапшота '{output}': {e}") from e
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Инструменты для снапшотов хранилища курорта")
+    commands = parser.add_subparsers(dest="command", required=True)
+    validate_parser = commands.add_parser("validate", help="проверить ссылочную целостность снапшота")
+    validate_parser.add_argument("path", help="путь к JSON- или XML-снапшоту")
+    diff_parser = commands.add_parser("diff", help="сравнить два снапшота по сущностям")
+    diff_parser.add_argument("left", help="первый снапшот")
+    diff_parser.add_argument("right", help="второй снапшот")
+    merge_parser = commands.add_parser("merge", help="слить два снапшота в один")
+    merge_parser.add_argument("left", help="первый снапшот")
+    merge_parser.add_argument("right", help="второй снапшот")
+    merge_parser.add_argument("-o", "--output", required=True, help="путь к итоговому JSON-снапшоту")
+    merge_parser.add_argument("--prefer", choices=("left", "right"), default="left",
+                              help="чья версия записи побеждает при конфликте (по умолчанию — первого файла)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "validate":
+            report = validate_snapshot(args.path)
+            print(report)
+            return 0 if report.ok else 1
+        if args.command == "diff":
+            diff = diff_snapshots(args.left, args.right)
+            print(diff)
+            return 0 if diff.identical else 1
+        print(merge_snapshots(args.left, args.right, args.output, prefer=args.prefer))
+        return 0
+    except StorageError as e:
+        print(f"✗ {e}")
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
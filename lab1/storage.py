@@ -3,19 +3,25 @@
 Предоставляет CRUD-операции и сериализацию доменной модели в JSON и XML.
 """
 
-import json
-from datetime import datetime
-from typing import Any, Dict, List, Optional
-import xml.etree.ElementTree as ET
-import xml.dom.minidom
+import gc
+import os
+from datetime import date, datetime, time, timedelta
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# json, xml и модули для временных файлов импортируются при первом
+# использовании: консоли и демо они нужны только при сохранении/загрузке
+if TYPE_CHECKING:
+    import xml.etree.ElementTree as ET
 
 from exceptions import EntityNotFoundError, StorageError, ValidationError
 from classes import (
     Booking,
     ContactInfo,
+    DaySchedule,
     Guest,
     Location,
     Service,
+    ServiceView,
     StaffMember,
     TimeSlot,
 )
@@ -33,6 +39,50 @@ def _datetime_from_str(value: Optional[str]) -> Optional[datetime]:
     return None
 
 
+class _InternTable:
+    """Кэш общих объектов для десериализации.
+
+    Повторяющиеся строки (роли, названия, адреса, ID в ссылках), даты и
+    одинаковые временные интервалы хранятся в одном экземпляре на всё
+    хранилище вместо отдельного объекта на каждую запись.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled: bool = enabled
+        self._strings: Dict[str, str] = {}
+        self._datetimes: Dict[str, datetime] = {}
+        self._time_slots: Dict[Tuple[str, str], TimeSlot] = {}
+
+    def text(self, value: Any) -> Any:
+        """Вернуть общий экземпляр строки."""
+        if not self.enabled or not isinstance(value, str):
+            return value
+        return self._strings.setdefault(value, value)
+
+    def moment(self, value: str) -> datetime:
+        """Вернуть общий экземпляр даты/времени для строки ISO."""
+        if not self.enabled:
+            return datetime.fromisoformat(value)
+        moment = self._datetimes.get(value)
+        if moment is None:
+            moment = datetime.fromisoformat(value)
+            self._datetimes[value] = moment
+        return moment
+
+    def time_slot(self, data: Dict[str, Any]) -> TimeSlot:
+        """Вернуть общий экземпляр TimeSlot для одинаковых интервалов."""
+        key = (data["start_time"], data["end_time"])
+        slot = self._time_slots.get(key) if self.enabled else None
+        if slot is None:
+            slot = TimeSlot(start_time=self.moment(key[0]), end_time=self.moment(key[1]))
+            if self.enabled:
+                self._time_slots[key] = slot
+        return slot
+
+
+_NO_INTERNING = _InternTable(enabled=False)
+
+
 def _contact_to_dict(contact: ContactInfo) -> Dict[str, Optional[str]]:
     """Преобразовать ContactInfo в словарь."""
     return {
@@ -42,12 +92,14 @@ def _contact_to_dict(contact: ContactInfo) -> Dict[str, Optional[str]]:
     }
 
 
-def _contact_from_dict(data: Dict[str, Any]) -> ContactInfo:
+def _contact_from_dict(data: Dict[str, Any], interner: _InternTable = _NO_INTERNING) -> ContactInfo:
     """Создать ContactInfo из словаря."""
+    # Адрес почты хранится одной строкой, поэтому разделяется только целиком
+    # (общие ящики, одинаковые контакты), а не по домену
     return ContactInfo(
-        email=data.get("email", ""),
-        phone=data.get("phone", ""),
-        address=data.get("address"),
+        email=interner.text(data.get("email", "")),
+        phone=interner.text(data.get("phone", "")),
+        address=interner.text(data.get("address")),
     )
 
 
@@ -62,14 +114,6 @@ def _timeslot_to_dict(slot: TimeSlot) -> Dict[str, str]:
     }
 
 
-def _timeslot_from_dict(data: Dict[str, Any]) -> TimeSlot:
-    """Создать TimeSlot из словаря."""
-    return TimeSlot(
-        start_time=datetime.fromisoformat(data["start_time"]),
-        end_time=datetime.fromisoformat(data["end_time"]),
-    )
-
-
 def _guest_to_dict(guest: Guest) -> Dict[str, Any]:
     """Преобразовать Guest в словарь."""
     return {
@@ -79,12 +123,12 @@ def _guest_to_dict(guest: Guest) -> Dict[str, Any]:
     }
 
 
-def _guest_from_dict(data: Dict[str, Any]) -> Guest:
+def _guest_from_dict(data: Dict[str, Any], interner: _InternTable = _NO_INTERNING) -> Guest:
     """Создать Guest из словаря."""
     guest = Guest(
         guest_id=data.get("guest_id", ""),
-        name=data.get("name", ""),
-        contact=_contact_from_dict(data.get("contact", {})),
+        name=interner.text(data.get("name", "")),
+        contact=_contact_from_dict(data.get("contact", {}), interner),
     )
     return guest
 
@@ -100,16 +144,16 @@ def _staff_to_dict(staff: StaffMember) -> Dict[str, Any]:
     }
 
 
-def _staff_from_dict(data: Dict[str, Any]) -> StaffMember:
+def _staff_from_dict(data: Dict[str, Any], interner: _InternTable = _NO_INTERNING) -> StaffMember:
     """Создать StaffMember из словаря."""
     staff = StaffMember(
-        staff_id=data.get("staff_id", ""),
-        name=data.get("name", ""),
-        role=data.get("role", ""),
-        contact=_contact_from_dict(data.get("contact", {})),
+        staff_id=interner.text(data.get("staff_id", "")),
+        name=interner.text(data.get("name", "")),
+        role=interner.text(data.get("role", "")),
+        contact=_contact_from_dict(data.get("contact", {}), interner),
     )
-    for sid in data.get("service_ids", []):
-        staff.assign_service(sid)
+    for sid in data.get("service_ids") or []:
+        staff.assign_service(interner.text(sid))
     return staff
 
 
@@ -121,11 +165,11 @@ def _location_to_dict(location: Location) -> Dict[str, Any]:
     }
 
 
-def _location_from_dict(data: Dict[str, Any]) -> Location:
+def _location_from_dict(data: Dict[str, Any], interner: _InternTable = _NO_INTERNING) -> Location:
     """Создать Location из словаря."""
     location = Location(
-        location_id=data.get("location_id", ""),
-        name=data.get("name", ""),
+        location_id=interner.text(data.get("location_id", "")),
+        name=interner.text(data.get("name", "")),
     )
     return location
 
@@ -141,17 +185,17 @@ def _service_to_dict(service: Service) -> Dict[str, Any]:
     }
 
 
-def _service_from_dict(data: Dict[str, Any]) -> Service:
+def _service_from_dict(data: Dict[str, Any], interner: _InternTable = _NO_INTERNING) -> Service:
     """Создать Service из словаря."""
     service = Service(
-        service_id=data.get("service_id", ""),
-        name=data.get("name", ""),
+        service_id=interner.text(data.get("service_id", "")),
+        name=interner.text(data.get("name", "")),
         duration_minutes=int(data.get("duration_minutes", 0)),
     )
     if data.get("location_id"):
-        service.assign_location(data.get("location_id", ""))
+        service.assign_location(interner.text(data.get("location_id", "")))
     if data.get("staff_id"):
-        service.assign_staff(data.get("staff_id", ""))
+        service.assign_staff(interner.text(data.get("staff_id", "")))
     return service
 
 
@@ -176,6 +220,7 @@ def _booking_from_dict(
     services: Dict[str, Service],
     locations: Dict[str, Location],
     staff_members: Dict[str, StaffMember],
+    interner: _InternTable = _NO_INTERNING,
 ) -> Booking:
     """Создать Booking из словаря."""
     guest_id = data.get("guest_id")
@@ -196,7 +241,7 @@ def _booking_from_dict(
         booking_id=data.get("booking_id", ""),
         guest=guest,
         service=service,
-        time_slot=_timeslot_from_dict(data.get("time_slot", {})),
+        time_slot=interner.time_slot(data.get("time_slot", {})),
         location=location,
     )
     staff_id = data.get("staff_id")
@@ -211,8 +256,41 @@ def _booking_from_dict(
  
 
 
-def _dict_to_xml(parent: ET.Element, data: Any) -> None:
+def _booking_days(booking: Booking) -> List[date]:
+    """Вернуть все календарные дни, которые затрагивает бронирование.
+
+    Бронирование, заканчивающееся ровно в полночь, следующий день не занимает.
+    """
+    first = booking.time_slot.start_time.date()
+    end = booking.time_slot.end_time
+    last = end.date()
+    if end.time() == time(0, 0) and last > first:
+        last -= timedelta(days=1)
+    days = []
+    current = first
+    while current <= last:
+        days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def _booking_conflict(existing: Booking, booking: Booking) -> Optional[str]:
+    """Описание конфликта двух бронирований или None, если они совместимы."""
+    if not existing.time_slot.overlaps(booking.time_slot):
+        return None
+    if existing.guest.guest_id == booking.guest.guest_id:
+        return "Гость занят в это время"
+    if existing.staff_member and booking.staff_member and existing.staff_member.staff_id == booking.staff_member.staff_id:
+        return "Сотрудник занят в это время"
+    if existing.location.location_id == booking.location.location_id:
+        return "Место занято в это время"
+    return None
+
+
+def _dict_to_xml(parent: "ET.Element", data: Any) -> None:
     """Рекурсивно заполнить XML-элемент данными из словаря/списка."""
+    import xml.etree.ElementTree as ET
+
     if isinstance(data, dict):
         for key, value in data.items():
             child = ET.SubElement(parent, key)
@@ -227,7 +305,7 @@ def _dict_to_xml(parent: ET.Element, data: Any) -> None:
         parent.text = str(data)
 
 
-def _xml_to_data(element: ET.Element) -> Any:
+def _xml_to_data(element: "ET.Element") -> Any:
     """Рекурсивно преобразовать XML-элемент в структуру Python.
 
     Используется для простого восстановления словарей и списков из XML.
@@ -244,6 +322,222 @@ def _xml_to_data(element: ET.Element) -> Any:
     return result
 
 
+# ========== Формат снапшота ==========
+
+SNAPSHOT_FORMAT = "resort_storage"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_SECTIONS = ("guests", "staff_members", "services", "locations", "bookings", "id_counters")
+# Секции, без которых бронирования не восстановить
+BAD_SLOT_MESSAGE = "Время окончания бронирования должно быть позже времени начала"
+
+BOOKING_DEPENDENCIES = ("guests", "staff_members", "services", "locations")
+
+_HEADER_PREFIX = b'{"snapshot": '
+_SPOOL_SIZE = 8 * 1024 * 1024
+
+# Версия формата кэша разобранного снапшота; увеличивать при изменении
+# атрибутов доменных классов или хранилища, чтобы старые кэши не читались
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".cache"
+
+
+def snapshot_cache_path(path: str) -> str:
+    """Путь файла кэша разобранного снапшота рядом с JSON-файлом."""
+    return path + CACHE_SUFFIX
+
+
+def _snapshot_cache_key(path: str) -> Tuple[Any, ...]:
+    """Ключ кэша: версия формата, путь, время изменения и размер исходного файла."""
+    stat = os.stat(path)
+    return (CACHE_VERSION, SNAPSHOT_VERSION, os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _write_json_snapshot(path: str, sections: Dict[str, Any]) -> None:
+    """Записать JSON-снапшот версии 2 с оглавлением секций.
+
+    Первая строка файла содержит заголовок с версией формата и байтовыми
+    смещениями каждой секции, поэтому секцию можно прочитать без разбора
+    остального файла. Файл при этом остаётся обычным JSON-объектом.
+    Значение секции — словарь (пишется целиком) либо итерируемый набор
+    записей, которые пишутся по одной на строку без накопления в памяти.
+    Файл заменяется атомарно после полной записи.
+    """
+    import json
+    import shutil
+    import tempfile
+
+    parts = []
+    try:
+        for name, value in sections.items():
+            spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_SIZE)
+            if isinstance(value, dict):
+                spool.write(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+            else:
+                spool.write(b"[")
+                empty = True
+                for item in value:
+                    spool.write(b"\n  " if empty else b",\n  ")
+                    spool.write(json.dumps(item, ensure_ascii=False).encode("utf-8"))
+                    empty = False
+                spool.write(b"]" if empty else b"\n]")
+            parts.append((json.dumps(name).encode("utf-8") + b": ", spool, spool.tell()))
+
+        # Длина заголовка зависит от записанных в нём смещений, поэтому
+        # пересчитываем его, пока длина не перестанет меняться. Общий размер
+        # файла позволяет при чтении заметить ручную правку снапшота
+        header = b""
+        while True:
+            toc: Dict[str, List[int]] = {}
+            offset = len(header)
+            for (key, _, size), name in zip(parts, sections):
+                offset += len(key)
+                toc[name] = [offset, size]
+                offset += size + 2
+            new_header = _HEADER_PREFIX + json.dumps({
+                "format": SNAPSHOT_FORMAT,
+                "version": SNAPSHOT_VERSION,
+                "sections": toc,
+                "size": offset + 1 if parts else offset,
+            }).encode("utf-8") + b",\n"
+            if len(new_header) == len(header):
+                header = new_header
+                break
+            header = new_header
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(header)
+            for index, (key, spool, _) in enumerate(parts):
+                file.write(key)
+                spool.seek(0)
+                shutil.copyfileobj(spool, file)
+                file.write(b",\n" if index < len(parts) - 1 else b"\n}\n")
+        os.replace(tmp_path, path)
+    finally:
+        for _, spool, _ in parts:
+            spool.close()
+
+
+def _read_json_header(file: Any) -> Optional[Dict[str, Any]]:
+    """Прочитать заголовок снапшота версии 2 из первой строки файла."""
+    import json
+
+    line = file.readline()
+    if not line.startswith(_HEADER_PREFIX):
+        return None
+    try:
+        header, _ = json.JSONDecoder().raw_decode(line[len(_HEADER_PREFIX):].decode("utf-8"))
+    except ValueError:
+        return None
+    return header if isinstance(header, dict) else None
+
+
+def _read_json_toc(file: Any) -> Optional[Dict[str, Tuple[int, int]]]:
+    """Прочитать оглавление снапшота версии 2, если ему можно доверять.
+
+    Смещения используются, только если размер файла совпадает с записанным
+    в заголовке и непосредственно перед каждой секцией стоит её ключ.
+    Иначе (старый или отредактированный вручную файл) возвращается None,
+    и файл нужно разбирать целиком.
+    """
+    import json
+
+    header = _read_json_header(file)
+    toc = header.get("sections") if header else None
+    size = header.get("size") if header else None
+    if not isinstance(toc, dict) or not isinstance(size, int):
+        return None
+    if os.fstat(file.fileno()).st_size != size:
+        return None
+    result: Dict[str, Tuple[int, int]] = {}
+    for name, entry in toc.items():
+        if not (isinstance(entry, list) and len(entry) == 2
+                and all(isinstance(value, int) for value in entry)):
+            return None
+        offset, length = entry
+        key = json.dumps(name).encode("utf-8") + b": "
+        if offset < len(key) or length < 0 or offset + length > size:
+            return None
+        file.seek(offset - len(key))
+        if file.read(len(key)) != key:
+            return None
+        result[name] = (offset, length)
+    return result
+
+
+def _upgrade_v1(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Версия 1: единый объект без заголовка, секции могут отсутствовать."""
+    for name in SNAPSHOT_SECTIONS[:-1]:
+        data.setdefault(name, [])
+    return data
+
+
+_SNAPSHOT_UPGRADES = {
+    1: _upgrade_v1,
+}
+
+
+def _upgrade_snapshot(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Привести данные снапшота старой версии к текущей.
+
+    Снапшоты более новых версий не изменяются: неизвестные секции и поля
+    просто игнорируются при загрузке.
+    """
+    header = data.get("snapshot")
+    version = int(header.get("version", 1)) if isinstance(header, dict) else 1
+    while version < SNAPSHOT_VERSION:
+        data = _SNAPSHOT_UPGRADES[version](data)
+        version += 1
+    data["snapshot"] = {"format": SNAPSHOT_FORMAT, "version": version}
+    return data
+
+
+def read_json_sections(path: str, sections: Iterable[str]) -> Dict[str, Any]:
+    """Прочитать из JSON-снапшота только указанные секции.
+
+    Для снапшотов версии 2 читаются лишь байты нужных секций по смещениям
+    из оглавления; снапшоты версии 1, а также файлы, оглавление которых
+    не совпадает с содержимым, разбираются целиком.
+    Отсутствующие в файле секции в результат не попадают.
+
+    Args:
+        path: Путь к файлу JSON
+        sections: Имена нужных секций
+
+    Returns:
+        Словарь секция -> данные секции
+
+    Raises:
+        StorageError: При ошибках чтения или парсинга файла
+    """
+    import json
+
+    try:
+        with open(path, "rb") as file:
+            toc = _read_json_toc(file)
+            if toc is not None:
+                try:
+                    result: Dict[str, Any] = {}
+                    for name in sections:
+                        if name in toc:
+                            offset, length = toc[name]
+                            file.seek(offset)
+                            result[name] = json.loads(file.read(length).decode("utf-8"))
+                    return result
+                except ValueError:
+                    # Секция не разобралась по смещению: читаем файл целиком
+                    pass
+            file.seek(0)
+            data = _upgrade_snapshot(json.loads(file.read().decode("utf-8")))
+            return {name: data[name] for name in sections if name in data}
+    except FileNotFoundError:
+        raise StorageError(f"Файл '{path}' не найден")
+    except (IOError, OSError) as e:
+        raise StorageError(f"Ошибка чтения JSON-файла '{path}': {e}") from e
+    except (ValueError, TypeError) as e:
+        raise StorageError(f"Ошибка парсинга JSON-файла '{path}': {e}") from e
+
+
 class ResortStorage:
     """Хранилище сущностей курорта в памяти.
     
@@ -263,6 +557,13 @@ class ResortStorage:
         self._next_location_id: int = 1
         self._next_service_id: int = 1
         self._next_booking_id: int = 1
+        # Индекс бронирований по дням и кэш материализованных расписаний
+        self._bookings_by_day: Dict[date, Dict[str, Booking]] = {}
+        self._day_schedules: Dict[date, DaySchedule] = {}
+        # Номер ревизии: увеличивается при каждом изменении данных
+        self._revision: int = 0
+        # Подписчики на изменения (см. add_listener)
+        self._listeners: List[Callable[[Optional[str], Optional[str], Any, Any], None]] = []
  
     
     def clear_all(self) -> None:
@@ -272,6 +573,10 @@ class ResortStorage:
         self._services.clear()
         self._locations.clear()
         self._bookings.clear()
+        self._bookings_by_day.clear()
+        self._day_schedules.clear()
+        self._revision += 1
+        self._notify(None, None, None, None)
         # Сброс счетчиков ID
         self._next_guest_id = 1
         self._next_staff_id = 1
@@ -280,6 +585,50 @@ class ResortStorage:
         self._next_booking_id = 1
  
     
+    def snapshot(self) -> "ResortStorage":
+        """Снять неизменяемый снимок состояния для фонового сохранения.
+
+        Копируются только словари сущностей (сами сущности общие), поэтому
+        снимок дешёв: хранилище продолжает изменяться, а снимок — нет.
+        Копия словаря атомарна относительно других потоков Python.
+        """
+        copy = ResortStorage()
+        copy._guests = self._guests.copy()
+        copy._staff_members = self._staff_members.copy()
+        copy._services = self._services.copy()
+        copy._locations = self._locations.copy()
+        copy._bookings = self._bookings.copy()
+        copy._next_guest_id = self._next_guest_id
+        copy._next_staff_id = self._next_staff_id
+        copy._next_location_id = self._next_location_id
+        copy._next_service_id = self._next_service_id
+        copy._next_booking_id = self._next_booking_id
+        return copy
+    
+    def add_listener(self, listener: Callable[[Optional[str], Optional[str], Any, Any], None]) -> None:
+        """Подписаться на изменения хранилища.
+
+        После каждого успешного создания, обновления или удаления вызывается
+        listener(entity, entity_id, old, new), где entity — "guest",
+        "staff_member", "service", "location" или "booking"; old равен None
+        при создании, new — при удалении. При полной очистке хранилища
+        (в том числе перед загрузкой из файла) все аргументы равны None.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Optional[str], Optional[str], Any, Any], None]) -> None:
+        """Отписаться от изменений хранилища."""
+        self._listeners.remove(listener)
+
+    def _notify(self, entity: Optional[str], entity_id: Optional[str], old: Any, new: Any) -> None:
+        for listener in self._listeners:
+            listener(entity, entity_id, old, new)
+
+    @property
+    def revision(self) -> int:
+        """Номер ревизии данных; меняется при любом создании, обновлении или удалении."""
+        return self._revision
+    
     # ========== Генерация ID ==========
     
     def generate_guest_id(self) -> str:
@@ -343,6 +692,8 @@ class ResortStorage:
         if guest.guest_id in self._guests:
             raise ValidationError(f"Гость с ID='{guest.guest_id}' уже существует")
         self._guests[guest.guest_id] = guest
+        self._revision += 1
+        self._notify("guest", guest.guest_id, None, guest)
         return guest.guest_id
     
     def get_guest_by_id(self, guest_id: str) -> Guest:
@@ -381,7 +732,10 @@ class ResortStorage:
         """
         if guest_id not in self._guests:
             raise EntityNotFoundError(f"Гость с ID='{guest_id}' не найден")
+        old = self._guests[guest_id]
         self._guests[guest_id] = guest
+        self._revision += 1
+        self._notify("guest", guest_id, old, guest)
     
     def delete_guest(self, guest_id: str) -> None:
         """Удалить гостя из хранилища.
@@ -394,7 +748,9 @@ class ResortStorage:
         """
         if guest_id not in self._guests:
             raise EntityNotFoundError(f"Гость с ID='{guest_id}' не найден")
-        del self._guests[guest_id]
+        old = self._guests.pop(guest_id)
+        self._revision += 1
+        self._notify("guest", guest_id, old, None)
     
     # ========== CRUD для StaffMember ==========
     
@@ -416,6 +772,8 @@ class ResortStorage:
         if staff.staff_id in self._staff_members:
             raise ValidationError(f"Сотрудник с ID='{staff.staff_id}' уже существует")
         self._staff_members[staff.staff_id] = staff
+        self._revision += 1
+        self._notify("staff_member", staff.staff_id, None, staff)
         return staff.staff_id
     
     def get_staff_member_by_id(self, staff_id: str) -> StaffMember:
@@ -457,7 +815,10 @@ class ResortStorage:
         for sid in staff.service_ids:
             if sid not in self._services:
                 raise ValidationError(f"Услуга с ID='{sid}' не существует (для привязки к сотруднику)")
+        old = self._staff_members[staff_id]
         self._staff_members[staff_id] = staff
+        self._revision += 1
+        self._notify("staff_member", staff_id, old, staff)
     
     def delete_staff_member(self, staff_id: str) -> None:
         """Удалить сотрудника из хранилища.
@@ -479,7 +840,9 @@ class ResortStorage:
         for booking in self._bookings.values():
             if booking.staff_member and booking.staff_member.staff_id == staff_id:
                 raise ValidationError(f"Сотрудник {staff_id} используется в бронировании {booking.booking_id}")
-        del self._staff_members[staff_id]
+        old = self._staff_members.pop(staff_id)
+        self._revision += 1
+        self._notify("staff_member", staff_id, old, None)
     
     # ========== CRUD для Service ==========
     
@@ -507,6 +870,8 @@ class ResortStorage:
         if service.service_id in self._services:
             raise ValidationError(f"Услуга с ID='{service.service_id}' уже существует")
         self._services[service.service_id] = service
+        self._revision += 1
+        self._notify("service", service.service_id, None, service)
         return service.service_id
     
     def get_service_by_id(self, service_id: str) -> Service:
@@ -552,7 +917,10 @@ class ResortStorage:
             raise ValidationError(f"Место с ID='{service.location_id}' не существует (для услуги)")
         if service.staff_id is not None and service.staff_id not in self._staff_members:
             raise ValidationError(f"Сотрудник с ID='{service.staff_id}' не существует (для услуги)")
+        old = self._services[service_id]
         self._services[service_id] = service
+        self._revision += 1
+        self._notify("service", service_id, old, service)
     
     def delete_service(self, service_id: str) -> None:
         """Удалить услугу из хранилища.
@@ -570,7 +938,9 @@ class ResortStorage:
         for booking in self._bookings.values():
             if booking.service.service_id == service_id:
                 raise ValidationError(f"Услуга {service_id} используется в бронировании {booking.booking_id}")
-        del self._services[service_id]
+        old = self._services.pop(service_id)
+        self._revision += 1
+        self._notify("service", service_id, old, None)
     
     # ========== CRUD для Location ==========
     
@@ -591,6 +961,8 @@ class ResortStorage:
         if location.location_id in self._locations:
             raise ValidationError(f"Место с ID='{location.location_id}' уже существует")
         self._locations[location.location_id] = location
+        self._revision += 1
+        self._notify("location", location.location_id, None, location)
         return location.location_id
     
     def get_location_by_id(self, location_id: str) -> Location:
@@ -630,7 +1002,10 @@ class ResortStorage:
         """
         if location_id not in self._locations:
             raise EntityNotFoundError(f"Место с ID='{location_id}' не найдено")
+        old = self._locations[location_id]
         self._locations[location_id] = location
+        self._revision += 1
+        self._notify("location", location_id, old, location)
     
     def delete_location(self, location_id: str) -> None:
         """Удалить место из хранилища.
@@ -652,7 +1027,9 @@ class ResortStorage:
         for booking in self._bookings.values():
             if booking.location.location_id == location_id:
                 raise ValidationError(f"Место {location_id} используется в бронировании {booking.booking_id}")
-        del self._locations[location_id]
+        old = self._locations.pop(location_id)
+        self._revision += 1
+        self._notify("location", location_id, old, None)
     
     # ========== CRUD для Booking ==========
     
@@ -669,29 +1046,15 @@ class ResortStorage:
             raise ValidationError("booking_id не может быть пустым")
         if booking.booking_id in self._bookings:
             raise ValidationError(f"Бронирование с ID='{booking.booking_id}' уже существует")
-        # Требования: у услуги должны быть назначены место и сотрудник
-        if not booking.service.location_id:
-            raise ValidationError("Для услуги не назначено место")
-        if not booking.service.staff_id:
-            raise ValidationError("Для услуги не назначен сотрудник")
-        # Проверка согласованности бронирования с услугой
-        if booking.location.location_id != booking.service.location_id:
-            raise ValidationError("Место бронирования не совпадает с местом услуги")
-        if booking.staff_member is None or booking.staff_member.staff_id != booking.service.staff_id:
-            raise ValidationError("Сотрудник бронирования не совпадает с сотрудником услуги")
-        # Проверка, что сотрудник может выполнять эту услугу
-        if booking.staff_member and booking.service.service_id not in booking.staff_member.service_ids:
-            raise ValidationError(f"Сотрудник {booking.staff_member.staff_id} не может выполнять услугу {booking.service.service_id}")
+        self._validate_booking(booking)
         # Проверка занятости гостя, сотрудника и места
-        for existing in self._bookings.values():
-            if existing.time_slot.overlaps(booking.time_slot):
-                if existing.guest.guest_id == booking.guest.guest_id:
-                    raise ValidationError("Гость занят в это время")
-                if existing.staff_member and booking.staff_member and existing.staff_member.staff_id == booking.staff_member.staff_id:
-                    raise ValidationError("Сотрудник занят в это время")
-                if existing.location.location_id == booking.location.location_id:
-                    raise ValidationError("Место занято в это время")
+        conflict = self._find_conflict(booking)
+        if conflict:
+            raise ValidationError(conflict)
         self._bookings[booking.booking_id] = booking
+        self._revision += 1
+        self._index_booking(booking)
+        self._notify("booking", booking.booking_id, None, booking)
         return booking.booking_id
     
     def get_booking_by_id(self, booking_id: str) -> Booking:
@@ -732,28 +1095,17 @@ class ResortStorage:
         if booking_id not in self._bookings:
             raise EntityNotFoundError(f"Бронирование с ID='{booking_id}' не найдено")
         # Валидация обновлённого бронирования (те же проверки, что и при создании)
-        if not booking.service.location_id:
-            raise ValidationError("Для услуги не назначено место")
-        if not booking.service.staff_id:
-            raise ValidationError("Для услуги не назначен сотрудник")
-        if booking.location.location_id != booking.service.location_id:
-            raise ValidationError("Место бронирования не совпадает с местом услуги")
-        if booking.staff_member is None or booking.staff_member.staff_id != booking.service.staff_id:
-            raise ValidationError("Сотрудник бронирования не совпадает с сотрудником услуги")
-        if booking.staff_member and booking.service.service_id not in booking.staff_member.service_ids:
-            raise ValidationError(f"Сотрудник {booking.staff_member.staff_id} не может выполнять услугу {booking.service.service_id}")
+        self._validate_booking(booking)
         # Проверка занятости (исключая само обновляемое бронирование)
-        for existing_id, existing in self._bookings.items():
-            if existing_id == booking_id:  # Пропускаем само обновляемое бронирование
-                continue
-            if existing.time_slot.overlaps(booking.time_slot):
-                if existing.guest.guest_id == booking.guest.guest_id:
-                    raise ValidationError("Гость занят в это время")
-                if existing.staff_member and booking.staff_member and existing.staff_member.staff_id == booking.staff_member.staff_id:
-                    raise ValidationError("Сотрудник занят в это время")
-                if existing.location.location_id == booking.location.location_id:
-                    raise ValidationError("Место занято в это время")
+        conflict = self._find_conflict(booking, exclude_id=booking_id)
+        if conflict:
+            raise ValidationError(conflict)
+        old = self._bookings[booking_id]
+        self._unindex_booking(booking_id, old)
         self._bookings[booking_id] = booking
+        self._revision += 1
+        self._index_booking(booking, booking_id)
+        self._notify("booking", booking_id, old, booking)
     
     def delete_booking(self, booking_id: str) -> None:
         """Удалить бронирование из хранилища.
@@ -766,7 +1118,121 @@ class ResortStorage:
         """
         if booking_id not in self._bookings:
             raise EntityNotFoundError(f"Бронирование с ID='{booking_id}' не найдено")
-        del self._bookings[booking_id]
+        old = self._bookings.pop(booking_id)
+        self._unindex_booking(booking_id, old)
+        self._revision += 1
+        self._notify("booking", booking_id, old, None)
+    
+    # ========== Расписание ==========
+    
+    def get_day_schedule(self, day: date) -> DaySchedule:
+        """Получить расписание на день.
+        
+        Расписание материализуется при первом обращении и хранится в кэше
+        до изменения бронирований этого дня, поэтому стоимость построения
+        пропорциональна числу бронирований дня, а не всего хранилища.
+        
+        Args:
+            day: Календарный день
+            
+        Returns:
+            Расписание с бронированиями, сгруппированными по местам и сотрудникам
+        """
+        schedule = self._day_schedules.get(day)
+        if schedule is None:
+            bookings = list(self._bookings_by_day.get(day, {}).values())
+            schedule = DaySchedule(day, bookings)
+            self._day_schedules[day] = schedule
+        return schedule
+    
+    def get_week_schedule(self, start_day: date) -> List[DaySchedule]:
+        """Получить расписания на семь дней, начиная с указанного.
+        
+        Args:
+            start_day: Первый день недели
+            
+        Returns:
+            Список из семи дневных расписаний
+        """
+        return [self.get_day_schedule(start_day + timedelta(days=i)) for i in range(7)]
+    
+    # ========== Представления для списков ==========
+    
+    def list_service_views(self) -> List[ServiceView]:
+        """Получить услуги вместе с их местами и сотрудниками за один проход.
+        
+        Returns:
+            Список представлений; место или сотрудник равны None, если не назначены
+            или уже удалены
+        """
+        locations = self._locations
+        staff_members = self._staff_members
+        return [
+            ServiceView(
+                service,
+                locations.get(service.location_id) if service.location_id else None,
+                staff_members.get(service.staff_id) if service.staff_id else None,
+            )
+            for service in self._services.values()
+        ]
+    
+    def _validate_booking(self, booking: Booking) -> None:
+        """Проверить согласованность бронирования с услугой, местом и сотрудником.
+
+        Raises:
+            ValidationError: Если бронирование не согласовано с услугой
+                или его интервал пуст либо заканчивается раньше начала
+        """
+        # Пустой или обратный интервал не попал бы ни в один день индекса
+        if booking.time_slot.end_time <= booking.time_slot.start_time:
+            raise ValidationError(BAD_SLOT_MESSAGE)
+        # Требования: у услуги должны быть назначены место и сотрудник
+        if not booking.service.location_id:
+            raise ValidationError("Для услуги не назначено место")
+        if not booking.service.staff_id:
+            raise ValidationError("Для услуги не назначен сотрудник")
+        # Проверка согласованности бронирования с услугой
+        if booking.location.location_id != booking.service.location_id:
+            raise ValidationError("Место бронирования не совпадает с местом услуги")
+        if booking.staff_member is None or booking.staff_member.staff_id != booking.service.staff_id:
+            raise ValidationError("Сотрудник бронирования не совпадает с сотрудником услуги")
+        # Проверка, что сотрудник может выполнять эту услугу
+        if booking.staff_member and booking.service.service_id not in booking.staff_member.service_ids:
+            raise ValidationError(f"Сотрудник {booking.staff_member.staff_id} не может выполнять услугу {booking.service.service_id}")
+    
+    def _find_conflict(self, booking: Booking, exclude_id: Optional[str] = None) -> Optional[str]:
+        """Найти конфликт бронирования с уже существующими.
+
+        Пересекающиеся бронирования обязательно делят хотя бы один день,
+        поэтому проверяются только бронирования из индекса по дням.
+
+        Returns:
+            Описание конфликта или None
+        """
+        for day in _booking_days(booking):
+            for existing_id, existing in self._bookings_by_day.get(day, {}).items():
+                if existing_id != exclude_id:
+                    conflict = _booking_conflict(existing, booking)
+                    if conflict:
+                        return conflict
+        return None
+    
+    def _index_booking(self, booking: Booking, booking_id: Optional[str] = None) -> None:
+        """Добавить бронирование в индекс по дням и сбросить кэш затронутых дней."""
+        key = booking_id if booking_id is not None else booking.booking_id
+        for day in _booking_days(booking):
+            self._bookings_by_day.setdefault(day, {})[key] = booking
+            self._day_schedules.pop(day, None)
+    
+    def _unindex_booking(self, booking_id: str, booking: Booking) -> None:
+        """Убрать бронирование из индекса по дням и сбросить кэш затронутых дней."""
+        for day in _booking_days(booking):
+            day_bookings = self._bookings_by_day.get(day)
+            if day_bookings is not None:
+                day_bookings.pop(booking_id, None)
+                if not day_bookings:
+                    del self._bookings_by_day[day]
+            self._day_schedules.pop(day, None)
     
     # (Секция Invoice удалена)
     
@@ -775,7 +1241,7 @@ class ResortStorage:
     # ========== СЕРИАЛИЗАЦИЯ ==========
 
     def save_to_json(self, path: str) -> None:
-        """Сохранить все сущности в JSON-файл.
+        """Сохранить все сущности в JSON-файл (формат снапшота версии 2).
 
         Args:
             path: Путь к файлу для сохранения
@@ -784,24 +1250,33 @@ class ResortStorage:
             StorageError: При ошибках записи файла
         """
         try:
-            data = self._collect_serializable_data()
-            with open(path, "w", encoding="utf-8") as file:
-                json.dump(data, file, ensure_ascii=False, indent=2)
-        except (IOError, OSError, json.JSONEncodeError) as e:
+            _write_json_snapshot(path, self._iter_serializable_sections())
+        except (IOError, OSError, TypeError, ValueError) as e:
             raise StorageError(f"Ошибка сохранения в JSON-файл '{path}': {e}") from e
 
-    def load_from_json(self, path: str) -> None:
-        """Загрузить все сущности из JSON-файла.
+    def load_from_json(self, path: str, sections: Optional[Iterable[str]] = None) -> None:
+        """Загрузить сущности из JSON-файла.
 
         Args:
             path: Путь к файлу JSON
+            sections: Загрузить только указанные секции (например, ["guests"]);
+                для бронирований автоматически подгружаются связанные секции.
+                По умолчанию загружаются все секции.
             
         Raises:
             StorageError: При ошибках чтения или парсинга файла
         """
+        import json
+
         try:
-            with open(path, "r", encoding="utf-8") as file:
-                data = json.load(file)
+            if sections is None:
+                with open(path, "r", encoding="utf-8") as file:
+                    data = _upgrade_snapshot(json.load(file))
+            else:
+                names = set(sections)
+                if "bookings" in names:
+                    names.update(BOOKING_DEPENDENCIES)
+                data = read_json_sections(path, [name for name in SNAPSHOT_SECTIONS if name in names])
             self._load_serializable_data(data)
         except FileNotFoundError:
             raise StorageError(f"Файл '{path}' не найден")
@@ -812,6 +1287,69 @@ class ResortStorage:
         except (KeyError, ValueError, TypeError) as e:
             raise StorageError(f"Ошибка формата данных в JSON-файле '{path}': {e}") from e
 
+    def load_from_json_cached(self, path: str) -> bool:
+        """Загрузить JSON-файл, используя кэш уже разобранного снапшота.
+
+        Рядом с JSON-файлом хранится pickle-кэш хранилища (snapshot_cache_path).
+        Если время изменения и размер JSON-файла совпадают с записанными в
+        кэше, данные восстанавливаются из кэша без разбора JSON; иначе файл
+        загружается обычным образом и кэш перезаписывается. Кэш читается
+        только из собственных файлов рядом с данными — pickle небезопасен
+        для файлов из недоверенных источников.
+
+        Args:
+            path: Путь к файлу JSON
+
+        Returns:
+            True, если данные взяты из кэша
+
+        Raises:
+            StorageError: При ошибках чтения или парсинга JSON-файла
+        """
+        import pickle
+
+        cache_path = snapshot_cache_path(path)
+        try:
+            key = _snapshot_cache_key(path)
+        except FileNotFoundError:
+            raise StorageError(f"Файл '{path}' не найден")
+        except OSError as e:
+            raise StorageError(f"Ошибка чтения JSON-файла '{path}': {e}") from e
+        gc_enabled = gc.isenabled()
+        try:
+            with open(cache_path, "rb") as file:
+                if pickle.load(file) == key:
+                    # Сборщик мусора на каждом выделении объектов при
+                    # распаковке сотен тысяч сущностей удваивает время загрузки
+                    gc.disable()
+                    state = pickle.load(file)
+                    self.clear_all()
+                    self.__dict__.update(state)
+                    return True
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError, TypeError):
+            # Кэш отсутствует или повреждён — просто читаем JSON
+            pass
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        self.load_from_json(path)
+        state = {
+            name: value
+            for name, value in self.__dict__.items()
+            if name not in ("_day_schedules", "_revision", "_listeners")
+        }
+        tmp_path = cache_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as file:
+                pickle.dump(key, file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except (OSError, pickle.PicklingError):
+            # Без кэша следующий запуск просто снова разберёт JSON
+            pass
+        return False
+
     def save_to_xml(self, path: str) -> None:
         """Сохранить все сущности в XML-файл.
 
@@ -821,9 +1359,12 @@ class ResortStorage:
         Raises:
             StorageError: При ошибках записи файла
         """
+        import xml.dom.minidom
+        import xml.etree.ElementTree as ET
+
         try:
             data = self._collect_serializable_data()
-            root = ET.Element("resort_storage")
+            root = ET.Element(SNAPSHOT_FORMAT, version=str(SNAPSHOT_VERSION))
             for section_name, items in data.items():
                 if section_name == "id_counters":
                     # Специальная обработка для счетчиков ID
@@ -855,10 +1396,12 @@ class ResortStorage:
         Raises:
             StorageError: При ошибках чтения или парсинга файла
         """
+        import xml.etree.ElementTree as ET
+
         try:
             tree = ET.parse(path)
             root = tree.getroot()
-            data: Dict[str, Any] = {}
+            data: Dict[str, Any] = {"snapshot": {"version": int(root.get("version", "1"))}}
             for section in root:
                 if section.tag == "id_counters":
                     # Специальная обработка для счетчиков ID
@@ -868,7 +1411,7 @@ class ResortStorage:
                     for item in section.findall("item"):
                         items.append(_xml_to_data(item))
                     data[section.tag] = items
-            self._load_serializable_data(data)
+            self._load_serializable_data(_upgrade_snapshot(data))
         except FileNotFoundError:
             raise StorageError(f"Файл '{path}' не найден")
         except (IOError, OSError) as e:
@@ -878,6 +1421,27 @@ class ResortStorage:
         except (KeyError, ValueError, TypeError) as e:
             raise StorageError(f"Ошибка формата данных в XML-файле '{path}': {e}") from e
 
+    def _iter_serializable_sections(self) -> Dict[str, Any]:
+        """Собрать секции снапшота в виде генераторов записей."""
+        return {
+            "guests": (_guest_to_dict(guest) for guest in self._guests.values()),
+            "staff_members": (_staff_to_dict(staff) for staff in self._staff_members.values()),
+            "services": (_service_to_dict(service) for service in self._services.values()),
+            "locations": (_location_to_dict(location) for location in self._locations.values()),
+            "bookings": (_booking_to_dict(booking) for booking in self._bookings.values()),
+            "id_counters": self._collect_id_counters(),
+        }
+
+    def _collect_id_counters(self) -> Dict[str, int]:
+        """Собрать счетчики автоматической генерации ID."""
+        return {
+            "next_guest_id": self._next_guest_id,
+            "next_staff_id": self._next_staff_id,
+            "next_location_id": self._next_location_id,
+            "next_service_id": self._next_service_id,
+            "next_booking_id": self._next_booking_id,
+        }
+
     def _collect_serializable_data(self) -> Dict[str, Any]:
         """Собрать все сущности в сериализуемую структуру."""
         return {
@@ -901,43 +1465,44 @@ class ResortStorage:
                 _booking_to_dict(booking)
                 for booking in self._bookings.values()
             ],
-            "id_counters": {
-                "next_guest_id": self._next_guest_id,
-                "next_staff_id": self._next_staff_id,
-                "next_location_id": self._next_location_id,
-                "next_service_id": self._next_service_id,
-                "next_booking_id": self._next_booking_id,
-            }
+            "id_counters": self._collect_id_counters(),
         }
 
-    def _load_serializable_data(self, data: Dict[str, Any]) -> None:
-        """Загрузить сущности из сериализованной структуры."""
+    def _load_serializable_data(self, data: Dict[str, Any], dedupe: bool = True) -> None:
+        """Загрузить сущности из сериализованной структуры.
+
+        Args:
+            data: Сериализованные секции хранилища
+            dedupe: Разделять повторяющиеся строки и временные интервалы
+                между сущностями вместо создания копий для каждой записи
+        """
         self.clear_all()
+        interner = _InternTable(enabled=dedupe)
 
         guest_map: Dict[str, Guest] = {}
         for guest_data in data.get("guests", []):
-            guest = _guest_from_dict(guest_data)
+            guest = _guest_from_dict(guest_data, interner)
             if guest.guest_id:
                 self._guests[guest.guest_id] = guest
                 guest_map[guest.guest_id] = guest
 
         staff_map: Dict[str, StaffMember] = {}
         for staff_data in data.get("staff_members", []):
-            staff = _staff_from_dict(staff_data)
+            staff = _staff_from_dict(staff_data, interner)
             if staff.staff_id:
                 self._staff_members[staff.staff_id] = staff
                 staff_map[staff.staff_id] = staff
 
         location_map: Dict[str, Location] = {}
         for location_data in data.get("locations", []):
-            location = _location_from_dict(location_data)
+            location = _location_from_dict(location_data, interner)
             if location.location_id:
                 self._locations[location.location_id] = location
                 location_map[location.location_id] = location
 
         service_map: Dict[str, Service] = {}
         for service_data in data.get("services", []):
-            service = _service_from_dict(service_data)
+            service = _service_from_dict(service_data, interner)
             if service.service_id:
                 self._services[service.service_id] = service
                 service_map[service.service_id] = service
@@ -950,11 +1515,13 @@ class ResortStorage:
                     services=service_map,
                     locations=location_map,
                     staff_members=staff_map,
+                    interner=interner,
                 )
             except KeyError:
                 continue
             if booking.booking_id:
                 self._bookings[booking.booking_id] = booking
+                self._index_booking(booking)
 
         # Секция invoices исключена
 
@@ -0,0 +1,105 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import analytics
+from classes import ContactInfo, Guest, Location, Service, StaffMember, TimeSlot, Booking
+from storage import ResortStorage
+
+PERIOD_START = datetime(2024, 3, 30, 22, 0)
+BACKENDS = ["numpy", "python"]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    """Прогон на NumPy и на запасной реализации на списках."""
+    if request.param == "python":
+        monkeypatch.setattr(analytics, "np", None)
+    elif analytics.np is None:
+        pytest.skip("NumPy не установлен")
+    return request.param
+
+
+def random_bookings(rng, count):
+    """Бронирования без проверок хранилища: пересечения на одном месте допустимы."""
+    contact = ContactInfo("guest@shrek.com", "+79000000000")
+    guest = Guest("G001", "Гость", contact)
+    locations = [Location(f"L{i:03d}", f"Место {i}") for i in range(1, 5)]
+    staff = [StaffMember(f"S{i:03d}", f"Сотрудник {i}", "Инструктор", contact) for i in range(1, 4)]
+    service = Service("SRV001", "Услуга", 60)
+    bookings = []
+    for number in range(count):
+        start = PERIOD_START + timedelta(minutes=rng.randrange(-600, 3 * 24 * 60), seconds=rng.choice((0, 0, 59)))
+        end = start + timedelta(minutes=rng.randrange(1, 500), seconds=rng.choice((0, 30)))
+        booking = Booking(f"B{number:04d}", guest, service, TimeSlot(start, end), rng.choice(locations))
+        if rng.random() < 0.8:
+            booking.assign_staff(rng.choice(staff))
+        bookings.append(booking)
+    return bookings
+
+
+def minute(value):
+    return value.replace(second=0, microsecond=0)
+
+
+def brute_force(bookings, by, start, end, bin_minutes):
+    """Эталон: занятость каждой минуты периода перебором."""
+    total = (minute(end) - minute(start)) // timedelta(minutes=1)
+    per_minute = {}
+    for booking in bookings:
+        key = analytics.RESOURCE_KEYS[by](booking)
+        if key is None:
+            continue
+        first = (minute(booking.time_slot.start_time) - minute(start)) // timedelta(minutes=1)
+        last = (minute(booking.time_slot.end_time) - minute(start)) // timedelta(minutes=1)
+        row = per_minute.setdefault(key, [0] * total)
+        for moment in range(max(first, 0), min(last, total)):
+            row[moment] += 1
+    return {
+        key: [sum(row[offset:offset + bin_minutes]) for offset in range(0, total, bin_minutes)]
+        for key, row in per_minute.items()
+        if any(row)
+    }
+
+
+class TestUtilization:
+    """Занятость через накопленные суммы совпадает с поминутным перебором"""
+
+    @pytest.mark.parametrize("seed", range(6))
+    @pytest.mark.parametrize("by", sorted(analytics.RESOURCE_KEYS))
+    def test_random_bookings(self, backend, seed, by):
+        rng = random.Random(seed)
+        bookings = random_bookings(rng, 150)
+        bin_minutes = rng.choice((1, 15, 45, 60, 90, 360))
+        start = PERIOD_START + timedelta(minutes=rng.randrange(-120, 120))
+        # Период не кратен ячейке: последняя ячейка неполная
+        end = start + timedelta(minutes=rng.randrange(1, 40) * bin_minutes + rng.randrange(1, bin_minutes + 1))
+        report = analytics.utilization(ResortStorage(), by, start, end, bin_minutes, bookings)
+        expected = brute_force(bookings, by, start, end, bin_minutes)
+        assert report.keys == sorted(expected)
+        assert report.bins == len(next(iter(expected.values())))
+        for key, row in expected.items():
+            assert report.busy_minutes(key) == row, key
+
+    def test_partial_last_bin(self, backend):
+        """Бронирование до конца периода занимает в неполной ячейке только её часть"""
+        bookings = random_bookings(random.Random(1), 1)
+        booking = bookings[0]
+        booking.time_slot = TimeSlot(datetime(2024, 4, 1, 9, 30), datetime(2024, 4, 1, 12, 0))
+        report = analytics.utilization(
+            ResortStorage(), "location", datetime(2024, 4, 1, 9, 0), datetime(2024, 4, 1, 10, 20), 60, bookings,
+        )
+        assert report.busy_minutes(booking.location.location_id) == [30, 20]
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_heatmap_backends_agree(self, monkeypatch, seed):
+        """Тепловая карта на NumPy и на списках одинакова"""
+        if analytics.np is None:
+            pytest.skip("NumPy не установлен")
+        bookings = random_bookings(random.Random(seed), 200)
+        expected = analytics.utilization(ResortStorage(), "staff", bin_minutes=30, bookings=bookings).heatmap()
+        monkeypatch.setattr(analytics, "np", None)
+        report = analytics.utilization(ResortStorage(), "staff", bin_minutes=30, bookings=bookings)
+        for row, expected_row in zip(report.heatmap(), expected):
+            assert row == pytest.approx(expected_row)
@@ -0,0 +1,128 @@
+import time
+
+from classes import ContactInfo, Guest
+from autosave import Autosaver, autosave_path
+from storage import ResortStorage
+
+
+CONTACT = ContactInfo("guest@shrek.com", "+79000000000")
+
+
+def add_guests(storage, saver, numbers):
+    """Изменения, как их отмечает консоль: действие над хранилищем, затем notify."""
+    for number in numbers:
+        storage.create_guest(Guest(f"G{number:03d}", f"Гость {number}", CONTACT))
+        saver.notify()
+
+
+def saved_guests(path):
+    storage = ResortStorage()
+    storage.load_from_json(path)
+    return [guest.guest_id for guest in storage.list_guests()]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_autosave_path():
+    assert autosave_path("lab1/storage_data.json") == "lab1/storage_data.autosave.json"
+    assert autosave_path("data") == "data.autosave.json"
+
+
+class TestTriggers:
+    """Когда фоновый поток сохраняет изменения"""
+
+    def test_interval(self, tmp_path):
+        path = str(tmp_path / "data.autosave.json")
+        storage = ResortStorage()
+        saver = Autosaver(storage, path, interval=0.01, every=0)
+        saver.start()
+        try:
+            add_guests(storage, saver, [1])
+            assert wait_for(lambda: saver.last_saved is not None)
+        finally:
+            saver.stop(flush=False)
+        assert saver.pending == 0 and saved_guests(path) == ["G001"]
+
+    def test_every(self, tmp_path):
+        """После every изменений сохранение не ждёт интервала"""
+        path = str(tmp_path / "data.autosave.json")
+        storage = ResortStorage()
+        saver = Autosaver(storage, path, interval=60, every=3)
+        saver.start()
+        try:
+            add_guests(storage, saver, [1, 2])
+            time.sleep(0.05)
+            assert saver.last_saved is None and saver.pending == 2
+            add_guests(storage, saver, [3])
+            assert wait_for(lambda: saver.last_saved is not None)
+        finally:
+            saver.stop(flush=False)
+        assert saved_guests(path) == ["G001", "G002", "G003"]
+
+    def test_paused(self, tmp_path):
+        """Внутри paused() снимок не снимается, изменения команды сохраняются вместе"""
+        path = str(tmp_path / "data.autosave.json")
+        storage = ResortStorage()
+        saver = Autosaver(storage, path, interval=0.01, every=1)
+        saver.start()
+        try:
+            with saver.paused():
+                add_guests(storage, saver, [1])
+                time.sleep(0.05)
+                assert saver.last_saved is None
+                # Вложенная пауза (загрузка внутри команды) не блокирует поток консоли
+                with saver.paused():
+                    add_guests(storage, saver, [2])
+            assert wait_for(lambda: saver.last_saved is not None)
+        finally:
+            saver.stop(flush=False)
+        assert saved_guests(path) == ["G001", "G002"]
+
+
+class TestStop:
+    """Остановка потока"""
+
+    def test_flush(self, tmp_path):
+        path = tmp_path / "data.autosave.json"
+        storage = ResortStorage()
+        saver = Autosaver(storage, str(path), interval=60, every=0)
+        saver.start()
+        add_guests(storage, saver, [1, 2])
+        saver.stop(flush=True)
+        assert saver._thread is None and saver.pending == 0
+        assert saved_guests(str(path)) == ["G001", "G002"]
+
+    def test_no_flush(self, tmp_path):
+        path = tmp_path / "data.autosave.json"
+        storage = ResortStorage()
+        saver = Autosaver(storage, str(path), interval=60, every=0)
+        saver.start()
+        add_guests(storage, saver, [1])
+        saver.stop(flush=False)
+        assert saver.pending == 1 and not path.exists()
+
+    def test_failed_write_stays_pending(self, tmp_path):
+        """Неудачная запись не теряет изменения: они сохраняются следующей"""
+        storage = ResortStorage()
+        saver = Autosaver(storage, str(tmp_path / "missing" / "data.autosave.json"), interval=0.01, every=0)
+        saver.start()
+        try:
+            add_guests(storage, saver, [1, 2])
+            # Поток повторяет попытки, пока путь недоступен
+            assert wait_for(lambda: saver.last_error is not None and saver.pending == 2)
+            assert saver.last_saved is None
+            path = str(tmp_path / "data.autosave.json")
+            saver.path = path
+            assert wait_for(lambda: saver.last_saved is not None)
+        finally:
+            saver.stop(flush=False)
+        assert saver.last_error is None and saver.pending == 0
+        assert saved_guests(path) == ["G001", "G002"]
+
@@ -0,0 +1,153 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from exceptions import StorageError
+from batch import run_batch, run_batch_file
+from storage import ResortStorage
+
+
+CATALOG = [
+    {"op": "create", "entity": "location", "id": "L001", "name": "Каток"},
+    {"op": "create", "entity": "staff", "id": "S001", "name": "Инструктор Иван", "role": "Инструктор",
+     "email": "ivan@shrek.com", "phone": "+79000000001"},
+    {"op": "create", "entity": "service", "id": "SRV001", "name": "Катание", "duration_minutes": 60,
+     "location_id": "L001", "staff_id": "S001"},
+    {"op": "create", "entity": "guest", "id": "G001", "name": "Гость", "email": "guest@shrek.com",
+     "phone": "+79000000000"},
+    {"op": "create", "entity": "booking", "id": "B001", "guest_id": "G001", "service_id": "SRV001",
+     "start": "2024-03-05 10:00"},
+]
+
+
+def write_jsonl(path, records):
+    with open(path, "w", encoding="utf-8") as file:
+        for record in records:
+            file.write((record if isinstance(record, str) else json.dumps(record, ensure_ascii=False)) + "\n")
+    return str(path)
+
+
+class TestParsing:
+    """Разбор файлов команд"""
+
+    def test_jsonl(self, tmp_path):
+        path = write_jsonl(tmp_path / "commands.jsonl", CATALOG[:2] + [""] + CATALOG[2:] + [
+            {"op": "update", "entity": "guest", "id": "G001", "name": "Новое имя"},
+            {"op": "create", "entity": "guest", "name": "Второй гость", "email": "g2@shrek.com", "phone": "+7"},
+        ])
+        storage = ResortStorage()
+        result = run_batch(storage, path)
+        assert result.ok and result.total == result.succeeded == 7
+        guest = storage.get_guest_by_id("G001")
+        assert guest.name == "Новое имя" and guest.contact.email == "guest@shrek.com"
+        assert [item.guest_id for item in storage.list_guests()] == ["G001", "G002"]
+        # Создание услуги привязывает её к сотруднику
+        assert storage.get_staff_member_by_id("S001").service_ids == ["SRV001"]
+        booking = storage.get_booking_by_id("B001")
+        assert booking.time_slot.end_time == datetime(2024, 3, 5, 11, 0)
+
+    def test_csv(self, tmp_path):
+        """Пустые ячейки CSV не меняют текущих значений, список услуг — через запятую"""
+        path = tmp_path / "commands.csv"
+        path.write_text(
+            "op,entity,id,name,role,email,phone,duration_minutes,location_id,staff_id,service_ids\n"
+            "create,location,L001,Каток,,,,,,,\n"
+            "create,location,L002,Бассейн,,,,,,,\n"
+            "create,staff,S001,Иван,Инструктор,ivan@shrek.com,+7900,,,,\n"
+            "create,service,SRV001,Катание,,,,60,L001,S001,\n"
+            "update,staff,S001,,Тренер,,,,,,\n"
+            "create,staff,S002,Пётр,Тренер,petr@shrek.com,+7901,,,,\"SRV001, \"\n"
+            "delete,location,L002,,,,,,,,\n",
+            encoding="utf-8",
+        )
+        storage = ResortStorage()
+        result = run_batch(storage, str(path))
+        assert result.ok and result.succeeded == 7
+        staff = storage.get_staff_member_by_id("S001")
+        assert (staff.name, staff.role, staff.contact.phone) == ("Иван", "Тренер", "+7900")
+        assert staff.service_ids == ["SRV001"]
+        assert storage.get_staff_member_by_id("S002").service_ids == ["SRV001"]
+        assert storage.get_service_by_id("SRV001").duration_minutes == 60
+        assert [location.location_id for location in storage.list_locations()] == ["L001"]
+
+    @pytest.mark.parametrize("bad, message", [
+        ({"op": "rename", "entity": "guest", "id": "G001"}, "неизвестная операция"),
+        ({"op": "create", "entity": "room", "name": "Номер"}, "неизвестная сущность"),
+        ({"op": "delete", "entity": "guest", "id": "X1"}, "неверный формат ID"),
+        ({"op": "update", "entity": "guest", "name": "Имя"}, "нужен id"),
+        ({"op": "create", "entity": "guest", "name": "Гость"}, "не заданы поля: email, phone"),
+        ({"op": "update", "entity": "guest", "id": "G001", "phone": "телефон"}, "phone"),
+        ({"op": "update", "entity": "service", "id": "SRV001", "duration_minutes": 0}, "положительной"),
+        ({"op": "update", "entity": "booking", "id": "B001", "start": "5 марта"}, ""),
+        (["create", "guest"], "объектом"),
+    ])
+    def test_malformed_line_runs_nothing(self, tmp_path, bad, message):
+        """Если хоть одна команда некорректна, не выполняется ни одна"""
+        path = write_jsonl(tmp_path / "commands.jsonl", CATALOG[:2] + [bad] + CATALOG[2:])
+        storage = ResortStorage()
+        result = run_batch(storage, path)
+        assert result.total == 6 and result.succeeded == 0
+        assert [line for line, _ in result.errors] == [3]
+        assert message in result.errors[0][1]
+        assert storage.list_locations() == [] and storage.list_staff_members() == []
+
+    def test_broken_json(self, tmp_path):
+        path = write_jsonl(tmp_path / "commands.jsonl", CATALOG[:1] + ['{"op": "create",'])
+        with pytest.raises(StorageError, match="парсинга"):
+            run_batch(ResortStorage(), path)
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(StorageError, match="не найден"):
+            run_batch(ResortStorage(), str(tmp_path / "missing.jsonl"))
+
+
+class TestExecution:
+    """Ошибки отдельных команд при выполнении"""
+
+    FAILING = [
+        {"op": "delete", "entity": "guest", "id": "G009"},
+        {"op": "create", "entity": "booking", "id": "B002", "guest_id": "G001", "service_id": "SRV001",
+         "start": "2024-03-05 10:30"},
+        {"op": "create", "entity": "location", "id": "L001", "name": "Каток"},
+        {"op": "update", "entity": "booking", "id": "B009", "start": "2024-03-06 10:00"},
+        {"op": "create", "entity": "booking", "guest_id": "G001", "service_id": "SRV001",
+         "start": "2024-03-05 12:00"},
+    ]
+
+    def test_errors_do_not_stop_batch(self, tmp_path):
+        """Ошибочные команды попадают в отчёт, остальные выполняются"""
+        path = write_jsonl(tmp_path / "commands.jsonl", CATALOG + self.FAILING)
+        storage = ResortStorage()
+        result = run_batch(storage, path)
+        assert result.total == 10 and result.succeeded == 6
+        assert [line for line, _ in result.errors] == [6, 7, 8, 9]
+        assert result.errors[0][1].startswith("delete guest: ")
+        assert [booking.booking_id for booking in storage.list_bookings()] == ["B001", "B002"]
+        assert storage.get_booking_by_id("B002").time_slot.start_time == datetime(2024, 3, 5, 12, 0)
+
+    def test_file_saved_despite_errors(self, tmp_path, capsys):
+        """Выполненные команды сохраняются, код завершения сообщает об ошибках"""
+        path = write_jsonl(tmp_path / "commands.jsonl", CATALOG + self.FAILING)
+        save_path = str(tmp_path / "data.json")
+        assert run_batch_file(path, save_path=save_path) == 1
+        assert "ошибок: 4" in capsys.readouterr().out
+        storage = ResortStorage()
+        storage.load_from_json(save_path)
+        assert len(storage.list_bookings()) == 2
+        storage = ResortStorage()
+        storage.load_from_xml(str(tmp_path / "data.xml"))
+        assert storage.get_service_by_id("SRV001").staff_id == "S001"
+
+        # Повторный запуск поверх сохранённых данных
+        more = write_jsonl(tmp_path / "more.jsonl", [{"op": "delete", "entity": "booking", "id": "B001"}])
+        assert run_batch_file(more, load_path=save_path, save_path=save_path) == 0
+        storage = ResortStorage()
+        storage.load_from_json(save_path)
+        assert [booking.booking_id for booking in storage.list_bookings()] == ["B002"]
+
+    def test_nothing_saved_when_all_fail(self, tmp_path, capsys):
+        path = write_jsonl(tmp_path / "commands.jsonl", self.FAILING[:1])
+        save_path = tmp_path / "data.json"
+        assert run_batch_file(path, save_path=str(save_path)) == 1
+        assert not save_path.exists()
@@ -0,0 +1,123 @@
+import csv
+import struct
+import zlib
+from datetime import datetime, timedelta
+
+import pytest
+
+from exceptions import StorageError
+from classes import ContactInfo, Guest, Location, Service, StaffMember, TimeSlot, Booking
+from storage import ResortStorage
+from export import EXPORT_COLUMNS, export_csv, export_rcol, iter_booking_rows, iter_rcol_rows
+
+
+def filled_storage(count):
+    storage = ResortStorage()
+    contact = ContactInfo("guest@shrek.com", "+79000000000")
+    location = Location("L001", "Каток")
+    storage.create_location(location)
+    staff = StaffMember("S001", "Сотрудник", "Инструктор", contact)
+    storage.create_staff_member(staff)
+    service = Service("SRV001", "Катание, с \"инструктором\"", 45)
+    service.assign_location("L001")
+    service.assign_staff("S001")
+    storage.create_service(service)
+    staff.assign_service("SRV001")
+    storage.update_staff_member("S001", staff)
+    start = datetime(2024, 2, 1, 9, 0)
+    for number in range(count):
+        guest = Guest(f"G{number:03d}", f"Гость {number % 3}", contact)
+        storage.create_guest(guest)
+        slot_start = start + timedelta(hours=number)
+        booking = Booking(f"B{number:03d}", guest, service, TimeSlot(slot_start, slot_start + timedelta(minutes=45)), location)
+        booking.assign_staff(staff)
+        storage.create_booking(booking)
+    return storage
+
+
+def booking_without_staff(storage):
+    booking = storage.list_bookings()[0]
+    return Booking("B900", booking.guest, booking.service, booking.time_slot, booking.location)
+
+
+def read_csv(path):
+    with open(path, encoding="utf-8", newline="") as file:
+        reader = csv.reader(file)
+        assert next(reader) == [name for name, _ in EXPORT_COLUMNS]
+        return [tuple(row) for row in reader]
+
+
+def as_csv(row):
+    return tuple(f"{value:%Y-%m-%d %H:%M}" if isinstance(value, datetime) else str(value) for value in row)
+
+
+class TestExportRoundTrip:
+    """Выгруженные строки читаются обратно без потерь"""
+
+    @pytest.mark.parametrize("count", [0, 1, 7])
+    def test_csv(self, tmp_path, count):
+        storage = filled_storage(count)
+        path = str(tmp_path / "bookings.csv")
+        assert export_csv(storage, path, chunk_rows=3) == count
+        assert read_csv(path) == [as_csv(row) for row in iter_booking_rows(storage)]
+
+    @pytest.mark.parametrize("count", [0, 1, 7])
+    def test_rcol(self, tmp_path, count):
+        storage = filled_storage(count)
+        path = str(tmp_path / "bookings.rcol")
+        assert export_rcol(storage, path, chunk_rows=3) == count
+        assert list(iter_rcol_rows(path)) == list(iter_booking_rows(storage))
+
+    def test_booking_without_staff(self, tmp_path):
+        """Бронирование без сотрудника выгружается пустыми полями"""
+        storage = filled_storage(1)
+        bookings = [booking_without_staff(storage)]
+        csv_path, rcol_path = str(tmp_path / "bookings.csv"), str(tmp_path / "bookings.rcol")
+        export_csv(storage, csv_path, bookings)
+        export_rcol(storage, rcol_path, bookings)
+        (row,) = iter_booking_rows(storage, bookings)
+        assert row[5:7] == ("", "")
+        assert read_csv(csv_path) == [as_csv(row)]
+        assert list(iter_rcol_rows(rcol_path)) == [row]
+
+
+class TestReadRcolErrors:
+    """Повреждённый RCOL-файл даёт StorageError"""
+
+    def test_truncated_file(self, tmp_path):
+        path = str(tmp_path / "bookings.rcol")
+        export_rcol(filled_storage(5), path)
+        with open(path, "rb") as file:
+            data = file.read()
+        for size in (6, len(data) // 2, len(data) - 1):
+            with open(path, "wb") as file:
+                file.write(data[:size])
+            with pytest.raises(StorageError):
+                list(iter_rcol_rows(path))
+
+    @pytest.mark.parametrize("kind, payload", [
+        # Индексов меньше, чем строк
+        ("str", struct.pack("<II", 1, 1) + b"a" + struct.pack("<I", 0)),
+        # Индекс за пределами словаря
+        ("str", struct.pack("<II", 1, 1) + b"a" + struct.pack("<II", 0, 1)),
+        # Словарь длиннее блока
+        ("str", struct.pack("<II", 1, 10) + b"a"),
+        # Значений меньше, чем строк
+        ("int", struct.pack("<q", 1)),
+    ], ids=["short-indexes", "index-out-of-range", "short-dictionary", "short-ints"])
+    def test_inconsistent_column(self, tmp_path, kind, payload):
+        path = str(tmp_path / "bookings.rcol")
+        export_rcol(filled_storage(2), path)
+        with open(path, "rb") as file:
+            data = file.read()
+        # Подменяем первую колонку первой группы (booking_id) блоком с нарушением
+        first = 8 + sum(4 + len(name) + len(column_kind) for name, column_kind in EXPORT_COLUMNS) + 4
+        (size,) = struct.unpack_from("<I", data, first)
+        block = zlib.compress(payload)
+        data = data[:first] + struct.pack("<I", len(block)) + block + data[first + 4 + size:]
+        if kind == "int":
+            data = data.replace(b"booking_id\x03\x00str", b"booking_id\x03\x00int", 1)
+        with open(path, "wb") as file:
+            file.write(data)
+        with pytest.raises(StorageError):
+            list(iter_rcol_rows(path))
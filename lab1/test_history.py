@@ -0,0 +1,177 @@
+import pytest
+
+from exceptions import ResortError, ValidationError
+from classes import ContactInfo, Guest, Location, Service
+from history import History
+from storage import ResortStorage
+
+
+CONTACT = ContactInfo("guest@shrek.com", "+79000000000")
+
+
+def guest(guest_id, name="Гость"):
+    return Guest(guest_id, name, CONTACT)
+
+
+def state(storage):
+    """Содержимое хранилища для сравнения до и после операций."""
+    return (
+        {item.guest_id: item.name for item in storage.list_guests()},
+        {item.location_id: item.name for item in storage.list_locations()},
+        {item.service_id: item.location_id for item in storage.list_services()},
+    )
+
+
+@pytest.fixture
+def storage():
+    return ResortStorage()
+
+
+@pytest.fixture
+def history(storage):
+    history = History(storage)
+    yield history
+    history.close()
+
+
+class TestUndoRedo:
+    """Отмена и повтор отдельных изменений"""
+
+    def test_undo_redo_create_update_delete(self, storage, history):
+        storage.create_guest(guest("G001", "Иван"))
+        storage.update_guest("G001", guest("G001", "Пётр"))
+        storage.delete_guest("G001")
+        assert history.undo() == "удаление: гость G001"
+        assert storage.get_guest_by_id("G001").name == "Пётр"
+        assert history.undo() == "изменение: гость G001"
+        assert storage.get_guest_by_id("G001").name == "Иван"
+        assert history.undo() == "создание: гость G001"
+        assert storage.list_guests() == []
+        assert not history.can_undo
+        for _ in range(3):
+            history.redo()
+        assert storage.list_guests() == []
+        assert history.can_undo and not history.can_redo
+
+    def test_nothing_to_undo(self, history):
+        with pytest.raises(ResortError, match="Нечего отменять"):
+            history.undo()
+        with pytest.raises(ResortError, match="Нечего повторять"):
+            history.redo()
+
+    def test_new_change_clears_redo(self, storage, history):
+        """Новое изменение после отмены делает повтор невозможным"""
+        storage.create_guest(guest("G001"))
+        history.undo()
+        assert history.can_redo
+        storage.create_guest(guest("G002"))
+        assert not history.can_redo
+        with pytest.raises(ResortError):
+            history.redo()
+
+    def test_clear_all_resets(self, storage, history):
+        """Полная очистка хранилища (загрузка из файла) сбрасывает историю"""
+        storage.create_guest(guest("G001"))
+        storage.create_guest(guest("G002"))
+        history.undo()
+        storage.clear_all()
+        assert not history.can_undo and not history.can_redo
+
+    def test_limit(self, storage):
+        history = History(storage, limit=2)
+        for number in range(1, 4):
+            storage.create_guest(guest(f"G{number:03d}"))
+        history.undo()
+        history.undo()
+        assert not history.can_undo
+        assert [item.guest_id for item in storage.list_guests()] == ["G001"]
+        history.close()
+
+
+class TestGroup:
+    """Изменения внутри group() — один шаг истории"""
+
+    def test_group_is_one_step(self, storage, history):
+        with history.group():
+            storage.create_location(Location("L001", "Каток"))
+            storage.create_guest(guest("G001"))
+        assert history.undo() == "создание: место L001, создание: гость G001"
+        assert state(storage) == ({}, {}, {})
+        assert not history.can_undo
+        history.redo()
+        assert state(storage) == ({"G001": "Гость"}, {"L001": "Каток"}, {})
+
+    def test_nested_groups(self, storage, history):
+        """Вложенная группа входит во внешнюю, а не образует отдельный шаг"""
+        with history.group():
+            storage.create_guest(guest("G001"))
+            with history.group():
+                storage.create_guest(guest("G002"))
+            storage.create_guest(guest("G003"))
+        history.undo()
+        assert storage.list_guests() == []
+        assert not history.can_undo
+
+    def test_empty_group(self, storage, history):
+        with history.group():
+            pass
+        assert not history.can_undo
+
+    def test_group_with_error_keeps_done_changes(self, storage, history):
+        """Изменения, выполненные до ошибки в группе, записываются одним шагом"""
+        with pytest.raises(ValidationError):
+            with history.group():
+                storage.create_guest(guest("G001"))
+                storage.create_guest(guest("G001"))
+        history.undo()
+        assert storage.list_guests() == []
+
+
+class TestFailedReplay:
+    """Отмена, не прошедшая проверки хранилища, ничего не меняет"""
+
+    def test_failed_undo_rolls_back(self, storage, history):
+        with history.group():
+            storage.create_location(Location("L001", "Каток"))
+            storage.create_guest(guest("G001"))
+        # Изменение, которого нет в истории (например, сделанное другим компонентом)
+        history.close()
+        service = Service("SRV001", "Катание", 60)
+        service.assign_location("L001")
+        storage.create_service(service)
+        storage.add_listener(history._record)
+        before = state(storage)
+
+        # Отмена удаляет G001, затем спотыкается на используемом месте L001
+        with pytest.raises(ValidationError, match="L001"):
+            history.undo()
+        assert state(storage) == before
+        assert history.can_undo and not history.can_redo
+        # Шаг остался в стеке: после устранения причины отмена проходит
+        history.close()
+        storage.delete_service("SRV001")
+        storage.add_listener(history._record)
+        assert history.undo() == "создание: место L001, создание: гость G001"
+        assert state(storage) == ({}, {}, {})
+
+    def test_rollback_is_not_recorded(self, storage, history):
+        """Откат частично выполненного шага не попадает в историю"""
+        storage.create_guest(guest("G001"))
+        with history.group():
+            storage.create_location(Location("L001", "Каток"))
+            storage.update_guest("G001", guest("G001", "Новое имя"))
+        history.close()
+        service = Service("SRV001", "Катание", 60)
+        service.assign_location("L001")
+        storage.create_service(service)
+        storage.add_listener(history._record)
+        with pytest.raises(ValidationError):
+            history.undo()
+        assert storage.get_guest_by_id("G001").name == "Новое имя"
+        history.close()
+        storage.delete_service("SRV001")
+        storage.add_listener(history._record)
+        history.undo()
+        history.undo()
+        assert state(storage) == ({}, {}, {})
+        assert not history.can_undo
@@ -0,0 +1,356 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from exceptions import EntityNotFoundError, StorageError, ValidationError
+from classes import ContactInfo, Guest, StaffMember, Location, Service, TimeSlot, Booking
+from storage import BAD_SLOT_MESSAGE, ResortStorage
+from sharding import ShardedStorage
+
+
+# Период генерации захватывает границы месяцев, чтобы проверялись и
+# бронирования, переходящие из шарда в шард
+PERIOD_START = datetime(2024, 1, 28, 0, 0)
+PERIOD_DAYS = 36
+DURATIONS = (30, 45, 90, 180, 600, 1500)
+SCALE_OPERATIONS = 20000
+
+
+class ReferenceBookings:
+    """Эталон: перебор всех бронирований без индексов, как проверялись конфликты изначально."""
+
+    def __init__(self):
+        self.bookings = {}
+
+    @staticmethod
+    def conflicts(existing, booking):
+        """Все причины конфликта двух бронирований."""
+        if not (existing.time_slot.start_time < booking.time_slot.end_time
+                and existing.time_slot.end_time > booking.time_slot.start_time):
+            return set()
+        reasons = set()
+        if existing.guest.guest_id == booking.guest.guest_id:
+            reasons.add("Гость занят в это время")
+        if existing.staff_member.staff_id == booking.staff_member.staff_id:
+            reasons.add("Сотрудник занят в это время")
+        if existing.location.location_id == booking.location.location_id:
+            reasons.add("Место занято в это время")
+        return reasons
+
+    def check(self, booking, exclude_id=None):
+        """Множество допустимых сообщений об отказе (пустое — бронирование принимается)."""
+        if booking.time_slot.end_time <= booking.time_slot.start_time:
+            return {BAD_SLOT_MESSAGE}
+        reasons = set()
+        for booking_id, existing in self.bookings.items():
+            if booking_id != exclude_id:
+                reasons |= self.conflicts(existing, booking)
+        return reasons
+
+    def create(self, booking):
+        reasons = self.check(booking)
+        if not reasons:
+            self.bookings[booking.booking_id] = booking
+        return reasons
+
+    def update(self, booking_id, booking):
+        reasons = self.check(booking, exclude_id=booking_id)
+        if not reasons:
+            self.bookings[booking_id] = booking
+        return reasons
+
+    def delete(self, booking_id):
+        del self.bookings[booking_id]
+
+    def day(self, day):
+        return {
+            booking_id
+            for booking_id, booking in self.bookings.items()
+            if booking.time_slot.start_time.date() <= day
+            and (booking.time_slot.end_time - timedelta(microseconds=1)).date() >= day
+        }
+
+
+def fill_catalog(storage):
+    """Справочники, в которых сотрудники работают в разных местах и услуги пересекаются по ресурсам."""
+    contact = ContactInfo("guest@shrek.com", "+79000000000")
+    guests = []
+    for i in range(1, 9):
+        guest = Guest(f"G{i:03d}", f"Гость {i}", contact)
+        storage.create_guest(guest)
+        guests.append(guest)
+    locations = []
+    for i in range(1, 5):
+        location = Location(f"L{i:03d}", f"Место {i}")
+        storage.create_location(location)
+        locations.append(location)
+    staff = [StaffMember(f"S{i:03d}", f"Сотрудник {i}", "Инструктор", contact) for i in range(1, 4)]
+    for member in staff:
+        storage.create_staff_member(member)
+    services = []
+    number = 1
+    for member in staff:
+        for location in locations:
+            service = Service(f"SRV{number:03d}", f"Услуга {number}", DURATIONS[number % len(DURATIONS)])
+            service.assign_location(location.location_id)
+            service.assign_staff(member.staff_id)
+            storage.create_service(service)
+            member.assign_service(service.service_id)
+            services.append(service)
+            number += 1
+        storage.update_staff_member(member.staff_id, member)
+    staff_by_id = {member.staff_id: member for member in staff}
+    locations_by_id = {location.location_id: location for location in locations}
+    return guests, services, staff_by_id, locations_by_id
+
+
+def make_booking(rng, booking_id, guests, services, staff_by_id, locations_by_id, bad_slots=0.0):
+    """Случайное бронирование; с вероятностью bad_slots — с пустым или обратным интервалом."""
+    service = rng.choice(services)
+    start = PERIOD_START + timedelta(minutes=15 * rng.randrange(PERIOD_DAYS * 24 * 4))
+    slot = TimeSlot(start, start + timedelta(minutes=service.duration_minutes))
+    if bad_slots and rng.random() < bad_slots:
+        # Конец в тот же момент или раньше начала, в том числе днём раньше
+        slot = TimeSlot(start, start - timedelta(minutes=rng.choice((0, 15, 11 * 60, 25 * 60))))
+    booking = Booking(booking_id, rng.choice(guests), service, slot, locations_by_id[service.location_id])
+    booking.assign_staff(staff_by_id[service.staff_id])
+    return booking
+
+
+def decision(action):
+    """Выполнить операцию хранилища: None при успехе, текст ошибки при отказе."""
+    try:
+        action()
+    except ValidationError as e:
+        return str(e)
+    return None
+
+
+def run_workload(storage, seed, operations, archive=False):
+    """Прогнать случайную последовательность операций на хранилище и эталоне, сверяя решения."""
+    rng = random.Random(seed)
+    reference = ReferenceBookings()
+    catalog = fill_catalog(storage)
+    accepted = rejected = 0
+    for step in range(operations):
+        roll = rng.random()
+        if roll < 0.55 or not reference.bookings:
+            booking = make_booking(rng, f"B{step:05d}", *catalog, bad_slots=0.03)
+            expected = reference.create(booking)
+            error = decision(lambda: storage.create_booking(booking))
+        elif roll < 0.85:
+            booking_id = rng.choice(sorted(reference.bookings))
+            booking = make_booking(rng, booking_id, *catalog, bad_slots=0.03)
+            expected = reference.update(booking_id, booking)
+            error = decision(lambda: storage.update_booking(booking_id, booking))
+        else:
+            booking_id = rng.choice(sorted(reference.bookings))
+            reference.delete(booking_id)
+            storage.delete_booking(booking_id)
+            continue
+        if expected:
+            assert error in expected, f"шаг {step}: ожидался отказ {expected}, получено {error!r}"
+            rejected += 1
+        else:
+            assert error is None, f"шаг {step}: бронирование отклонено: {error}"
+            accepted += 1
+        if archive and step % 500 == 499:
+            storage.archive_before(PERIOD_START + timedelta(days=rng.randrange(PERIOD_DAYS)))
+    # Генератор должен давать и принятые, и отклонённые операции
+    assert accepted > operations // 10 and rejected > operations // 10
+    return reference
+
+
+def booking_key(booking):
+    # Архивные шарды при загрузке создают новые объекты, поэтому сравниваем по содержимому
+    return (booking.guest.guest_id, booking.service.service_id, booking.time_slot.start_time, booking.time_slot.end_time)
+
+
+def assert_same_state(storage, reference):
+    for booking_id, booking in reference.bookings.items():
+        assert booking_key(storage.get_booking_by_id(booking_id)) == booking_key(booking)
+    for offset in range(-1, PERIOD_DAYS + 3):
+        day = PERIOD_START.date() + timedelta(days=offset)
+        schedule = storage.get_day_schedule(day)
+        assert {booking.booking_id for booking in schedule.bookings} == reference.day(day), day
+
+
+class TestResortStorageConflicts:
+    """Решения ResortStorage совпадают с перебором всех бронирований"""
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_random_workload(self, seed):
+        """Случайные создания, изменения и удаления"""
+        storage = ResortStorage()
+        reference = run_workload(storage, seed, 2000)
+        assert set(storage._bookings) == set(reference.bookings)
+        assert_same_state(storage, reference)
+
+    def test_touching_slots_do_not_conflict(self):
+        """Бронирования, стыкующиеся концом к началу, не конфликтуют"""
+        storage = ResortStorage()
+        guests, services, staff_by_id, locations_by_id = fill_catalog(storage)
+        service = services[0]
+        start = datetime(2024, 2, 1, 23, 0)
+        for number, shift in enumerate((0, service.duration_minutes)):
+            slot_start = start + timedelta(minutes=shift)
+            booking = Booking(
+                f"B{number}", guests[0], service,
+                TimeSlot(slot_start, slot_start + timedelta(minutes=service.duration_minutes)),
+                locations_by_id[service.location_id],
+            )
+            booking.assign_staff(staff_by_id[service.staff_id])
+            storage.create_booking(booking)
+        assert len(storage.list_bookings()) == 2
+
+    @pytest.mark.parametrize("sharded", [False, True])
+    def test_reversed_slot_rejected(self, sharded, tmp_path):
+        """Интервал, заканчивающийся раньше начала, отклоняется и не ломает индексы"""
+        storage = ShardedStorage(str(tmp_path)) if sharded else ResortStorage()
+        guests, services, staff_by_id, locations_by_id = fill_catalog(storage)
+        service = services[0]
+        for booking_id, start, end in (
+            ("B001", datetime(2024, 3, 2, 10, 0), datetime(2024, 3, 1, 23, 0)),
+            ("B002", datetime(2024, 3, 1, 22, 0), datetime(2024, 3, 1, 22, 0)),
+        ):
+            booking = Booking(booking_id, guests[0], service, TimeSlot(start, end), locations_by_id[service.location_id])
+            booking.assign_staff(staff_by_id[service.staff_id])
+            with pytest.raises(ValidationError, match="позже времени начала"):
+                storage.create_booking(booking)
+        assert storage.list_bookings() == []
+
+    def test_update_does_not_conflict_with_itself(self):
+        """Изменение бронирования не конфликтует с его прежней версией"""
+        storage = ResortStorage()
+        catalog = fill_catalog(storage)
+        rng = random.Random(7)
+        booking = make_booking(rng, "B1", *catalog)
+        storage.create_booking(booking)
+        moved = Booking("B1", booking.guest, booking.service, TimeSlot(
+            booking.time_slot.start_time + timedelta(minutes=15),
+            booking.time_slot.end_time + timedelta(minutes=15),
+        ), booking.location)
+        moved.assign_staff(booking.staff_member)
+        storage.update_booking("B1", moved)
+        assert storage.get_booking_by_id("B1") is moved
+
+
+class TestShardedStorageConflicts:
+    """Решения ShardedStorage совпадают с перебором всех бронирований"""
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_random_workload(self, seed, tmp_path):
+        """Случайные операции через границы месяцев"""
+        storage = ShardedStorage(str(tmp_path))
+        reference = run_workload(storage, seed, 2000)
+        assert_same_state(storage, reference)
+
+    @pytest.mark.parametrize("seed", [4, 5])
+    def test_random_workload_with_archiving(self, seed, tmp_path):
+        """Случайные операции с выгрузкой шардов в архив по ходу работы"""
+        storage = ShardedStorage(str(tmp_path))
+        reference = run_workload(storage, seed, 2000, archive=True)
+        assert_same_state(storage, reference)
+
+    def test_deleted_booking_not_found(self, tmp_path):
+        """Удалённое бронирование не находится"""
+        storage = ShardedStorage(str(tmp_path))
+        catalog = fill_catalog(storage)
+        booking = make_booking(random.Random(1), "B1", *catalog)
+        storage.create_booking(booking)
+        storage.delete_booking("B1")
+        with pytest.raises(EntityNotFoundError):
+            storage.get_booking_by_id("B1")
+
+    @pytest.mark.parametrize("archive", [False, True])
+    def test_delete_referenced_entity(self, archive, tmp_path):
+        """Сущность, используемая в бронировании (в том числе архивном), не удаляется"""
+        storage = ShardedStorage(str(tmp_path))
+        catalog = fill_catalog(storage)
+        booking = make_booking(random.Random(1), "B1", *catalog)
+        storage.create_booking(booking)
+        if archive:
+            storage.archive_before(PERIOD_START + timedelta(days=PERIOD_DAYS + 31))
+            assert storage.loaded_shards == []
+        for entity, entity_id in (
+            ("service", booking.service.service_id),
+            ("location", booking.location.location_id),
+            ("staff_member", booking.staff_member.staff_id),
+            ("guest", booking.guest.guest_id),
+        ):
+            with pytest.raises(ValidationError, match="используется"):
+                getattr(storage, f"delete_{entity}")(entity_id)
+        # Неиспользуемую услугу удалить можно, несуществующую — нет
+        unused = next(service for service in catalog[1] if service.service_id != booking.service.service_id)
+        storage.delete_service(unused.service_id)
+        with pytest.raises(EntityNotFoundError):
+            storage.delete_service(unused.service_id)
+        assert booking_key(storage.get_booking_by_id("B1")) == booking_key(booking)
+        storage.delete_booking("B1")
+        storage.delete_service(booking.service.service_id)
+
+    def test_dangling_reference_in_archive(self, tmp_path):
+        """Архив со ссылкой на отсутствующую сущность не загружается молча"""
+        storage = ShardedStorage(str(tmp_path))
+        catalog = fill_catalog(storage)
+        booking = make_booking(random.Random(1), "B1", *catalog)
+        storage.create_booking(booking)
+        storage.archive_before(PERIOD_START + timedelta(days=PERIOD_DAYS + 31))
+        # Справочник изменён в обход проверок, как при ручной правке файлов
+        del storage.catalog._guests[booking.guest.guest_id]
+        with pytest.raises(StorageError, match="B1"):
+            storage.get_booking_by_id("B1")
+
+    def test_reopen_from_directory(self, tmp_path):
+        """Сохранённое хранилище открывается заново из каталога с теми же данными и проверками"""
+        storage = ShardedStorage(str(tmp_path))
+        reference = run_workload(storage, 6, 1500, archive=True)
+        # В файлы попадают и архивные, и загруженные шарды
+        storage.archive_before(PERIOD_START + timedelta(days=10))
+        assert storage.archived_shards and storage.loaded_shards
+        storage.save()
+
+        reopened = ShardedStorage.open(str(tmp_path))
+        assert reopened.loaded_shards == []
+        assert_same_state(reopened, reference)
+        assert len(reopened.list_guests()) == len(storage.list_guests())
+        # Ссылки архивных бронирований по-прежнему защищают справочники
+        reopened.archive_before(PERIOD_START + timedelta(days=PERIOD_DAYS + 31))
+        booking = reference.bookings[min(reference.bookings)]
+        with pytest.raises(ValidationError, match="используется"):
+            reopened.delete_guest(booking.guest.guest_id)
+        # Конфликты с бронированиями из файлов находятся
+        clash = Booking("B99999", booking.guest, booking.service, booking.time_slot, booking.location)
+        clash.assign_staff(booking.staff_member)
+        assert decision(lambda: reopened.create_booking(clash)) in reference.check(clash)
+        assert reopened.generate_booking_id() not in reference.bookings
+
+    def test_open_without_manifest(self, tmp_path):
+        """Каталог без манифеста не открывается"""
+        with pytest.raises(StorageError):
+            ShardedStorage.open(str(tmp_path))
+
+    def test_move_between_shards_notifies(self, tmp_path):
+        """Перенос бронирования в другой месяц виден подписчикам обоих шардов"""
+        storage = ShardedStorage(str(tmp_path))
+        catalog = fill_catalog(storage)
+        booking = make_booking(random.Random(1), "B1", *catalog)
+        booking.time_slot = TimeSlot(datetime(2024, 1, 29, 10, 0), datetime(2024, 1, 29, 11, 0))
+        storage.create_booking(booking)
+        moved = Booking("B1", booking.guest, booking.service,
+                        TimeSlot(datetime(2024, 2, 5, 10, 0), datetime(2024, 2, 5, 11, 0)), booking.location)
+        moved.assign_staff(booking.staff_member)
+        events = []
+        for key in ("2024-01", "2024-02"):
+            storage.shard(key).add_listener(lambda *event, key=key: events.append((key,) + event))
+        storage.update_booking("B1", moved)
+        assert events == [("2024-01", "booking", "B1", booking, None), ("2024-02", "booking", "B1", None, moved)]
+        assert storage.get_booking_by_id("B1") is moved
+
+
+def test_scale_workload():
+    """Длинная последовательность операций на ResortStorage"""
+    storage = ResortStorage()
+    reference = run_workload(storage, 11, SCALE_OPERATIONS)
+    assert set(storage._bookings) == set(reference.bookings)
@@ -0,0 +1,368 @@
+import json
+import random
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+
+import pytest
+
+from exceptions import StorageError
+from classes import ContactInfo, Guest, Location
+import snapshot
+from snapshot import _sweep_crossing, diff_snapshots, iter_snapshot, main, merge_snapshots, validate_snapshot
+from storage import ResortStorage, read_json_sections
+
+
+def saved_snapshot(tmp_path):
+    storage = ResortStorage()
+    contact = ContactInfo("guest@shrek.com", "+79000000000")
+    for i in range(1, 4):
+        storage.create_guest(Guest(f"G{i:03d}", f"Гость {i}", contact))
+        storage.create_location(Location(f"L{i:03d}", f"Место {i}"))
+    path = str(tmp_path / "snapshot.json")
+    storage.save_to_json(path)
+    return path
+
+
+def edit_snapshot(path, old, new, fix_size=False):
+    """Ручная правка файла; при fix_size размер в заголовке подгоняется под новый."""
+    with open(path, "rb") as file:
+        data = file.read().replace(old.encode("utf-8"), new.encode("utf-8"))
+    if fix_size:
+        header_end = data.index(b"\n") + 1
+        header = json.loads(data[len(b'{"snapshot": '):header_end - 2])
+        old_header = json.dumps(header).encode("utf-8")
+        header["size"] = len(data)
+        new_header = json.dumps(header).encode("utf-8")
+        assert len(new_header) == len(old_header)
+        data = data.replace(old_header, new_header, 1)
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def booking(booking_id, guest_id, location_id, start, end, staff_id="S001"):
+    """Запись бронирования; start и end — время 2024-03-05 в формате ЧЧ:ММ."""
+    return {
+        "booking_id": booking_id,
+        "guest_id": guest_id,
+        "service_id": "SRV001",
+        "location_id": location_id,
+        "staff_id": staff_id,
+        "time_slot": {"start_time": f"2024-03-05T{start}:00", "end_time": f"2024-03-05T{end}:00"},
+    }
+
+
+def snapshot_data(bookings):
+    """Данные снапшота в порядке секций хранилища; бронирования пишутся как есть."""
+    contact = {"email": "guest@shrek.com", "phone": "+79000000000", "address": None}
+    return {
+        "guests": [{"guest_id": f"G{i:03d}", "name": f"Гость {i}", "contact": contact} for i in (1, 2)],
+        "staff_members": [
+            {"staff_id": f"S{i:03d}", "name": f"Сотрудник {i}", "role": "Инструктор", "contact": contact,
+             "service_ids": ["SRV001"]}
+            for i in (1, 2)
+        ],
+        "services": [{"service_id": "SRV001", "name": "Услуга", "duration_minutes": 60,
+                      "location_id": "L001", "staff_id": "S001"}],
+        "locations": [{"location_id": f"L{i:03d}", "name": f"Место {i}"} for i in (1, 2)],
+        "bookings": bookings,
+        "id_counters": {"guest": 3, "booking": 10},
+    }
+
+
+def _xml_element(tag, value):
+    element = ET.Element(tag)
+    if isinstance(value, dict):
+        element.extend(_xml_element(key, item) for key, item in value.items())
+    elif isinstance(value, list):
+        element.extend(_xml_element("item", item) for item in value)
+    elif value is not None:
+        element.text = str(value)
+    return element
+
+
+def write_snapshot(path, data):
+    """Записать данные как есть (без проверок хранилища) в JSON или XML по расширению."""
+    path = str(path)
+    if path.endswith(".xml"):
+        ET.ElementTree(_xml_element("resort_storage", data)).write(path, encoding="utf-8", xml_declaration=True)
+    else:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False, indent=2)
+    return path
+
+
+class TestReadJsonSections:
+    """Чтение секций снапшота по оглавлению"""
+
+    def test_sections_by_offsets(self, tmp_path):
+        """Секции читаются по смещениям из заголовка"""
+        path = saved_snapshot(tmp_path)
+        data = read_json_sections(path, ["locations", "guests"])
+        assert [guest["name"] for guest in data["guests"]] == ["Гость 1", "Гость 2", "Гость 3"]
+        assert [location["name"] for location in data["locations"]] == ["Место 1", "Место 2", "Место 3"]
+
+    @pytest.mark.parametrize("fix_size", [False, True])
+    def test_hand_edited_file(self, tmp_path, fix_size):
+        """После ручной правки, сдвинувшей секции, файл разбирается целиком"""
+        path = saved_snapshot(tmp_path)
+        edit_snapshot(path, "Гость 1", "Гость номер 1", fix_size)
+        data = read_json_sections(path, ["locations", "guests"])
+        assert data["guests"][0]["name"] == "Гость номер 1"
+        assert [location["name"] for location in data["locations"]] == ["Место 1", "Место 2", "Место 3"]
+        storage = ResortStorage()
+        storage.load_from_json(path, ["locations"])
+        assert storage.get_location_by_id("L003").name == "Место 3"
+
+    def test_broken_file(self, tmp_path):
+        """Испорченный файл по-прежнему даёт StorageError"""
+        path = saved_snapshot(tmp_path)
+        edit_snapshot(path, '"Место 2"', '"Место 2')
+        with pytest.raises(StorageError):
+            read_json_sections(path, ["locations"])
+
+
+class TestValidate:
+    """Проверка целостности снапшота за один проход"""
+
+    @pytest.mark.parametrize("ext", ["json", "xml"])
+    def test_valid(self, tmp_path, ext):
+        """Ссылки вперёд по файлу (услуга -> место) не считаются висячими"""
+        path = write_snapshot(tmp_path / f"data.{ext}", snapshot_data([
+            booking("B001", "G001", "L001", "10:00", "11:00"),
+            booking("B002", "G001", "L001", "11:00", "12:00"),
+        ]))
+        report = validate_snapshot(path)
+        assert report.ok, str(report)
+        assert report.counts == {"guests": 2, "staff_members": 2, "services": 1, "locations": 2, "bookings": 2}
+
+    @pytest.mark.parametrize("ext", ["json", "xml"])
+    def test_duplicates_and_dangling(self, tmp_path, ext):
+        data = snapshot_data([
+            booking("B001", "G001", "L001", "10:00", "11:00"),
+            booking("B001", "G002", "L002", "10:00", "11:00", "S002"),
+            booking("B002", "G009", "L009", "12:00", "13:00"),
+        ])
+        data["guests"].append(dict(data["guests"][0]))
+        # Ссылки вперёд: место объявлено ниже по файлу, услуги — выше
+        data["services"][0]["location_id"] = "L007"
+        data["staff_members"][1]["service_ids"] = ["SRV001", "SRV009"]
+        report = validate_snapshot(write_snapshot(tmp_path / f"data.{ext}", data))
+        assert report.duplicates == [("guests", "G001"), ("bookings", "B001")]
+        assert sorted(report.dangling) == [
+            ("bookings", "B002", "guest_id", "G009"),
+            ("bookings", "B002", "location_id", "L009"),
+            ("services", "SRV001", "location_id", "L007"),
+            ("staff_members", "S002", "service_ids", "SRV009"),
+        ]
+        assert report.overlaps == [] and not report.ok
+        assert "Повторяющийся ID в guests: G001" in str(report)
+
+    @pytest.mark.parametrize("ext", ["json", "xml"])
+    def test_overlaps(self, tmp_path, ext):
+        """Пересечение находится и с непосредственно предшествующим интервалом, и с более ранним длинным"""
+        report = validate_snapshot(write_snapshot(tmp_path / f"data.{ext}", snapshot_data([
+            booking("B003", "G002", "L001", "13:00", "13:30", "S002"),
+            booking("B001", "G001", "L001", "10:00", "14:00"),
+            booking("B002", "G002", "L001", "11:00", "12:00", "S002"),
+            booking("B004", "G001", "L002", "14:00", "15:00"),
+        ])))
+        assert sorted(report.overlaps) == [
+            ("место", "L001", "B002", "B001"),
+            ("место", "L001", "B003", "B001"),
+        ]
+        assert "Пересечение бронирований B002 и B001 (место L001)" in str(report)
+
+    @pytest.mark.parametrize("ext", ["json", "xml"])
+    def test_bad_records(self, tmp_path, ext):
+        bad_slot = booking("B002", "G002", "L002", "12:00", "11:00", "S002")
+        no_slot = booking("B003", "G002", "L002", "12:00", "13:00", "S002")
+        del no_slot["time_slot"]
+        data = snapshot_data([booking("B001", "G001", "L001", "10:00", "11:00"), bad_slot, no_slot])
+        data["locations"].append({"name": "Место без ID"})
+        report = validate_snapshot(write_snapshot(tmp_path / f"data.{ext}", data))
+        assert report.errors == [
+            "locations: запись без location_id",
+            "bookings/B002: конец интервала не позже начала",
+            "bookings/B003: некорректный time_slot",
+        ]
+
+    def test_broken_record_bounded(self, tmp_path, monkeypatch):
+        """Повреждённая запись не дочитывает в память весь оставшийся файл"""
+        monkeypatch.setattr(snapshot, "_CHUNK_SIZE", 256)
+        monkeypatch.setattr(snapshot, "_MAX_RECORD_SIZE", 4096)
+        bookings = [booking(f"B{i:03d}", "G001", "L001", "10:00", "11:00") for i in range(200)]
+        path = write_snapshot(tmp_path / "data.json", snapshot_data(bookings))
+        edit_snapshot(path, '"B001"', '"B001')
+        with pytest.raises(StorageError, match="длиннее 4096"):
+            validate_snapshot(path)
+        # Пропускаемая секция длиннее предела, но её записи — нет
+        edit_snapshot(path, '"B001', '"B001"')
+        assert len(list(iter_snapshot(path, ["locations", "id_counters"]))) == 3
+
+
+class TestIterSnapshot:
+    """Потоковое чтение и слияние снапшотов"""
+
+    def test_merge_hand_edited_file(self, tmp_path):
+        """Слияние перечитывает секции правленого файла без устаревших смещений"""
+        path = saved_snapshot(tmp_path)
+        edit_snapshot(path, "Место 1", "Место номер 1", fix_size=True)
+        output = str(tmp_path / "merged.json")
+        other = tmp_path / "other"
+        other.mkdir()
+        report = merge_snapshots(path, saved_snapshot(other), output)
+        assert report.counts["locations"] == 3
+        data = read_json_sections(output, ["locations"])
+        assert [location["name"] for location in data["locations"]] == ["Место номер 1", "Место 2", "Место 3"]
+
+    def test_not_utf8(self, tmp_path):
+        """Файл не в UTF-8 даёт StorageError, а не UnicodeDecodeError"""
+        path = saved_snapshot(tmp_path)
+        with open(path, "rb") as file:
+            data = file.read()
+        with open(path, "wb") as file:
+            file.write(data.replace("Место 2".encode("utf-8"), "Место 2".encode("cp1251")))
+        with pytest.raises(StorageError, match="UTF-8"):
+            list(iter_snapshot(path))
+
+
+class TestDiff:
+    """Сравнение снапшотов по сущностям"""
+
+    def test_identical(self, tmp_path):
+        """Порядок полей в записи не считается изменением"""
+        data = snapshot_data([booking("B001", "G001", "L001", "10:00", "11:00")])
+        left = write_snapshot(tmp_path / "left.json", data)
+        data["locations"][0] = {"name": "Место 1", "location_id": "L001"}
+        right = write_snapshot(tmp_path / "right.json", data)
+        diff = diff_snapshots(left, right)
+        assert diff.identical and "совпадают" in str(diff)
+
+    def test_changes(self, tmp_path):
+        left_data = snapshot_data([booking("B001", "G001", "L001", "10:00", "11:00"),
+                                   booking("B002", "G002", "L002", "10:00", "11:00", "S002")])
+        right_data = snapshot_data([booking("B002", "G002", "L002", "12:00", "13:00", "S002"),
+                                    booking("B003", "G001", "L001", "10:00", "11:00")])
+        right_data["guests"][1]["name"] = "Новое имя"
+        del right_data["locations"][1]
+        diff = diff_snapshots(write_snapshot(tmp_path / "left.json", left_data),
+                              write_snapshot(tmp_path / "right.xml", right_data))
+        assert not diff.identical
+        assert diff.added["bookings"] == ["B003"]
+        assert diff.removed == {**{name: [] for name in diff.removed}, "bookings": ["B001"], "locations": ["L002"]}
+        assert diff.changed["bookings"] == ["B002"]
+        assert "G002" in diff.changed["guests"]
+        assert "+ bookings (1): B003" in str(diff)
+
+
+class TestMerge:
+    """Слияние снапшотов и отбрасывание пересекающихся бронирований"""
+
+    def merge(self, tmp_path, left_bookings, right_bookings, prefer="left"):
+        left = write_snapshot(tmp_path / "left.json", snapshot_data(left_bookings))
+        right = write_snapshot(tmp_path / "right.json", snapshot_data(right_bookings))
+        output = str(tmp_path / "merged.json")
+        report = merge_snapshots(left, right, output, prefer=prefer)
+        merged = [record["booking_id"] for _, record in iter_snapshot(output, ["bookings"])]
+        return report, merged
+
+    def test_crossing_rejected(self, tmp_path):
+        """Бронирование второго файла проигрывает пересекающемуся бронированию первого"""
+        report, merged = self.merge(tmp_path, [
+            booking("B001", "G001", "L001", "10:00", "11:00"),
+            booking("B002", "G001", "L001", "12:00", "13:00"),
+        ], [
+            # Пересекается с B001 по месту и сотруднику — отбрасывается один раз
+            booking("B003", "G002", "L001", "10:30", "11:30"),
+            # Пересекается только с отброшенным B003 (гость) — остаётся
+            booking("B004", "G002", "L002", "11:00", "12:00", "S002"),
+            # Начинается раньше B002, а пересекается с ним
+            booking("B005", "G002", "L001", "11:45", "12:15", "S002"),
+            # Касается B001 концом — не пересечение
+            booking("B006", "G001", "L001", "11:00", "11:30"),
+        ])
+        assert report.rejected == [("B003", "B001", "место", "L001"), ("B005", "B002", "место", "L001")]
+        assert merged == ["B001", "B002", "B004", "B006"]
+        assert report.counts["bookings"] == 4 and report.overlaps == []
+        assert report.counts["guests"] == 2
+
+    def test_prefer_right(self, tmp_path):
+        report, merged = self.merge(tmp_path, [booking("B001", "G001", "L001", "10:00", "11:00")],
+                                    [booking("B002", "G002", "L001", "10:30", "11:30")], prefer="right")
+        assert report.rejected == [("B001", "B002", "место", "L001")]
+        assert merged == ["B002"]
+
+    def test_overlap_inside_file_kept(self, tmp_path):
+        """Пересечения внутри одного файла не разрешаются, а попадают в отчёт"""
+        report, merged = self.merge(tmp_path, [booking("B001", "G001", "L001", "10:00", "11:00")], [
+            booking("B002", "G002", "L002", "12:00", "13:00", "S002"),
+            booking("B003", "G002", "L002", "12:30", "13:30", "S002"),
+        ])
+        assert report.rejected == []
+        assert merged == ["B001", "B002", "B003"]
+        assert {(kind, resource) for kind, resource, _, _ in report.overlaps} == {
+            ("гость", "G002"), ("место", "L002"), ("сотрудник", "S002")
+        }
+
+    def test_same_id_conflict(self, tmp_path):
+        """Бронирование с тем же ID берётся из приоритетного файла и не отбрасывается"""
+        report, merged = self.merge(tmp_path, [booking("B001", "G001", "L001", "10:00", "11:00")],
+                                    [booking("B001", "G001", "L001", "10:30", "11:30")])
+        assert report.rejected == [] and merged == ["B001"]
+        assert report.diff.changed["bookings"] == ["B001"]
+        assert "Конфликт версий в bookings" in str(report)
+
+    def test_sweep_matches_pairwise(self):
+        """Проход по ресурсам находит ровно те бронирования, что и попарная проверка"""
+        rng = random.Random(7)
+        day = datetime(2024, 3, 5)
+        resources = [("место", "L001"), ("место", "L002"), ("гость", "G001")]
+
+        def intervals(prefix, count):
+            result = {}
+            for number in range(count):
+                start = day + timedelta(minutes=15 * rng.randrange(40))
+                end = start + timedelta(minutes=15 * rng.randrange(1, 8))
+                result[f"{prefix}{number:03d}"] = (start, end, rng.sample(resources, rng.randrange(1, 3)))
+            return result
+
+        for _ in range(50):
+            primary, secondary = intervals("P", 12), intervals("S", 12)
+            expected = {
+                booking_id for booking_id, (start, end, shared) in secondary.items()
+                if any(other_start < end and other_end > start and set(shared) & set(other_shared)
+                       for other_start, other_end, other_shared in primary.values())
+            }
+            crossing = _sweep_crossing(primary, secondary)
+            assert {loser for loser, _, _, _ in crossing} == expected
+            for loser, winner, kind, resource_id in crossing:
+                start, end, _ = secondary[loser]
+                other_start, other_end, shared = primary[winner]
+                assert (kind, resource_id) in shared and other_start < end and other_end > start
+
+
+class TestCommandLine:
+    """Команды validate, diff и merge"""
+
+    def test_validate(self, tmp_path, capsys):
+        good = write_snapshot(tmp_path / "good.xml", snapshot_data([booking("B001", "G001", "L001", "10:00", "11:00")]))
+        assert main(["validate", good]) == 0
+        assert "Нарушений не найдено" in capsys.readouterr().out
+        bad = write_snapshot(tmp_path / "bad.json", snapshot_data([booking("B001", "G009", "L001", "10:00", "11:00")]))
+        assert main(["validate", bad]) == 1
+        assert "guest_id ссылается на несуществующий ID 'G009'" in capsys.readouterr().out
+        assert main(["validate", str(tmp_path / "missing.json")]) == 2
+        assert "не найден" in capsys.readouterr().out
+
+    def test_diff_and_merge(self, tmp_path, capsys):
+        left = write_snapshot(tmp_path / "left.json", snapshot_data([booking("B001", "G001", "L001", "10:00", "11:00")]))
+        right = write_snapshot(tmp_path / "right.json", snapshot_data([booking("B002", "G002", "L001", "10:30", "11:30")]))
+        assert main(["diff", left, left]) == 0
+        assert main(["diff", left, right]) == 1
+        assert "- bookings (1): B001" in capsys.readouterr().out
+        output = str(tmp_path / "merged.json")
+        assert main(["merge", left, right, "-o", output, "--prefer", "right"]) == 0
+        assert "Бронирование B001 отброшено: пересекается с B002 (место L001)" in capsys.readouterr().out
+        storage = ResortStorage()
+        storage.load_from_json(output)
+        assert [item.booking_id for item in storage.list_bookings()] == ["B002"]
@@ -0,0 +1,186 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from exceptions import EntityNotFoundError, StorageError, ValidationError
+from classes import ContactInfo, Guest, Location, Service, StaffMember, TimeSlot, Booking
+from storage import ResortStorage
+from versioning import VersionedStore, versions_path
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2024, 3, 1, 12, 0)
+
+    def __call__(self):
+        return self.now
+
+    def tick(self, minutes=10):
+        self.now += timedelta(minutes=minutes)
+        return self.now
+
+
+def fill_storage(storage):
+    contact = ContactInfo("guest@shrek.com", "+79000000000")
+    guest = Guest("G001", "Гость 1", contact)
+    storage.create_guest(guest)
+    storage.create_guest(Guest("G002", "Гость 2", contact))
+    location = Location("L001", "Место 1")
+    storage.create_location(location)
+    staff = StaffMember("S001", "Сотрудник 1", "Инструктор", contact)
+    storage.create_staff_member(staff)
+    service = Service("SRV001", "Услуга 1", 60)
+    service.assign_location("L001")
+    service.assign_staff("S001")
+    storage.create_service(service)
+    staff.assign_service("SRV001")
+    storage.update_staff_member("S001", staff)
+    start = datetime(2024, 3, 5, 10, 0)
+    booking = Booking("B001", guest, service, TimeSlot(start, start + timedelta(minutes=60)), location)
+    booking.assign_staff(staff)
+    storage.create_booking(booking)
+
+
+class TestVersionsFile:
+    """История версий переживает сохранение и загрузку файла данных"""
+
+    def test_restore_after_reload(self, tmp_path):
+        """Удалённые в прошлом сеансе сущности можно восстановить"""
+        path = str(tmp_path / "data.json")
+        clock = FakeClock()
+        storage = ResortStorage()
+        versions = VersionedStore(storage, clock)
+        fill_storage(storage)
+        created = clock.now
+        clock.tick()
+        storage.delete_booking("B001")
+        storage.update_guest("G002", Guest("G002", "Гость 2 (новое имя)", ContactInfo("g2@shrek.com", "+7")))
+        deleted_at = clock.tick()
+        storage.delete_guest("G001")
+        storage.save_to_json(path)
+        versions.save(versions_path(path))
+        versions.close()
+
+        clock.tick()
+        storage = ResortStorage()
+        versions = VersionedStore(storage, clock)
+        storage.load_from_json(path)
+        assert versions.load(versions_path(path))
+        assert [entity_id for entity_id, _ in versions.deleted("guest")] == ["G001"]
+        assert [entity_id for entity_id, _ in versions.deleted("booking")] == ["B001"]
+        assert versions.get_as_of("guest", "G002", created).name == "Гость 2"
+        assert versions.get_as_of("guest", "G002", clock.tick()).name == "Гость 2 (новое имя)"
+        # Загруженные заново неизменённые сущности не получают новых версий
+        assert len(versions.history("guest", "G002")) == 2
+        assert len(versions.history("location", "L001")) == 1
+        booking = versions.get_as_of("booking", "B001", created)
+        assert booking.guest.name == "Гость 1" and booking.staff_member.staff_id == "S001"
+        schedule = versions.day_schedule_as_of(booking.time_slot.start_time.date(), created)
+        assert [item.booking_id for item in schedule.bookings] == ["B001"]
+
+        versions.restore("guest", "G001")
+        assert storage.get_guest_by_id("G001").name == "Гость 1"
+        with pytest.raises(EntityNotFoundError):
+            versions.get_as_of("guest", "G001", deleted_at)
+
+    def test_reload_moment(self, tmp_path):
+        """Версии после перезагрузки действуют с момента загрузки, а не следующего запроса"""
+        path = str(tmp_path / "data.json")
+        other = ResortStorage()
+        fill_storage(other)
+        other.save_to_json(path)
+        clock = FakeClock()
+        storage = ResortStorage()
+        versions = VersionedStore(storage, clock)
+        loaded_at = clock.tick()
+        storage.load_from_json(path)
+        clock.tick(60)
+        assert versions.history("guest", "G001")[0][0] == loaded_at
+        assert not versions.load(versions_path(path))
+
+    def test_broken_file(self, tmp_path):
+        """Повреждённый файл истории даёт StorageError"""
+        path = tmp_path / "data.versions"
+        path.write_text("{", encoding="utf-8")
+        versions = VersionedStore(ResortStorage())
+        with pytest.raises(StorageError):
+            versions.load(str(path))
+
+
+class TestCompaction:
+    """Сжатие старых версий и горизонт запросов"""
+
+    def make_history(self):
+        clock = FakeClock()
+        storage = ResortStorage()
+        versions = VersionedStore(storage, clock)
+        fill_storage(storage)
+        first = clock.now
+        contact = ContactInfo("g2@shrek.com", "+7")
+        names = []
+        for number in range(1, 4):
+            clock.tick()
+            name = f"Гость 2, версия {number}"
+            storage.update_guest("G002", Guest("G002", name, contact))
+            names.append((clock.now, name))
+        clock.tick()
+        storage.delete_booking("B001")
+        storage.delete_guest("G001")
+        return clock, storage, versions, first, names
+
+    def test_compact(self):
+        """Версии до горизонта удаляются, запросы на горизонт и позже остаются точными"""
+        clock, storage, versions, first, names = self.make_history()
+        before = names[1][0] + timedelta(minutes=1)
+        versions.compact(before)
+        assert versions.horizon == before
+        assert versions.get_as_of("guest", "G002", before).name == names[1][1]
+        assert versions.get_as_of("guest", "G002", clock.now).name == names[2][1]
+        assert len(versions.history("guest", "G002")) == 2
+        with pytest.raises(ValidationError, match="сжата"):
+            versions.get_as_of("guest", "G002", first)
+        with pytest.raises(ValidationError):
+            versions.day_schedule_as_of(first.date(), first)
+        # Горизонт не отодвигается назад
+        versions.compact(first)
+        assert versions.horizon == before
+
+    def test_compact_forgets_deleted(self):
+        """Удалённые до горизонта сущности забываются, удалённые после — нет"""
+        clock, storage, versions, first, names = self.make_history()
+        versions.compact(names[0][0])
+        assert [entity_id for entity_id, _ in versions.deleted("guest")] == ["G001"]
+        # G001 и B001: по одной версии до удаления и по отметке удаления;
+        # G002: две версии до последней
+        assert versions.compact(clock.now) == 2 + 2 + 2
+        assert versions.deleted("guest") == [] and versions.deleted("booking") == []
+        assert versions.day_schedule_as_of(datetime(2024, 3, 5).date(), clock.now).bookings == []
+
+    def test_compact_during_load(self):
+        """Сжатие посреди загрузки не сверяет историю с наполовину заполненным хранилищем"""
+        clock, storage, versions, first, names = self.make_history()
+        guests = {guest.guest_id: guest for guest in storage.list_guests()}
+        locations = dict(storage._locations)
+        clock.tick()
+        # Так хранилище заполняет _load_serializable_data: очистка, затем словари напрямую
+        storage.clear_all()
+        storage._guests.update(guests)
+        versions.compact(clock.now)
+        storage._locations.update(locations)
+        assert [location.location_id for location in versions.list_as_of("location", clock.now)] == ["L001"]
+        assert versions.deleted("location") == []
+
+    def test_background_compaction(self):
+        """Фоновый поток сжимает историю и останавливается"""
+        clock, storage, versions, first, names = self.make_history()
+        versions.start_compaction(timedelta(minutes=5), interval=0.01)
+        try:
+            for _ in range(500):
+                if versions.horizon is not None:
+                    break
+                time.sleep(0.01)
+        finally:
+            versions.close()
+        assert versions.horizon == clock.now - timedelta(minutes=5)
+        assert versions._thread is None
@@ -0,0 +1,450 @@
+"""
+Версии сущностей хранилища курорта: мягкое удаление и запросы «на момент времени».
+
+VersionedStore подписывается на изменения ResortStorage и для каждой
+сущности ведёт цепочку версий: моменты начала действия и значения
+(None — сущность удалена). Версия действует до начала следующей, поэтому
+запрос на момент времени — это бинарный поиск в цепочке. Текущее
+состояние по-прежнему хранит и индексирует сам ResortStorage, так что
+обычные запросы не замедляются. Старые версии можно сжимать, в том числе
+в фоновом потоке.
+
+История сохраняется в отдельный файл рядом с файлом данных (versions_path)
+и перечитывается из него при сверке после загрузки хранилища, поэтому
+удалённые сущности можно восстановить и в следующих сеансах.
+"""
+
+import os
+import threading
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from exceptions import EntityNotFoundError, StorageError, ValidationError
+from classes import Booking, DaySchedule
+from storage import (
+    ResortStorage,
+    _booking_days,
+    _booking_from_dict,
+    _booking_to_dict,
+    _datetime_from_str,
+    _datetime_to_str,
+    _guest_from_dict,
+    _guest_to_dict,
+    _location_from_dict,
+    _location_to_dict,
+    _service_from_dict,
+    _service_to_dict,
+    _staff_from_dict,
+    _staff_to_dict,
+)
+
+# Сущность -> словарь хранилища с её текущими объектами
+ENTITY_COLLECTIONS = {
+    "guest": "_guests",
+    "staff_member": "_staff_members",
+    "service": "_services",
+    "location": "_locations",
+    "booking": "_bookings",
+}
+
+# Сущность -> преобразование в словарь и обратно (бронирования собираются отдельно)
+ENTITY_CODECS = {
+    "guest": (_guest_to_dict, _guest_from_dict),
+    "staff_member": (_staff_to_dict, _staff_from_dict),
+    "service": (_service_to_dict, _service_from_dict),
+    "location": (_location_to_dict, _location_from_dict),
+    "booking": (_booking_to_dict, None),
+}
+
+# Поле бронирования -> сущность, на которую оно ссылается
+BOOKING_REFERENCES = (
+    ("guest_id", "guest"),
+    ("service_id", "service"),
+    ("location_id", "location"),
+    ("staff_id", "staff_member"),
+)
+
+COMPACT_INTERVAL = 60.0  # секунд между фоновыми сжатиями истории
+VERSIONS_FORMAT = "resort_versions"
+VERSIONS_VERSION = 1
+VERSIONS_SUFFIX = ".versions"
+
+
+def versions_path(path: str) -> str:
+    """Путь файла истории версий для файла данных (общий для JSON и XML)."""
+    return os.path.splitext(path)[0] + VERSIONS_SUFFIX
+
+
+def _same_version(entity: str, old: Any, new: Any) -> bool:
+    """Совпадают ли две версии сущности по сохраняемому содержимому."""
+    to_dict = ENTITY_CODECS[entity][0]
+    return old is new or to_dict(old) == to_dict(new)
+
+
+class VersionChain:
+    """Версии одной сущности в порядке начала их действия."""
+
+    __slots__ = ("starts", "values")
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.values: List[Any] = []
+
+    def add(self, moment: datetime, value: Any) -> None:
+        # Часы могут пойти назад (перевод времени) — порядок версий важнее
+        if self.starts and moment < self.starts[-1]:
+            moment = self.starts[-1]
+        self.starts.append(moment)
+        self.values.append(value)
+
+    def at(self, moment: datetime) -> Any:
+        """Значение, действовавшее в указанный момент (None — не существовала или удалена)."""
+        index = bisect_right(self.starts, moment) - 1
+        return self.values[index] if index >= 0 else None
+
+    @property
+    def current(self) -> Any:
+        return self.values[-1] if self.values else None
+
+
+class VersionedStore:
+    """История версий всех сущностей хранилища.
+
+    При подключении текущие сущности хранилища становятся первыми
+    версиями; запросы на более ранние моменты их не видят. После полной
+    перезагрузки хранилища (загрузка из файла) история сверяется с новым
+    содержимым при следующем обращении: изменившиеся сущности получают
+    версию, начавшую действовать в момент загрузки. Если перед этим
+    прочитан файл истории (load), сверка начинается с прочитанных из него
+    цепочек версий.
+
+    Args:
+        storage: Хранилище, изменения которого отслеживаются
+        clock: Источник текущего времени для начала действия версий
+    """
+
+    def __init__(self, storage: ResortStorage, clock: Callable[[], datetime] = datetime.now):
+        self.storage: ResortStorage = storage
+        self.clock: Callable[[], datetime] = clock
+        # Раньше этого момента история сжата и запросы неточны
+        self.horizon: Optional[datetime] = None
+        self._chains: Dict[str, Dict[str, VersionChain]] = {entity: {} for entity in ENTITY_COLLECTIONS}
+        # День -> ID бронирований, какая-либо версия которых затрагивала этот день
+        self._booking_days: Dict[date, Set[str]] = {}
+        self._lock = threading.RLock()
+        self._stale = True
+        # Момент перезагрузки хранилища, с которого действуют сверяемые версии
+        self._reloaded_at: Optional[datetime] = None
+        # Прочитанный файл истории, который применяется при следующей сверке
+        self._pending: Optional[Dict[str, Any]] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        storage.add_listener(self._record)
+        self._sync()
+
+    def close(self) -> None:
+        """Отписаться от хранилища и остановить фоновое сжатие."""
+        self.stop_compaction()
+        self.storage.remove_listener(self._record)
+
+    # ========== Запись версий ==========
+
+    def _record(self, entity: Optional[str], entity_id: Optional[str], old: Any, new: Any) -> None:
+        with self._lock:
+            if entity is None:
+                # Хранилище очищено и, вероятно, будет заполнено напрямую
+                if not self._stale:
+                    self._stale = True
+                    self._reloaded_at = self.clock()
+                return
+            self._sync()
+            self._add_version(entity, entity_id, new, self.clock())
+
+    def _add_version(self, entity: str, entity_id: str, value: Any, moment: datetime) -> None:
+        chain = self._chains[entity].get(entity_id)
+        if chain is None:
+            chain = self._chains[entity][entity_id] = VersionChain()
+        chain.add(moment, value)
+        if entity == "booking" and value is not None:
+            for day in _booking_days(value):
+                self._booking_days.setdefault(day, set()).add(entity_id)
+
+    def _sync(self) -> None:
+        """Сверить текущие версии с содержимым хранилища после его перезагрузки."""
+        if not self._stale:
+            return
+        self._stale = False
+        moment = self._reloaded_at or self.clock()
+        self._reloaded_at = None
+        if self._pending is not None:
+            self._apply_saved(self._pending)
+            self._pending = None
+        for entity, collection in ENTITY_COLLECTIONS.items():
+            items: Dict[str, Any] = getattr(self.storage, collection)
+            chains = self._chains[entity]
+            for entity_id, chain in chains.items():
+                if chain.current is not None and entity_id not in items:
+                    chain.add(moment, None)
+            for entity_id, value in items.items():
+                chain = chains.get(entity_id)
+                if chain is not None and chain.current is not None and _same_version(entity, chain.current, value):
+                    # Та же версия, загруженная заново: дальше сравниваем с объектом хранилища
+                    chain.values[-1] = value
+                else:
+                    self._add_version(entity, entity_id, value, moment)
+
+    # ========== Файл истории ==========
+
+    def save(self, path: str) -> None:
+        """Сохранить цепочки версий в JSON-файл.
+
+        Raises:
+            StorageError: При ошибках записи файла
+        """
+        import json
+
+        with self._lock:
+            self._sync()
+            chains = {}
+            for entity, entity_chains in self._chains.items():
+                to_dict = ENTITY_CODECS[entity][0]
+                chains[entity] = {
+                    entity_id: [
+                        [_datetime_to_str(start), to_dict(value) if value is not None else None]
+                        for start, value in zip(chain.starts, chain.values)
+                    ]
+                    for entity_id, chain in entity_chains.items()
+                }
+            data = {
+                "format": VERSIONS_FORMAT,
+                "version": VERSIONS_VERSION,
+                "horizon": _datetime_to_str(self.horizon),
+                "chains": chains,
+            }
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(data, file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (IOError, OSError) as e:
+            raise StorageError(f"Ошибка сохранения истории версий '{path}': {e}") from e
+
+    def load(self, path: str) -> bool:
+        """Прочитать историю версий, сохранённую вместе с загруженным файлом данных.
+
+        Цепочки из файла заменяют текущие при следующей сверке с хранилищем.
+
+        Returns:
+            False, если файла истории нет (история остаётся прежней)
+
+        Raises:
+            StorageError: Если файл истории повреждён
+        """
+        import json
+
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return False
+        except (IOError, OSError) as e:
+            raise StorageError(f"Ошибка чтения истории версий '{path}': {e}") from e
+        except ValueError as e:
+            raise StorageError(f"Ошибка парсинга истории версий '{path}': {e}") from e
+        if not isinstance(data, dict) or data.get("format") != VERSIONS_FORMAT \
+                or not isinstance(data.get("chains"), dict):
+            raise StorageError(f"Файл '{path}' не является историей версий")
+        with self._lock:
+            self._pending = data
+            if not self._stale:
+                self._stale = True
+                self._reloaded_at = self.clock()
+        return True
+
+    def _apply_saved(self, data: Dict[str, Any]) -> None:
+        """Заменить цепочки версий прочитанными из файла истории.
+
+        Бронирования ссылаются на версии гостей, услуг, мест и сотрудников,
+        действовавшие в момент начала версии бронирования; версии, для
+        которых связанных сущностей в истории нет, пропускаются.
+        """
+        saved = data["chains"]
+        self._chains = {entity: {} for entity in ENTITY_COLLECTIONS}
+        self._booking_days = {}
+        self.horizon = _datetime_from_str(data.get("horizon"))
+        for entity in ENTITY_COLLECTIONS:
+            for entity_id, versions in (saved.get(entity) or {}).items():
+                for start, value in versions:
+                    moment = _datetime_from_str(start)
+                    if value is not None:
+                        value = self._decode_version(entity, value, moment)
+                        if value is None:
+                            continue
+                    self._add_version(entity, entity_id, value, moment)
+
+    def _decode_version(self, entity: str, data: Dict[str, Any], moment: datetime) -> Any:
+        from_dict = ENTITY_CODECS[entity][1]
+        if from_dict is not None:
+            return from_dict(data)
+        refs: Dict[str, Dict[str, Any]] = {}
+        for field, target in BOOKING_REFERENCES:
+            chain = self._chains[target].get(data.get(field) or "")
+            value = chain.at(moment) if chain else None
+            if value is None and chain:
+                # Связанная сущность удалена раньше бронирования: берём её последнюю версию
+                value = next((item for item in reversed(chain.values) if item is not None), None)
+            refs[target] = {data[field]: value} if value is not None else {}
+        try:
+            return _booking_from_dict(data, refs["guest"], refs["service"], refs["location"], refs["staff_member"])
+        except KeyError:
+            return None
+
+    # ========== Запросы ==========
+
+    def _check_moment(self, moment: datetime) -> None:
+        if self.horizon is not None and moment < self.horizon:
+            raise ValidationError(
+                f"История до {self.horizon:%Y-%m-%d %H:%M} сжата, запрос на {moment:%Y-%m-%d %H:%M} невозможен"
+            )
+
+    def get_as_of(self, entity: str, entity_id: str, moment: datetime) -> Any:
+        """Сущность в том виде, в каком она была в указанный момент.
+
+        Raises:
+            EntityNotFoundError: Если в тот момент сущности не было
+            ValidationError: Если момент раньше горизонта сжатия
+        """
+        with self._lock:
+            self._sync()
+            self._check_moment(moment)
+            chain = self._chains[entity].get(entity_id)
+            value = chain.at(moment) if chain else None
+        if value is None:
+            raise EntityNotFoundError(f"{entity} с ID='{entity_id}' не существовал(а) на {moment:%Y-%m-%d %H:%M}")
+        return value
+
+    def list_as_of(self, entity: str, moment: datetime) -> List[Any]:
+        """Все сущности типа entity, существовавшие в указанный момент."""
+        with self._lock:
+            self._sync()
+            self._check_moment(moment)
+            values = (chain.at(moment) for chain in self._chains[entity].values())
+            return [value for value in values if value is not None]
+
+    def day_schedule_as_of(self, day: date, moment: datetime) -> DaySchedule:
+        """Расписание дня в том виде, в каком оно было в указанный момент.
+
+        Проверяются только бронирования, когда-либо затрагивавшие этот день.
+        """
+        with self._lock:
+            self._sync()
+            self._check_moment(moment)
+            bookings: List[Booking] = []
+            chains = self._chains["booking"]
+            for booking_id in self._booking_days.get(day, ()):
+                chain = chains.get(booking_id)
+                booking = chain.at(moment) if chain else None
+                if booking is not None and day in _booking_days(booking):
+                    bookings.append(booking)
+        return DaySchedule(day, bookings)
+
+    def history(self, entity: str, entity_id: str) -> List[Tuple[datetime, Optional[datetime], Any]]:
+        """Версии сущности: (начало действия, конец действия или None, значение)."""
+        with self._lock:
+            self._sync()
+            chain = self._chains[entity].get(entity_id)
+            if chain is None:
+                return []
+            ends: List[Optional[datetime]] = chain.starts[1:] + [None]
+            return list(zip(chain.starts, ends, chain.values))
+
+    def deleted(self, entity: str) -> List[Tuple[str, Any]]:
+        """Удалённые сущности типа entity: (ID, последняя версия до удаления)."""
+        with self._lock:
+            self._sync()
+            result = []
+            for entity_id, chain in self._chains[entity].items():
+                if chain.current is None:
+                    previous = [value for value in chain.values if value is not None]
+                    if previous:
+                        result.append((entity_id, previous[-1]))
+            return result
+
+    def restore(self, entity: str, entity_id: str) -> Any:
+        """Восстановить удалённую сущность в последней версии до удаления.
+
+        Raises:
+            EntityNotFoundError: Если сущность не удалена или её версии сжаты
+            ValidationError: Если восстановление не проходит проверки хранилища
+        """
+        with self._lock:
+            self._sync()
+            chain = self._chains[entity].get(entity_id)
+            previous = [value for value in chain.values if value is not None] if chain else []
+            if chain is None or chain.current is not None or not previous:
+                raise EntityNotFoundError(f"Нет удалённой версии {entity} с ID='{entity_id}'")
+        getattr(self.storage, f"create_{entity}")(previous[-1])
+        return previous[-1]
+
+    # ========== Сжатие ==========
+
+    def compact(self, before: datetime) -> int:
+        """Удалить версии, закончившие действовать до момента before.
+
+        Версия, действовавшая в момент before, сохраняется, поэтому запросы
+        на before и позже остаются точными; удалённые до before сущности
+        забываются полностью.
+
+        Сжатие только укорачивает цепочки и не сверяет их с хранилищем:
+        его вызывает фоновый поток, а хранилище во время загрузки из файла
+        заполняется без блокировок. Сверка остаётся за потоком, который
+        обращается к истории.
+
+        Returns:
+            Число удалённых версий
+        """
+        removed = 0
+        with self._lock:
+            for chains in self._chains.values():
+                for entity_id in list(chains):
+                    chain = chains[entity_id]
+                    index = bisect_right(chain.starts, before) - 1
+                    if index > 0:
+                        del chain.starts[:index]
+                        del chain.values[:index]
+                        removed += index
+                    if len(chain.values) == 1 and chain.values[0] is None and chain.starts[0] <= before:
+                        del chains[entity_id]
+                        removed += 1
+            bookings = self._chains["booking"]
+            for day in list(self._booking_days):
+                ids = {booking_id for booking_id in self._booking_days[day] if booking_id in bookings}
+                if ids:
+                    self._booking_days[day] = ids
+                else:
+                    del self._booking_days[day]
+            if self.horizon is None or before > self.horizon:
+                self.horizon = before
+        return removed
+
+    def start_compaction(self, retention: timedelta, interval: float = COMPACT_INTERVAL) -> None:
+        """Запустить фоновое сжатие версий старше retention каждые interval секунд."""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+
+        def run() -> None:
+            while not self._stopped.wait(interval):
+                self.compact(self.clock() - retention)
+
+        self._thread = threading.Thread(target=run, name="versions-compaction", daemon=True)
+        self._thread.start()
+
+    def stop_compaction(self) -> None:
+        """Остановить фоновое сжатие."""
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
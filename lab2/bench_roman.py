@@ -0,0 +1,286 @@
+"""
+Замеры производительности поиска римских чисел на синтетическом корпусе.
+
+Запуск: python bench_roman.py <замер> [параметры], список замеров — python bench_roman.py -h.
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional
+
+WORDS = [
+    "глава", "том", "раздел", "часть", "книга", "год", "век", "статья", "пункт",
+    "и", "в", "на", "по", "см.", "также", "Людовик", "Пётр", "конференция", "text",
+    "volume", "chapter", "the", "of", "mix", "civil", "David", "2024", "—", "«Записки»",
+]
+NUMERALS = ["I", "II", "III", "IV", "V", "IX", "XII", "XIV", "XIX", "XL", "XC", "CD", "MCMXC", "MMXXIV", "iv", "xii"]
+BLOCK_SIZE = 1 << 20
+BLOCKS = 32
+
+# Как каждый способ сканирования запускается в отдельном процессе
+SCAN_METHODS = {
+    "read_file": "sum(1 for _ in _iter_roman(_read_file(path)))",
+    "stream": "sum(1 for _ in iter_roman_file(path))",
+    "mmap": "sum(1 for _ in iter_roman_mmap(path))",
+}
+
+
+def _make_block(rng: random.Random, size: int) -> bytes:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(NUMERALS) if rng.random() < 0.08 else rng.choice(WORDS)
+        separator = "\n" if rng.random() < 0.05 else rng.choice((" ", " ", " ", ", ", ". "))
+        words.append(word + separator)
+        length += len(word.encode("utf-8")) + len(separator)
+    return "".join(words).encode("utf-8")
+
+
+def make_corpus(path: str, size: int, seed: int = 1) -> None:
+    """Записать текстовый корпус UTF-8 размером около size байт.
+
+    Корпус собирается из нескольких случайных блоков по 1 МБ (русский и
+    английский текст с римскими числами), чтобы генерация гигабайта не
+    занимала больше времени, чем сами замеры.
+    """
+    rng = random.Random(seed)
+    blocks = [_make_block(rng, min(size, BLOCK_SIZE)) for _ in range(min(BLOCKS, max(1, size // BLOCK_SIZE)))]
+    written = 0
+    with open(path, "wb") as file:
+        while written < size:
+            block = rng.choice(blocks)
+            file.write(block)
+            written += len(block)
+
+
+def _run_scan(method: str, path: str) -> List[float]:
+    """Запустить способ сканирования в отдельном процессе: (найдено, секунды, пиковая память в МБ)."""
+    code = (
+        "import resource, time\n"
+        "from pathlib import Path\n"
+        "from roman_checker import _iter_roman, _read_file, iter_roman_file, iter_roman_mmap\n"
+        f"path = Path({path!r})\n"
+        "started = time.perf_counter()\n"
+        f"count = {SCAN_METHODS[method]}\n"
+        "elapsed = time.perf_counter() - started\n"
+        "print(count, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)\n"
+    )
+    here = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=here, check=True, capture_output=True, text=True
+    ).stdout
+    return [float(value) for value in output.split()]
+
+
+def bench_scan(args: argparse.Namespace) -> None:
+    """Сравнить чтение файла целиком, потоковое сканирование и mmap."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.corpus or os.path.join(tmp, "corpus.txt")
+        if not args.corpus:
+            make_corpus(path, (args.size_mb or 1024) * 1024 * 1024)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"Корпус: {size_mb:.0f} МБ")
+        for method in args.methods:
+            count, seconds, memory = _run_scan(method, path)
+            print(f"  {method:<10} чисел: {int(count):>10}  {seconds:8.2f} с  "
+                  f"{size_mb / seconds:8.1f} МБ/с  память: {memory:8.1f} МБ")
+
+
+def _best_time(function: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def bench_dfa(args: argparse.Namespace) -> None:
+    """Сравнить ДКА с регулярным выражением: поиск в тексте и проверку отдельных строк."""
+    from roman_checker import _iter_roman, is_valid_roman, is_valid_roman_dfa, iter_roman_dfa
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.txt")
+        make_corpus(path, (args.size_mb or 16) * 1024 * 1024)
+        with open(path, encoding="utf-8") as file:
+            text = file.read()
+    tokens = text.split()
+    size_mb = len(text.encode("utf-8")) / 1024 / 1024
+    results = [
+        ("поиск: _iter_roman", size_mb, "МБ", _best_time(lambda: sum(1 for _ in _iter_roman(text)), args.repeat)),
+        ("поиск: iter_roman_dfa", size_mb, "МБ", _best_time(lambda: sum(1 for _ in iter_roman_dfa(text)), args.repeat)),
+        ("проверка: is_valid_roman", len(tokens) / 1e6, "млн", _best_time(lambda: [is_valid_roman(token) for token in tokens], args.repeat)),
+        ("проверка: is_valid_roman_dfa", len(tokens) / 1e6, "млн", _best_time(lambda: [is_valid_roman_dfa(token) for token in tokens], args.repeat)),
+    ]
+    print(f"Текст: {size_mb:.0f} МБ, слов: {len(tokens)}, лучшее из {args.repeat}")
+    for name, amount, unit, seconds in results:
+        print(f"  {name:<30} {seconds:8.2f} с  {amount / seconds:8.2f} {unit}/с")
+
+
+@contextmanager
+def serve_pages(pages: int, delay: float, handshake: float = 0.0) -> Iterator[int]:
+    """Локальный HTTP-сервер со страницами /page/<n>.html; отдаёт номер порта.
+
+    Сервер слушает все адреса, поэтому страницы доступны с разных хостов
+    127.0.0.X — так проверяется и ограничение загрузок на один хост.
+    delay — искусственная задержка ответа, как у удалённого сайта;
+    handshake — задержка при открытии соединения (TCP и TLS до удалённого сайта).
+    """
+    rng = random.Random(1)
+    bodies = [
+        ("<html><head><script>var x = 'MMXX';</script><style>p {}</style></head><body><p>"
+         + _make_block(rng, 16 * 1024).decode("utf-8") + "</p></body></html>").encode("utf-8")
+        for _ in range(16)
+    ]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, как у настоящих сайтов
+        disable_nagle_algorithm = True  # заголовки и тело уходят отдельно — без задержки ACK
+
+        def setup(self) -> None:
+            time.sleep(handshake)
+            super().setup()
+
+        def do_GET(self) -> None:
+            time.sleep(delay)
+            name = self.path.rsplit("/", 1)[-1]
+            number = name[:-len(".html")] if name.endswith(".html") else ""
+            if not number.isdigit() or int(number) >= pages:
+                self.send_error(404)
+                return
+            body = bodies[int(number) % len(bodies)]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def bench_urls(args: argparse.Namespace) -> None:
+    """Сравнить последовательный _read_url с пакетной загрузкой scan_urls на локальном сервере."""
+    from roman_checker import _read_url, scan_urls
+
+    with serve_pages(args.pages, args.delay_ms / 1000) as port:
+        urls = [f"http://127.0.0.{1 + number % args.hosts}:{port}/page/{number}.html" for number in range(args.pages)]
+        sequential = urls[:args.sequential_pages]
+        started = time.perf_counter()
+        for url in sequential:
+            _read_url(url)
+        sequential_rate = len(sequential) / (time.perf_counter() - started)
+        started = time.perf_counter()
+        _, errors = scan_urls(urls, args.concurrency, args.per_host)
+        batch_rate = len(urls) / (time.perf_counter() - started)
+    print(f"Страниц: {args.pages} на {args.hosts} хостах, задержка ответа {args.delay_ms} мс, ошибок: {len(errors)}")
+    print(f"  последовательно (_read_url, {len(sequential)} стр.) {sequential_rate:8.1f} страниц/с")
+    print(f"  scan_urls ({args.concurrency} всего, {args.per_host} на хост)   {batch_rate:8.1f} страниц/с")
+
+
+def bench_session(args: argparse.Namespace) -> None:
+    """Сравнить новое соединение на каждый запрос с общей сессией _fetch_html."""
+    import requests
+    from roman_checker import FETCH_HEADERS, FETCH_TIMEOUT, _fetch_html
+
+    with serve_pages(args.pages, args.delay_ms / 1000, args.handshake_ms / 1000) as port:
+        urls = [f"http://127.0.0.1:{port}/page/{number}.html" for number in range(args.pages)]
+        results = [
+            ("requests.get на каждый запрос", _best_time(
+                lambda: [requests.get(url, headers=FETCH_HEADERS, timeout=FETCH_TIMEOUT).text for url in urls], args.repeat)),
+            ("_fetch_html (общая сессия)", _best_time(lambda: [_fetch_html(url) for url in urls], args.repeat)),
+        ]
+    print(f"Страниц: {args.pages} подряд с одного хоста, задержка ответа {args.delay_ms} мс, "
+          f"открытия соединения {args.handshake_ms} мс, лучшее из {args.repeat}")
+    for name, seconds in results:
+        print(f"  {name:<32} {seconds:8.2f} с  {args.pages / seconds:8.1f} страниц/с")
+
+
+def make_html_page(rng: random.Random, size: int) -> str:
+    """HTML-страница около size байт: абзацы, списки, ссылки, скрипты и стили."""
+    parts = ["<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Корпус</title>"
+             "<link rel=\"stylesheet\" href=\"a.css\"><style>p { margin: 0 }</style></head><body>"]
+    length = 0
+    while length < size:
+        words = _make_block(rng, 400).decode("utf-8").split()
+        roll = rng.random()
+        if roll < 0.6:
+            part = f"<p class=\"text\">{' '.join(words[:30])} <b>{words[30]}</b> {' '.join(words[31:60])}</p>"
+        elif roll < 0.8:
+            part = "<ul>" + "".join(f"<li><a href=\"/p/{index}\">{word}</a></li>" for index, word in enumerate(words[:10])) + "</ul>"
+        elif roll < 0.9:
+            part = f"<div><span>{' '.join(words[:20])}</span>&nbsp;&mdash; {' '.join(words[20:40])}</div>"
+        else:
+            part = f"<script>var data = {words[:10]!r}; if (a < b) {{ run('MMXX'); }}</script>"
+        parts.append(part)
+        length += len(part.encode("utf-8"))
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def bench_html(args: argparse.Namespace) -> None:
+    """Сравнить извлечение текста BeautifulSoup с потоковым разбором HTMLParser."""
+    from roman_checker import _extract_text_from_html, _extract_text_from_html_bs4, _iter_roman, iter_roman_html
+
+    html = make_html_page(random.Random(1), (args.size_mb or 4) * 1024 * 1024)
+    size_mb = len(html.encode("utf-8")) / 1024 / 1024
+    results = [
+        ("текст: BeautifulSoup", _best_time(lambda: _extract_text_from_html_bs4(html), args.repeat)),
+        ("текст: HTMLParser", _best_time(lambda: _extract_text_from_html(html), args.repeat)),
+        ("числа: BeautifulSoup + _iter_roman", _best_time(
+            lambda: sum(1 for _ in _iter_roman(_extract_text_from_html_bs4(html))), args.repeat)),
+        ("числа: iter_roman_html", _best_time(lambda: sum(1 for _ in iter_roman_html((html,))), args.repeat)),
+    ]
+    print(f"Страница: {size_mb:.1f} МБ, лучшее из {args.repeat}")
+    for name, seconds in results:
+        print(f"  {name:<36} {seconds:8.2f} с  {size_mb / seconds:8.2f} МБ/с")
+
+
+BENCHMARKS: Dict[str, Callable[[argparse.Namespace], None]] = {
+    "scan": bench_scan,
+    "dfa": bench_dfa,
+    "urls": bench_urls,
+    "session": bench_session,
+    "html": bench_html,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Замеры поиска римских чисел")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS), help="какой замер выполнить")
+    parser.add_argument("--size-mb", type=int, help="размер синтетического корпуса в МБ (scan: 1024, dfa: 16, html: 4)")
+    parser.add_argument("--repeat", type=int, default=3, help="число повторов для замеров в памяти")
+    parser.add_argument("--corpus", help="готовый файл корпуса вместо синтетического")
+    parser.add_argument("--methods", nargs="+", choices=list(SCAN_METHODS), default=list(SCAN_METHODS),
+                        help="способы сканирования для сравнения")
+    parser.add_argument("--pages", type=int, default=2000, help="urls, session: число страниц")
+    parser.add_argument("--hosts", type=int, default=8, help="urls: число хостов 127.0.0.X")
+    parser.add_argument("--delay-ms", type=int, default=50, help="urls, session: задержка ответа сервера")
+    parser.add_argument("--handshake-ms", type=int, default=20, help="session: задержка открытия соединения")
+    parser.add_argument("--sequential-pages", type=int, default=100, help="urls: страниц для последовательного замера")
+    parser.add_argument("--concurrency", type=int, default=32, help="urls: одновременных загрузок всего")
+    parser.add_argument("--per-host", type=int, default=4, help="urls: одновременных загрузок с хоста")
+    args = parser.parse_args(argv)
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,96 @@
+import argparse
+import asyncio
+import codecs
+import glob
 import ipaddress
+import mmap
+import os
 import re
+import sqlite3
 import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from html.parser import HTMLParser
 from pathlib import Path
-from typing import Iterable
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 ROMAN_PATTERN = re.compile(
-    r"\bM0,{3}(D?C{0,4})"
-    r"(C|L|L?X{0,4}|С?L?X{0,4})"
-    r"(X|V|V?I{0,4}|I{0,4})\b"
+    r"\bM{0,3}(CM|CD|D?C{0,3})"
+    r"(XC|XL|L?X{0,3})"
+    r"(IX|IV|V?I{0,3})\b"
+)
+# То же без учёта регистра, но только для латинских букв: re.IGNORECASE
+# сопоставил бы I ещё и с турецкими İ/ı, а .upper() всего текста — лишняя копия.
+# Опережающая проверка отсекает пустые совпадения почти на всех границах слов
+ROMAN_PATTERN_ANYCASE = re.compile(
+    r"\b(?=[MDCLXVImdclxvi])[Mm]{0,3}([Cc][MmDd]|[Dd]?[Cc]{0,3})"
+    r"([Xx][CcLl]|[Ll]?[Xx]{0,3})"
+    r"([Ii][XxVv]|[Vv]?[Ii]{0,3})\b"
+)
+# Байтовый вариант для mmap: границы слов проверяются только по ASCII,
+# соседние не-ASCII символы проверяются отдельно (см. _is_word_char_at)
+ROMAN_BYTES_PATTERN = re.compile(
+    rb"(?<![A-Za-z0-9_])(?=[MDCLXVImdclxvi])[Mm]{0,3}([Cc][MmDd]|[Dd]?[Cc]{0,3})"
+    rb"([Xx][CcLl]|[Ll]?[Xx]{0,3})"
+    rb"([Ii][XxVv]|[Vv]?[Ii]{0,3})(?![A-Za-z0-9_])"
 )
+WORD_CHAR_PATTERN = re.compile(r"\w")
+LAST_SEPARATOR_PATTERN = re.compile(r".*\W", re.DOTALL)
+MAX_ROMAN_LENGTH = len("MMMDCCCLXXXVIII")
+CHUNK_SIZE = 1 << 20
+SCAN_UNIT_SIZE = 64 << 20  # байт в одной единице работы при параллельном сканировании
+FETCH_TIMEOUT = 10  # секунд на загрузку страницы
+FETCH_CONCURRENCY = 32  # одновременных загрузок в пакетном режиме
+FETCH_PER_HOST = 4  # одновременных загрузок с одного хоста
+FETCH_POOL_HOSTS = 16  # хостов, соединения с которыми держит пул сессии
+FETCH_RETRIES = 2  # повторов при обрыве соединения и ответах 429/5xx
+FETCH_BACKOFF = 0.3  # секунд: пауза перед повтором растёт как 0.3, 0.6, ...
+URL_CACHE_PATH = Path.home() / ".cache" / "roman_checker" / "pages.sqlite3"
+URL_CACHE_MAX_BYTES = 64 << 20  # предельный объём текстов страниц в кэше
+MAX_AGE_PATTERN = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+FETCH_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": (
+        "text/html,application/xhtml+xml,application/xml;q=0.9,"
+        "image/webp,*/*;q=0.8"
+    ),
+    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+# Теги, содержимое которых не относится к тексту страницы
+SKIPPED_TAGS = frozenset({"script", "style", "meta", "link", "noscript"})
+# Текст этих тегов get_text() BeautifulSoup не выдаёт (кроме блоков CDATA)
+HIDDEN_TEXT_TAGS = frozenset({"template", "rt", "rp"})
+# Теги без содержимого и закрывающего тега (как их понимает BeautifulSoup)
+VOID_TAGS = frozenset({
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame", "hr", "image",
+    "img", "input", "isindex", "keygen", "link", "menuitem", "meta", "nextid", "param", "source",
+    "spacer", "track", "wbr",
+})
+ROMAN_DIGITS = [
+    ("M", 1000), ("CM", 900), ("D", 500), ("CD", 400),
+    ("C", 100), ("XC", 90), ("L", 50), ("XL", 40),
+    ("X", 10), ("IX", 9), ("V", 5), ("IV", 4), ("I", 1),
+]
+MAX_ROMAN = 3999
 HOSTNAME_PATTERN = re.compile(
     r"(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,}",
     re.IGNORECASE,
@@ -21,11 +100,269 @@ ALLOWED_SCHEMES = {"http", "https"}
 
 def is_valid_roman(value: str) -> bool:
     """Возвращает True, если строка — корректное римское число (без учёта регистра)."""
-    return bool(ROMAN_PATTERN.fullmatch(value.strip().upper()))
+    return is_valid_roman_dfa(value)
+
+
+def _to_roman(number: int) -> str:
+    parts = []
+    for digit, value in ROMAN_DIGITS:
+        count, number = divmod(number, value)
+        parts.append(digit * count)
+    return "".join(parts)
+
+
+def _build_roman_dfa() -> Tuple[List[Dict[str, int]], List[bool]]:
+    """Строит минимальный ДКА, допускающий ровно канонические числа 1–3999.
+
+    Сначала из всех чисел строится префиксное дерево, затем состояния с
+    одинаковым «продолжением» (допустимостью и переходами) склеиваются
+    снизу вверх. Переходы дублируются для строчных букв, чтобы разбор не
+    требовал .upper().
+    """
+    trie: List[Dict[str, int]] = [{}]
+    final = [False]
+    for number in range(1, MAX_ROMAN + 1):
+        state = 0
+        for letter in _to_roman(number):
+            if letter not in trie[state]:
+                trie.append({})
+                final.append(False)
+                trie[state][letter] = len(trie) - 1
+            state = trie[state][letter]
+        final[state] = True
+
+    canonical: Dict[Tuple, int] = {}
+    merged: Dict[int, int] = {}
+    transitions: List[Dict[str, int]] = []
+    accepting: List[bool] = []
+
+    def merge(state: int) -> int:
+        edges = tuple(sorted((letter, merge(child)) for letter, child in trie[state].items()))
+        key = (final[state], edges)
+        if key not in canonical:
+            canonical[key] = len(transitions)
+            transitions.append({})
+            accepting.append(final[state])
+            for letter, child in edges:
+                transitions[-1][letter] = child
+                transitions[-1][letter.lower()] = child
+        merged[state] = canonical[key]
+        return merged[state]
+
+    start = merge(0)
+    # Начальное состояние переносим в 0, чтобы разбор начинался с него
+    order = [start] + [state for state in range(len(transitions)) if state != start]
+    position = {state: index for index, state in enumerate(order)}
+    table = [{letter: position[target] for letter, target in transitions[state].items()} for state in order]
+    return table, [accepting[state] for state in order]
+
+
+ROMAN_DFA, ROMAN_DFA_ACCEPTING = _build_roman_dfa()
+# Таблицы перевода: число -> запись (индекс 0 не используется) и запись -> число
+ROMAN_NUMERALS: List[str] = [""] + [_to_roman(number) for number in range(1, MAX_ROMAN + 1)]
+ROMAN_VALUES: Dict[str, int] = {numeral: number for number, numeral in enumerate(ROMAN_NUMERALS) if numeral}
+
+
+def roman_to_int(value: str) -> int:
+    """Переводит римское число (без учёта регистра) в целое 1–3999 поиском в таблице."""
+    number = ROMAN_VALUES.get(value.strip().upper()) if value.isascii() else None
+    if number is None:
+        raise ValueError(f"Некорректное римское число: {value!r}")
+    return number
+
+
+def int_to_roman(number: int) -> str:
+    """Переводит целое 1–3999 в каноническое римское число."""
+    if not 1 <= number <= MAX_ROMAN:
+        raise ValueError(f"Римскими цифрами записываются числа от 1 до {MAX_ROMAN}")
+    return ROMAN_NUMERALS[number]
+
+
+def is_valid_roman_dfa(value: str) -> bool:
+    """То же, что is_valid_roman, но через ДКА (только латинские буквы)."""
+    transitions = ROMAN_DFA
+    state = 0
+    for char in value.strip():
+        state = transitions[state].get(char, -1)
+        if state < 0:
+            return False
+    return state > 0 and ROMAN_DFA_ACCEPTING[state]
+
+
+def iter_roman_dfa(text: str) -> Iterator[str]:
+    """То же, что _iter_roman, но за один проход ДКА без повторной проверки совпадений.
+
+    Число должно быть отдельным словом (как с \\b в ROMAN_PATTERN): слово,
+    в котором ДКА не нашёл перехода, пропускается до конца.
+    """
+    transitions = ROMAN_DFA
+    accepting = ROMAN_DFA_ACCEPTING
+    start_edges = transitions[0]
+    state = 0  # 0 — вне слова, -1 — слово не число, иначе состояние ДКА
+    start = 0
+    for index, char in enumerate(text):
+        if state > 0:
+            following = transitions[state].get(char)
+            if following is not None:
+                state = following
+                continue
+            if char.isalnum() or char == "_":
+                state = -1
+                continue
+            if accepting[state]:
+                yield text[start:index].upper()
+            state = 0
+        elif state < 0:
+            if not (char.isalnum() or char == "_"):
+                state = 0
+        else:
+            following = start_edges.get(char)
+            if following is not None:
+                state = following
+                start = index
+            elif char.isalnum() or char == "_":
+                state = -1
+    if state > 0 and accepting[state]:
+        yield text[start:].upper()
+
+
+def validate_many(values: Iterable[str]) -> Any:
+    """Проверяет много строк сразу: каждое уникальное значение проверяется один раз.
+
+    Возвращает массив bool того же порядка и длины, что и вход: numpy.ndarray,
+    если установлен NumPy (для массива NumPy — той же формы), иначе список.
+    """
+    shape = None
+    if np is not None and isinstance(values, np.ndarray):
+        # np.unique сортирует строки и на практике медленнее словаря
+        shape = values.shape
+        values = values.ravel().tolist()
+    elif not isinstance(values, (list, tuple)):
+        values = list(values)
+    verdicts = {value: is_valid_roman(value) for value in dict.fromkeys(values)}
+    results = map(verdicts.__getitem__, values)
+    if np is None:
+        return list(results)
+    array = np.fromiter(results, dtype=bool, count=len(values))
+    return array.reshape(shape) if shape is not None else array
+
+
+class _HtmlTextParser(HTMLParser):
+    """Собирает текстовые фрагменты HTML, пропуская содержимое SKIPPED_TAGS.
+
+    Дерево документа не строится: хранится только стек открытых тегов,
+    чтобы закрывающие теги обрабатывались так же, как в BeautifulSoup
+    (закрывается ближайший открытый тег с тем же именем вместе со всеми
+    вложенными, лишние закрывающие теги игнорируются). Фрагмент — текст
+    между двумя соседними тегами, комментариями или объявлениями.
+
+    Ссылки на символы декодирует html.unescape, как браузер. Ссылки не
+    вида «&известное_имя;» BeautifulSoup разбирает иначе, в любом месте
+    документа: например, «a&b;x» здесь остаётся «a&b;x», а у него
+    превращается в «a&bx».
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pieces: List[str] = []
+        self._open: List[str] = []
+        self._open_counts: Dict[str, int] = {}  # тег -> сколько раз он есть в стеке
+        self._skipped = 0  # открытых тегов из SKIPPED_TAGS
+        self._hidden = 0  # открытых тегов из HIDDEN_TEXT_TAGS
+        # Пустой тег -> сколько раз он встретился без лишнего закрывающего тега
+        self._closed_void: Dict[str, int] = {}
+        self._data: List[str] = []
+
+    def flush(self) -> None:
+        if self._data:
+            text = "".join(self._data).strip()
+            self._data.clear()
+            if text:
+                self.pieces.append(text)
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        self.flush()
+        if tag in VOID_TAGS:
+            self._closed_void[tag] = self._closed_void.get(tag, 0) + 1
+            return
+        self._open.append(tag)
+        self._open_counts[tag] = self._open_counts.get(tag, 0) + 1
+        if tag in SKIPPED_TAGS:
+            self._skipped += 1
+        elif tag in HIDDEN_TEXT_TAGS:
+            self._hidden += 1
+
+    def handle_startendtag(self, tag: str, attrs: Any) -> None:
+        # <tag/> открывается и сразу закрывается
+        self.flush()
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._closed_void.get(tag):
+            # </br> после <br>: BeautifulSoup его пропускает, не разрывая текст
+            self._closed_void[tag] -= 1
+            return
+        self.flush()
+        if not self._open_counts.get(tag):
+            return
+        while True:
+            closed = self._open.pop()
+            self._open_counts[closed] -= 1
+            if closed in SKIPPED_TAGS:
+                self._skipped -= 1
+            elif closed in HIDDEN_TEXT_TAGS:
+                self._hidden -= 1
+            if closed == tag:
+                return
+
+    def handle_data(self, data: str) -> None:
+        if not self._skipped and not self._hidden:
+            self._data.append(data)
+
+    def unknown_decl(self, data: str) -> None:
+        self.flush()
+        if data.upper().startswith("CDATA[") and not self._skipped:
+            self._data.append(data[len("CDATA["):])
+            self.flush()
+
+    def handle_comment(self, data: str) -> None:
+        self.flush()
+
+    def handle_decl(self, decl: str) -> None:
+        self.flush()
+
+    def handle_pi(self, data: str) -> None:
+        self.flush()
+
+
+def iter_html_text(chunks: Iterable[str]) -> Iterator[str]:
+    """Текстовые фрагменты HTML (без пробелов по краям) по мере разбора.
+
+    HTML подаётся частями, фрагменты выдаются сразу после разбора каждой
+    части. Текст script, style, meta, link и noscript пропускается.
+    """
+    parser = _HtmlTextParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from parser.pieces
+        parser.pieces.clear()
+    parser.close()
+    parser.flush()
+    yield from parser.pieces
+
+
+def iter_roman_html(chunks: Iterable[str]) -> Iterator[str]:
+    """Римские числа в тексте HTML без сборки текста страницы целиком."""
+    for piece in iter_html_text(chunks):
+        yield from _iter_roman(piece)
 
 
 def _extract_text_from_html(html: str) -> str:
     """Удаляет теги без текста и возвращает очищенный текст."""
+    return " ".join(iter_html_text((html,)))
+
+
+def _extract_text_from_html_bs4(html: str) -> str:
+    """Прежнее извлечение текста через дерево BeautifulSoup — эталон для тестов и замеров."""
     soup = BeautifulSoup(html, "html.parser")
     for script in soup(["script", "style", "meta", "link", "noscript"]):
         script.decompose()
@@ -33,14 +370,114 @@ def _extract_text_from_html(html: str) -> str:
 
 
 def _iter_roman(text: str) -> Iterable[str]:
-    """Генерирует римские числа в верхнем регистре, отбрасывая невалидные совпадения."""
+    """Генерирует римские числа в верхнем регистре за один проход без повторной проверки."""
     if not text:
         return
-    upper_text = text.upper()
-    for match in ROMAN_PATTERN.finditer(upper_text):
+    for match in ROMAN_PATTERN_ANYCASE.finditer(text):
         value = match.group(0)
-        if value and is_valid_roman(value):
-            yield value
+        if value:
+            yield value.upper()
+
+
+def iter_roman_stream(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, int]]:
+    """Генерирует пары (римское число в верхнем регистре, байтовое смещение) из потока UTF-8.
+
+    Поток читается кусками по chunk_size байт, поэтому память не зависит от
+    размера файла. Незаконченное слово в конце куска переносится в следующий,
+    так что числа на границе кусков находятся так же, как в целом тексте.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    # text[start:] ещё не просмотрен; text[start - 1] — контекст для \b
+    text = ""
+    start = 0
+    offset = 0  # байтовое смещение text[0] в потоке
+    while True:
+        data = stream.read(chunk_size)
+        try:
+            text += decoder.decode(data, final=not data)
+        except UnicodeDecodeError as exc:
+            raise ValueError("Файл должен быть в кодировке UTF-8.") from exc
+        if data:
+            # Слово в конце куска может продолжиться в следующем куске
+            last_separator = LAST_SEPARATOR_PATTERN.match(text, start)
+            end = last_separator.end() if last_separator else start
+        else:
+            end = len(text)
+        ascii_text = text.isascii()
+        position = 0
+        byte_position = offset
+        for match in ROMAN_PATTERN_ANYCASE.finditer(text, start, end):
+            if match.start() == match.end():
+                continue
+            if ascii_text:
+                byte_position = offset + match.start()
+            else:
+                byte_position += len(text[position:match.start()].encode("utf-8"))
+                position = match.start()
+            yield match.group(0).upper(), byte_position
+        if not data:
+            return
+        if len(text) - end > MAX_ROMAN_LENGTH:
+            # Слово длиннее любого римского числа числом не будет, как и его
+            # продолжение: достаточно последнего символа как контекста для \b
+            end = len(text)
+        cut = max(end - 1, 0)
+        offset += cut if ascii_text else len(text[:cut].encode("utf-8"))
+        text = text[cut:]
+        start = end - cut
+
+
+def iter_roman_file(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, int]]:
+    """Генерирует (римское число, байтовое смещение) из файла UTF-8 без чтения его целиком."""
+    with path.open("rb") as stream:
+        yield from iter_roman_stream(stream, chunk_size)
+
+
+def _is_word_char_at(data: bytes, start: int, end: int) -> bool:
+    """Проверяет, является ли символ UTF-8 в data[start:end] буквой/цифрой в смысле \\w."""
+    char = data[start:end].decode("utf-8", errors="replace")
+    return bool(WORD_CHAR_PATTERN.match(char))
+
+
+def iter_roman_mmap(path: Path) -> Iterator[Tuple[str, int]]:
+    """Генерирует (римское число, байтовое смещение) из файла через mmap без декодирования.
+
+    Байтовый шаблон работает прямо по отображённому в память файлу: нет
+    ни декодирования, ни копии в верхнем регистре. Результат совпадает с
+    iter_roman_file, но корректность UTF-8 проверяется только у символов,
+    соседних с найденными числами.
+    """
+    with path.open("rb") as file:
+        if path.stat().st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from _iter_roman_mapped(data, 0, len(data))
+
+
+def _iter_roman_mapped(data: Any, start: int, end: int) -> Iterator[Tuple[str, int]]:
+    """Числа, начинающиеся в байтах data[start:end]; соседние байты учитываются для границ слов."""
+    size = len(data)
+    # Число короче MAX_ROMAN_LENGTH байт, так что начавшееся до end заканчивается до endpos
+    for match in ROMAN_BYTES_PATTERN.finditer(data, start, min(end + MAX_ROMAN_LENGTH + 1, size)):
+        match_start, match_end = match.span()
+        if match_start >= end:
+            return
+        if match_start == match_end:
+            continue
+        # Кириллица и другие не-ASCII буквы — тоже часть слова
+        if match_start and data[match_start - 1] >= 0x80:
+            char_start = match_start - 1
+            while char_start > max(match_start - 4, 0) and 0x80 <= data[char_start] < 0xC0:
+                char_start -= 1
+            if _is_word_char_at(data, char_start, match_start):
+                continue
+        if match_end < size and data[match_end] >= 0x80:
+            char_end = match_end + 1
+            while char_end < min(match_end + 4, size) and 0x80 <= data[char_end] < 0xC0:
+                char_end += 1
+            if _is_word_char_at(data, match_end, char_end):
+                continue
+        yield match.group(0).upper().decode("ascii"), match_start
 
 
 def _is_valid_hostname(hostname: str) -> bool:
@@ -84,41 +521,323 @@ def _normalize_url(url: str) -> str:
     return parsed.geturl()
 
 
-def _read_url(url: str) -> str:
-    """Загружает страницу, валидирует ошибки и возвращает очищенный текст."""
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Общая HTTP-сессия всех загрузок страниц.
+
+    Сессия держит пул keep-alive соединений (до FETCH_CONCURRENCY на хост),
+    поэтому повторные запросы к тому же сайту не открывают заново TCP/TLS.
+    Обрывы соединения и ответы 429/5xx повторяются с нарастающей паузой.
+    Создаётся один раз и используется из пула потоков scan_urls.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=FETCH_RETRIES,
+                backoff_factor=FETCH_BACKOFF,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET", "HEAD"),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=FETCH_POOL_HOSTS, pool_maxsize=FETCH_CONCURRENCY, max_retries=retry)
+            session = requests.Session()
+            session.headers.update(FETCH_HEADERS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    """Сохранённый текст страницы и данные для её перепроверки."""
+
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires: Optional[float]  # до этого момента (time.time()) страница свежа без запроса
+
+    def is_fresh(self) -> bool:
+        return self.expires is not None and time.time() < self.expires
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class UrlCache:
+    """Кэш извлечённого текста страниц в файле SQLite.
+
+    Ключ — нормализованный URL (_normalize_url). Вместе с текстом хранятся
+    ETag и Last-Modified ответа, по ним страница перепроверяется условным
+    запросом, и срок свежести из Cache-Control: max-age. Когда объём
+    текстов превышает max_bytes, вытесняются давно не использованные
+    страницы. Объект можно использовать из нескольких потоков.
+
+    Args:
+        path: Файл базы (каталог создаётся при необходимости)
+        max_bytes: Предельный объём текстов в байтах UTF-8
+    """
+
+    def __init__(self, path: Path = URL_CACHE_PATH, max_bytes: int = URL_CACHE_MAX_BYTES):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, text TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+            "expires REAL, size INTEGER NOT NULL, used INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_used ON pages (used)")
+        self._db.commit()
+        # Счётчик обращений вместо времени: порядок вытеснения не зависит от точности часов
+        self._clock = self._db.execute("SELECT COALESCE(MAX(used), 0) FROM pages").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "UrlCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Сохранённая страница (отмечается как использованная) или None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text, etag, last_modified, expires FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE pages SET used = ? WHERE url = ?", (self._tick(), url))
+            self._db.commit()
+        return CachedPage(*row)
+
+    def put(self, url: str, page: CachedPage) -> None:
+        """Сохранить страницу и вытеснить старые, если кэш переполнен."""
+        size = len(page.text.encode("utf-8"))
+        with self._lock:
+            if size > self.max_bytes:
+                self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+            else:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, page.text, page.etag, page.last_modified, page.expires, size, self._tick()),
+                )
+                self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._db.execute("SELECT url, size FROM pages ORDER BY used").fetchall():
+            self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                return
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+
+def _open_url_cache(path: Path = URL_CACHE_PATH) -> Optional[UrlCache]:
+    """Открыть кэш страниц; без кэша (None), если файл недоступен или повреждён."""
+    try:
+        return UrlCache(path)
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def _cache_entry(text: str, response: requests.Response) -> Optional[CachedPage]:
+    """Запись кэша по ответу сервера; None, если ответ нельзя или бесполезно хранить."""
+    cache_control = response.headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control:
+        return None
+    max_age = MAX_AGE_PATTERN.search(cache_control)
+    expires = None
+    if max_age and "no-cache" not in cache_control:
+        expires = time.time() + int(max_age.group(1))
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if expires is None and not etag and not last_modified:
+        # Перепроверить такую страницу нечем — каждый раз пришлось бы загружать её заново
+        return None
+    return CachedPage(text, etag, last_modified, expires)
+
+
+def _fetch_revalidated(
+    url: str, cache: Optional[UrlCache]
+) -> Tuple[str, Optional[str], Optional[requests.Response]]:
+    """Текст страницы из кэша, если он ещё верен, иначе ответ сервера.
+
+    Свежая запись кэша возвращается без запроса, остальные перепроверяются
+    условным запросом: ответ 304 продлевает запись.
+
+    Returns:
+        (нормализованный URL, текст из кэша или None, ответ сервера или None)
+    """
     normalized = _normalize_url(url)
     if not normalized:
         raise ValueError("Некорректный URL")
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        ),
-        "Accept": (
-            "text/html,application/xhtml+xml,application/xml;q=0.9,"
-            "image/webp,*/*;q=0.8"
-        ),
-        "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-        "Accept-Encoding": "gzip, deflate",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-    }
+    cached = cache.get(normalized) if cache is not None else None
+    if cached is not None and cached.is_fresh():
+        return normalized, cached.text, None
+    headers = cached.conditional_headers() if cached is not None else {}
+    response = _request_page(normalized, headers)
+    if cached is not None and response.status_code == 304:
+        # Ответ 304 может обновить валидаторы и срок свежести
+        entry = _cache_entry(cached.text, response)
+        cache.put(normalized, CachedPage(
+            cached.text,
+            response.headers.get("ETag") or cached.etag,
+            response.headers.get("Last-Modified") or cached.last_modified,
+            entry.expires if entry is not None else None,
+        ))
+        return normalized, cached.text, None
+    return normalized, None, response
+
+
+def _store_page(cache: Optional[UrlCache], normalized: str, text: str, response: requests.Response) -> None:
+    if cache is None:
+        return
+    entry = _cache_entry(text, response)
+    if entry is not None:
+        cache.put(normalized, entry)
+
+
+def _read_url(url: str, cache: Optional[UrlCache] = None) -> str:
+    """Загружает страницу, валидирует ошибки и возвращает очищенный текст.
+
+    С кэшем повторное чтение страницы стоит условного запроса (ответ 304)
+    или не требует запроса вовсе, пока не истёк max-age.
+    """
+    normalized, text, response = _fetch_revalidated(url, cache)
+    if text is None:
+        text = _extract_text_from_html(_decode_html(response))
+        _store_page(cache, normalized, text, response)
+    return text
+
+
+def _fetch_html(url: str) -> str:
+    """Загружает страницу и возвращает её HTML; ошибки HTTP переводятся в понятные сообщения."""
+    normalized = _normalize_url(url)
+    if not normalized:
+        raise ValueError("Некорректный URL")
+    return _decode_html(_request_page(normalized))
+
+
+def _request_page(normalized: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+    """Запрос через общую сессию; ошибки HTTP (кроме 304) переводятся в понятные сообщения."""
+    response = _get_session().get(normalized, headers=headers, timeout=FETCH_TIMEOUT, allow_redirects=True)
     try:
-        response = requests.get(normalized, headers=headers, timeout=10, allow_redirects=True)
         response.raise_for_status()
     except requests.HTTPError as exc:
-        status_code = getattr(exc.response, "status_code", None)
+        status_code = getattr(exc.response, "status_code", None) or response.status_code
         if status_code == 401:
             raise requests.RequestException("Сайт требует авторизацию. Доступ запрещён.") from exc
         if status_code == 403:
             raise requests.RequestException("Доступ к сайту запрещён. Сайт блокирует запросы.") from exc
         if status_code == 404:
             raise requests.RequestException("Страница не найдена.") from exc
-        raise requests.HTTPError(f"HTTP ошибка: {status_code or 'неизвестно'}", response=exc.response) from exc
+        raise requests.HTTPError(f"HTTP ошибка: {status_code or 'неизвестно'}", response=response) from exc
+    return response
+
+
+def _decode_html(response: requests.Response) -> str:
     response.encoding = response.apparent_encoding or "utf-8"
-    html_content = response.text
-    return _extract_text_from_html(html_content)
+    return response.text
+
+
+def _count_page(html: str, keep_text: bool = False) -> Tuple[Dict[str, int], str]:
+    """Извлекает текст страницы и считает в нём числа (выполняется в пуле процессов).
+
+    Текст возвращается, только если keep_text — он нужен для кэша.
+    """
+    if not keep_text:
+        return _count_matches(iter_roman_html((html,))), ""
+    text = _extract_text_from_html(html)
+    return _count_matches(_iter_roman(text)), text
+
+
+def _count_text(text: str) -> Dict[str, int]:
+    return _count_matches(_iter_roman(text))
+
+
+async def _scan_urls_async(
+    urls: List[str],
+    concurrency: int,
+    per_host: int,
+    processes: ProcessPoolExecutor,
+    cache: Optional[UrlCache],
+) -> List[Tuple[str, Dict[str, int], str]]:
+    loop = asyncio.get_running_loop()
+    total_limit = asyncio.Semaphore(concurrency)
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as threads:
+        async def scan(url: str) -> Tuple[str, Dict[str, int], str]:
+            host = (urlparse(_normalize_url(url)).hostname or "").lower()
+            host_limit = host_limits.setdefault(host, asyncio.Semaphore(per_host))
+            try:
+                # Сначала ждём свой хост, чтобы не занимать общий слот впустую
+                async with host_limit, total_limit:
+                    normalized, text, response = await loop.run_in_executor(threads, _fetch_revalidated, url, cache)
+                    if response is not None:
+                        html = await loop.run_in_executor(threads, _decode_html, response)
+                if text is not None:
+                    return url, await loop.run_in_executor(processes, _count_text, text), ""
+                counts, text = await loop.run_in_executor(processes, _count_page, html, cache is not None)
+                if cache is not None:
+                    await loop.run_in_executor(threads, _store_page, cache, normalized, text, response)
+                return url, counts, ""
+            except (ValueError, requests.RequestException, OSError) as exc:
+                return url, {}, _format_error_message(exc, url)
+
+        return await asyncio.gather(*(scan(url) for url in urls))
+
+
+def scan_urls(
+    urls: Iterable[str],
+    concurrency: int = FETCH_CONCURRENCY,
+    per_host: int = FETCH_PER_HOST,
+    workers: Optional[int] = None,
+    cache: Optional[UrlCache] = None,
+) -> Tuple[Dict[str, Dict[str, int]], Dict[str, str]]:
+    """Загружает страницы одновременно и ищет в них числа.
+
+    Загрузки идут через asyncio: не больше concurrency всего и per_host на
+    один хост, с тем же таймаутом, что и у _read_url. Сами запросы
+    выполняет requests в пуле потоков (асинхронного HTTP-клиента в
+    зависимостях нет), разбор HTML — пул процессов. С кэшем страницы
+    перепроверяются так же, как в _read_url.
+
+    Returns:
+        (URL -> счётчики чисел, URL -> сообщение об ошибке)
+    """
+    unique = list(dict.fromkeys(urls))
+    with ProcessPoolExecutor(max_workers=workers) as processes:
+        results = asyncio.run(_scan_urls_async(unique, concurrency, per_host, processes, cache))
+    per_url = {url: counts for url, counts, _ in results}
+    errors = {url: error for url, _, error in results if error}
+    return per_url, errors
 
 
 def _read_file(path: Path) -> str:
@@ -139,15 +858,36 @@ def _ask_mode() -> str:
 
 def _handle_single_input() -> None:
     value = input("Введите римское число: ").strip()
-    print("Корректно" if is_valid_roman(value) else "Некорректно")
+    print(f"Корректно: {roman_to_int(value)}" if is_valid_roman(value) else "Некорректно")
 
 
 def _handle_text_source(source: str) -> None:
-    matches = list(dict.fromkeys(_iter_roman(source)))
-    if matches:
-        print(", ".join(matches))
-    else:
+    _print_matches(_count_matches(_iter_roman(source)))
+
+
+def _count_matches(values: Iterable[str]) -> Dict[str, int]:
+    """Считает вхождения чисел, сохраняя порядок первого появления."""
+    counts: Dict[str, int] = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    return counts
+
+
+def _print_matches(counts: Dict[str, int]) -> None:
+    """Печатает уникальные найденные числа с их значениями и общую статистику."""
+    if not counts:
         print("Римских чисел не найдено")
+        return
+    numbers = {value: ROMAN_VALUES[value] for value in counts}
+    print(", ".join(f"{value} = {number}" for value, number in numbers.items()))
+    smallest = min(numbers, key=numbers.get)
+    largest = max(numbers, key=numbers.get)
+    frequent = max(counts, key=counts.get)
+    print(
+        f"Всего: {sum(counts.values())}, уникальных: {len(counts)}, "
+        f"наименьшее: {smallest} = {numbers[smallest]}, наибольшее: {largest} = {numbers[largest]}, "
+        f"чаще всего: {frequent} ×{counts[frequent]}"
+    )
 
 
 def _format_error_message(exc: Exception, user_url: str) -> str:
@@ -170,26 +910,195 @@ def _format_error_message(exc: Exception, user_url: str) -> str:
 
 def _handle_url_input() -> None:
     url = input("Введите URL: ").strip()
+    cache = _open_url_cache()
     try:
-        text = _read_url(url)
+        text = _read_url(url, cache)
     except (ValueError, requests.RequestException, OSError) as exc:
         message = _format_error_message(exc, url)
         print(f"Не удалось загрузить данные: {message}")
         return
+    finally:
+        if cache is not None:
+            cache.close()
     _handle_text_source(text)
 
 
 def _handle_file_input() -> None:
     path = Path(input("Введите путь к файлу: ").strip())
     try:
-        text = _read_file(path)
+        # Файл сканируется потоком, без загрузки в память целиком
+        counts = _count_matches(value for value, _ in iter_roman_file(path))
     except (OSError, ValueError) as exc:
         print(f"Не удалось открыть файл: {exc}")
         return
-    _handle_text_source(text)
+    _print_matches(counts)
+
+
+def _expand_paths(inputs: Iterable[str], pattern: str) -> List[Path]:
+    """Файлы из списка путей: каталоги обходятся рекурсивно, маски раскрываются через glob."""
+    files: Dict[Path, None] = {}
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            candidates = sorted(path.rglob(pattern))
+        elif path.exists():
+            candidates = [path]
+        else:
+            candidates = sorted(Path(name) for name in glob.glob(item, recursive=True))
+        for candidate in candidates:
+            if candidate.is_file():
+                files.setdefault(candidate, None)
+    return list(files)
+
+
+def _scan_unit(unit: Tuple[str, int, int]) -> Tuple[str, Dict[str, int], str]:
+    """Сканирует байты [start, end) файла в процессе пула: (путь, счётчики чисел, ошибка)."""
+    path, start, end = unit
+    counts: Dict[str, int] = {}
+    try:
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for value, _ in _iter_roman_mapped(data, start, end):
+                counts[value] = counts.get(value, 0) + 1
+    except (OSError, ValueError) as exc:
+        return path, counts, str(exc)
+    return path, counts, ""
+
+
+def scan_paths(
+    paths: List[Path],
+    workers: Optional[int] = None,
+    unit_size: int = SCAN_UNIT_SIZE,
+) -> Tuple[Dict[str, Dict[str, int]], Dict[str, str]]:
+    """Сканирует файлы параллельно в пуле процессов.
+
+    Большие файлы делятся на диапазоны по unit_size байт, каждый диапазон —
+    отдельная единица работы; результаты диапазонов одного файла складываются.
+
+    Returns:
+        (путь -> счётчики чисел, путь -> текст ошибки для нечитаемых файлов)
+    """
+    per_file: Dict[str, Dict[str, int]] = {}
+    errors: Dict[str, str] = {}
+    units = []
+    for path in paths:
+        name = str(path)
+        per_file[name] = {}
+        try:
+            size = path.stat().st_size
+        except OSError as exc:
+            errors[name] = str(exc)
+            continue
+        units.extend((name, start, min(start + unit_size, size)) for start in range(0, size, unit_size))
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Мелкие файлы отправляются пачками, чтобы не тратить время на пересылку
+        batch = max(1, len(units) // (workers * 8))
+        for name, counts, error in executor.map(_scan_unit, units, chunksize=batch):
+            if error:
+                errors[name] = error
+            merged = per_file[name]
+            for value, count in counts.items():
+                merged[value] = merged.get(value, 0) + count
+    return per_file, errors
+
+
+def _print_merged(per_source: Dict[str, Dict[str, int]], errors: Dict[str, str], verbose: bool) -> None:
+    """Печатает ошибки (и при verbose — итоги) по источникам, затем общую статистику."""
+    total: Dict[str, int] = {}
+    for name, counts in per_source.items():
+        if name in errors:
+            print(f"{name}: ошибка: {errors[name]}")
+            continue
+        if verbose:
+            print(f"{name}: {sum(counts.values())} чисел, уникальных {len(counts)}")
+        for value, count in counts.items():
+            total[value] = total.get(value, 0) + count
+    _print_matches(total)
+
+
+def _handle_urls_command(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="roman_checker.py urls",
+        description="Поиск римских чисел на множестве веб-страниц одновременно",
+    )
+    parser.add_argument("source", help="файл со списком URL (по одному в строке) или '-' для stdin")
+    parser.add_argument("--concurrency", type=int, default=FETCH_CONCURRENCY, help="одновременных загрузок всего")
+    parser.add_argument("--per-host", type=int, default=FETCH_PER_HOST, help="одновременных загрузок с одного хоста")
+    parser.add_argument("--workers", type=int, help="процессов для разбора HTML (по умолчанию — число ядер)")
+    parser.add_argument("--per-url", action="store_true", help="печатать результат по каждой странице")
+    parser.add_argument("--cache", nargs="?", const=str(URL_CACHE_PATH), metavar="FILE",
+                        help=f"кэшировать страницы между запусками (по умолчанию в {URL_CACHE_PATH})")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.source == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            lines = Path(args.source).read_text(encoding="utf-8").splitlines()
+    except (OSError, UnicodeDecodeError) as exc:
+        print(f"Не удалось прочитать список URL: {exc}")
+        return 1
+    urls = [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+    if not urls:
+        print("Список URL пуст")
+        return 1
+    cache = _open_url_cache(Path(args.cache)) if args.cache else None
+    if args.cache and cache is None:
+        print(f"Кэш {args.cache} недоступен, страницы загружаются без него")
+    started = time.perf_counter()
+    try:
+        per_url, errors = scan_urls(urls, max(1, args.concurrency), max(1, args.per_host), args.workers, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    _print_merged(per_url, errors, args.per_url)
+    print(
+        f"Страниц: {len(per_url)} (с ошибками: {len(errors)}) за {elapsed:.2f} с: "
+        f"{len(per_url) / elapsed:.1f} страниц/с"
+    )
+    return 1 if errors else 0
+
+
+def _handle_scan_command(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="roman_checker.py scan",
+        description="Поиск римских чисел во множестве файлов параллельно",
+    )
+    parser.add_argument("paths", nargs="+", help="файлы, каталоги или маски (например, 'docs/**/*.txt')")
+    parser.add_argument("--pattern", default="*", help="маска файлов внутри каталогов")
+    parser.add_argument("--workers", type=int, help="число процессов (по умолчанию — число ядер)")
+    parser.add_argument("--unit-mb", type=int, default=SCAN_UNIT_SIZE >> 20, help="размер единицы работы в МБ")
+    parser.add_argument("--per-file", action="store_true", help="печатать результат по каждому файлу")
+    args = parser.parse_args(argv)
+
+    paths = _expand_paths(args.paths, args.pattern)
+    if not paths:
+        print("Файлы не найдены")
+        return 1
+    started = time.perf_counter()
+    per_file, errors = scan_paths(paths, args.workers, max(1, args.unit_mb) << 20)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+
+    _print_merged(per_file, errors, args.per_file)
+    size_mb = sum(path.stat().st_size for path in paths if str(path) not in errors) / 1024 / 1024
+    print(
+        f"Файлов: {len(paths)}, {size_mb:.1f} МБ за {elapsed:.2f} с: "
+        f"{len(paths) / elapsed:.1f} файлов/с, {size_mb / elapsed:.1f} МБ/с"
+    )
+    return 1 if errors else 0
+
+
+COMMANDS = {
+    "scan": _handle_scan_command,
+    "urls": _handle_urls_command,
+}
 
 
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        sys.exit(COMMANDS[argv[0]](argv[1:]))
     choice = _ask_mode()
     if choice == "1":
         _handle_single_input()
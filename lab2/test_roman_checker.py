@@ -1,11 +1,40 @@
+import io
+import itertools
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
 import pytest
 import requests
 from unittest.mock import Mock, patch, MagicMock
 from roman_checker import (
+    ROMAN_PATTERN,
     is_valid_roman,
+    is_valid_roman_dfa,
+    int_to_roman,
+    iter_roman_dfa,
+    main,
+    roman_to_int,
+    scan_paths,
+    scan_urls,
+    validate_many,
+    iter_html_text,
+    iter_roman_file,
+    iter_roman_html,
+    iter_roman_mmap,
+    iter_roman_stream,
+    CachedPage,
+    UrlCache,
     _extract_text_from_html,
+    _extract_text_from_html_bs4,
+    _get_session,
+    _handle_file_input,
+    _handle_text_source,
     _iter_roman,
     _normalize_url,
+    _open_url_cache,
     _read_url
 )
 
@@ -176,6 +205,106 @@ class TestExtractTextFromHtml:
         assert "Простой текст" in result
 
 
+HTML_TAGS = [
+    "p", "div", "span", "b", "li", "ul", "td", "tr", "table", "head", "body", "html", "title", "pre",
+    "textarea", "script", "style", "noscript", "meta", "link", "br", "img", "template", "rt", "rp", "svg",
+]
+HTML_TEXTS = [
+    "Глава IV", " том XII ", "\n", "  ", "MMXX", "x", "&amp;", "&lt;b&gt;", "&#x41;", "&nbsp;",
+    "IX&nbsp;XI", "<", "> ", "&#150;", "a&b", "&#0;", "&#xD800;", "&AMP;",
+]
+
+
+def random_html(rng):
+    """Случайный, в том числе некорректный HTML: незакрытые и лишние теги, комментарии, CDATA."""
+    parts = []
+    for _ in range(rng.randrange(1, 60)):
+        roll = rng.random()
+        tag = rng.choice(HTML_TAGS)
+        if roll < 0.25:
+            parts.append(f"<{tag}>" if rng.random() < 0.8 else f"<{tag.upper()} class='a>b'>")
+        elif roll < 0.45:
+            parts.append(f"</{tag}>")
+        elif roll < 0.5:
+            parts.append(f"<{tag}/>")
+        elif roll < 0.53:
+            parts.append("<!-- IV -->")
+        elif roll < 0.55:
+            parts.append("<![CDATA[ XIV ]]>")
+        elif roll < 0.57:
+            parts.append(rng.choice(["<!DOCTYPE html>", "<?pi x?>"]))
+        else:
+            parts.append(rng.choice(HTML_TEXTS))
+    # Ссылки, которые html.unescape и BeautifulSoup разбирают по-разному (неизвестные имена
+    # с «;», известные имена без «;» перед буквами, ссылка в самом конце документа),
+    # генератор не порождает: см. test_known_entity_difference
+    return "".join(parts) + "</html>"
+
+
+class TestIterHtmlText:
+    """Потоковое извлечение текста совпадает с прежним через BeautifulSoup"""
+
+    @pytest.mark.parametrize("seed", range(0, 3000, 300))
+    def test_same_as_beautifulsoup(self, seed):
+        """Случайные документы: тот же текст, что у get_text(separator=" ", strip=True)"""
+        rng = random.Random(seed)
+        for _ in range(300):
+            html = random_html(rng)
+            assert _extract_text_from_html(html) == _extract_text_from_html_bs4(html), html
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 17])
+    def test_chunked_input(self, chunk_size):
+        """Разбиение HTML на части не меняет результат"""
+        rng = random.Random(chunk_size)
+        for _ in range(200):
+            html = random_html(rng)
+            chunks = (html[start:start + chunk_size] for start in range(0, len(html), chunk_size))
+            assert " ".join(iter_html_text(chunks)) == _extract_text_from_html_bs4(html), html
+
+    def test_example_site(self):
+        """Страница-пример из репозитория"""
+        html = (Path(__file__).parent / "example_site.html").read_text(encoding="utf-8")
+        assert _extract_text_from_html(html) == _extract_text_from_html_bs4(html)
+
+    @pytest.mark.parametrize("html, expected", [
+        ("<p>I<template>II</template>III</p>", "I III"),
+        ("<ruby>IV<rt>V</rt><rp>(</rp></ruby>", "IV"),
+        ("<template><![CDATA[ XIV ]]></template>", "XIV"),
+        ("<script><![CDATA[ XIV ]]></script>", ""),
+        ("<div><noscript><p>IX</div>X", "X"),
+        ("I</noscript>I", "I I"),
+        ("<br>I</br>I", "II"),
+        ("<br>I</br>V<br/>X", "IV X"),
+        ("<!-- IV -->I<!---->V", "I V"),
+    ])
+    def test_fragments(self, html, expected):
+        """Скрытые теги, блоки CDATA, лишние закрывающие теги и комментарии"""
+        assert _extract_text_from_html_bs4(html) == expected
+        assert _extract_text_from_html(html) == expected
+        assert list(iter_roman_html((html,))) == list(_iter_roman(expected))
+
+    def test_iter_roman_html(self):
+        """Числа находятся в каждом фрагменте, без сборки текста целиком"""
+        html = "<p>Глава IV</p><script>var x = 'MMXX';</script><p>том xii<b>VII</b>второй</p>"
+        assert list(iter_roman_html(iter(html))) == ["IV", "XII", "VII"]
+
+    @pytest.mark.parametrize("html, expected, bs4_text", [
+        # Неизвестное имя с «;» — в любом месте документа
+        ("a&foo;b", "a&foo;b", "a&foob"),
+        ("a&b;x", "a&b;x", "a&bx"),
+        ("<p>a&b;</p>x", "a&b; x", "a&b x"),
+        # Известное имя без «;» перед буквами
+        ("IX &ampXI", "IX &XI", "IX &ampXI"),
+        # Ссылка в самом конце документа
+        ("IX &amp", "IX &", "IX &amp"),
+        ("a&b", "a&b", "ab"),
+    ])
+    def test_known_entity_difference(self, html, expected, bs4_text):
+        """Ссылки вне строгого вида «&известное_имя;» разбираются как в браузере (html.unescape), а не как в BeautifulSoup"""
+        assert _extract_text_from_html(html) == expected
+        assert _extract_text_from_html_bs4(html) == bs4_text
+
+
 class TestIterRoman:
     """Тесты для функции _iter_roman()"""
 
@@ -258,6 +387,518 @@ class TestIterRoman:
         assert result == []  # должны быть отфильтрованы is_valid_roman
 
 
+class TestRomanDfa:
+    """Тесты ДКА is_valid_roman_dfa() и iter_roman_dfa()"""
+
+    def test_same_as_pattern_for_all_short_strings(self):
+        """На всех строках из римских букв длиной до 5 ДКА совпадает с ROMAN_PATTERN"""
+        for length in range(6):
+            for letters in itertools.product("MDCLXVI", repeat=length):
+                value = "".join(letters)
+                expected = bool(value) and bool(ROMAN_PATTERN.fullmatch(value))
+                assert is_valid_roman_dfa(value) is expected, value
+
+    def test_longest_numerals(self):
+        """Самые длинные корректные и некорректные числа"""
+        assert is_valid_roman_dfa("MMMDCCCLXXXVIII") is True
+        assert is_valid_roman_dfa("mmmcmxcix") is True
+        assert is_valid_roman_dfa("MMMM") is False
+        assert is_valid_roman_dfa(" XIV ") is True
+        assert is_valid_roman_dfa("X IV") is False
+
+    @pytest.mark.parametrize("text", [
+        "Главы I, II, III содержат важную информацию",
+        "IIII VV XXXX MMMM IIX",
+        "VIIвторой «IX» éIV IVé _XI XI_ x1 iv.",
+        "MMMCMXCIX это 3999",
+        "",
+    ])
+    def test_iter_same_as_regex(self, text):
+        """Поиск ДКА совпадает с _iter_roman"""
+        assert list(iter_roman_dfa(text)) == list(_iter_roman(text))
+
+
+class TestRomanConversion:
+    """Тесты roman_to_int() и int_to_roman()"""
+
+    def test_known_values(self):
+        """Известные значения"""
+        assert roman_to_int("XIV") == 14
+        assert roman_to_int("mcmxc") == 1990
+        assert roman_to_int(" MMMCMXCIX ") == 3999
+        assert int_to_roman(4) == "IV"
+        assert int_to_roman(2024) == "MMXXIV"
+
+    def test_round_trip(self):
+        """Перевод в обе стороны для всех чисел 1–3999"""
+        for number in range(1, 4000):
+            numeral = int_to_roman(number)
+            assert is_valid_roman(numeral)
+            assert roman_to_int(numeral) == number
+
+    @pytest.mark.parametrize("value", ["", "IIII", "MMMM", "ABC", "X IV", "ıv"])
+    def test_invalid_numeral(self, value):
+        """Некорректная запись"""
+        with pytest.raises(ValueError):
+            roman_to_int(value)
+
+    @pytest.mark.parametrize("number", [0, -1, 4000])
+    def test_out_of_range(self, number):
+        """Число вне диапазона 1–3999"""
+        with pytest.raises(ValueError):
+            int_to_roman(number)
+
+    def test_handle_text_source_prints_values_and_stats(self, capsys):
+        """Вывод найденных чисел со значениями и статистикой"""
+        _handle_text_source("Главы IV, II, IV и XL")
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0] == "IV = 4, II = 2, XL = 40"
+        assert lines[1] == (
+            "Всего: 4, уникальных: 3, наименьшее: II = 2, наибольшее: XL = 40, чаще всего: IV ×2"
+        )
+
+
+class TestValidateMany:
+    """Тесты пакетной проверки validate_many()"""
+
+    VALUES = ["IV", "iv", "IIII", "", "XIV", "IV", "текст", " MMM "]
+
+    def test_aligned_with_input(self):
+        """Результат совпадает с поэлементной проверкой и порядком входа"""
+        result = validate_many(self.VALUES)
+        assert [bool(item) for item in result] == [is_valid_roman(value) for value in self.VALUES]
+
+    def test_generator_input(self):
+        """Вход может быть генератором"""
+        result = validate_many(value for value in self.VALUES)
+        assert len(result) == len(self.VALUES)
+
+    def test_unique_values_checked_once(self, monkeypatch):
+        """Повторяющиеся значения проверяются один раз"""
+        calls = []
+        monkeypatch.setattr("roman_checker.is_valid_roman", lambda value: calls.append(value) or True)
+        validate_many(["IV", "IV", "X", "IV"])
+        assert sorted(calls) == ["IV", "X"]
+
+    def test_list_without_numpy(self, monkeypatch):
+        """Без NumPy возвращается список"""
+        monkeypatch.setattr("roman_checker.np", None)
+        assert validate_many(["IV", "IIII"]) == [True, False]
+
+    def test_numpy_array(self):
+        """Массив NumPy на входе и на выходе"""
+        np = pytest.importorskip("numpy")
+        result = validate_many(np.array([["IV", "IIII"], ["X", "abc"]]))
+        assert result.dtype == bool
+        assert result.tolist() == [[True, False], [True, False]]
+
+
+class TestIterRomanStream:
+    """Тесты потокового поиска iter_roman_stream()"""
+
+    @staticmethod
+    def _scan(text: str, chunk_size: int):
+        return list(iter_roman_stream(io.BytesIO(text.encode("utf-8")), chunk_size))
+
+    def test_values_and_byte_offsets(self):
+        """Числа возвращаются с байтовыми смещениями в UTF-8"""
+        text = "Глава IV, том xii."
+        result = self._scan(text, 1024)
+        assert result == [
+            ("IV", len("Глава ".encode("utf-8"))),
+            ("XII", len("Глава IV, том ".encode("utf-8"))),
+        ]
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 7, 64])
+    def test_matches_on_chunk_boundaries(self, chunk_size):
+        """Результат не зависит от размера куска"""
+        text = "MMMCMXCIX — это 3999; глава XLIV, «IX» и ii.\nТом CDXC"
+        expected = self._scan(text, 1 << 20)
+        assert [value for value, _ in expected] == list(_iter_roman(text))
+        assert self._scan(text, chunk_size) == expected
+
+    def test_word_split_between_chunks(self):
+        """Часть слова в конце куска не считается отдельным числом"""
+        assert self._scan("XIVa XIV", 2) == [("XIV", 5)]
+        assert self._scan("aXIV XIV", 3) == [("XIV", 5)]
+
+    def test_cyrillic_letters_are_word_characters(self):
+        """Число, слитое с кириллицей, не находится"""
+        assert self._scan("VIIвторой IIпервый", 3) == []
+
+    def test_long_word_does_not_grow_buffer(self):
+        """Длинное слово без разделителей не даёт ложных совпадений"""
+        text = "x" * 5000 + "IV " + "MCM"
+        assert self._scan(text, 16) == [("MCM", 5003)]
+
+    def test_invalid_not_included(self):
+        """Некорректные числа не находятся"""
+        assert self._scan("IIII VV XXXX MMMM", 3) == []
+
+    def test_invalid_utf8(self):
+        """Файл не в UTF-8 даёт ValueError"""
+        with pytest.raises(ValueError, match="UTF-8"):
+            list(iter_roman_stream(io.BytesIO("Глава IV".encode("cp1251")), 4))
+
+    def test_iter_roman_file(self, tmp_path):
+        """Чтение из файла"""
+        path = tmp_path / "text.txt"
+        path.write_text("Часть I\nЧасть II\n", encoding="utf-8")
+        assert list(iter_roman_file(path, chunk_size=5)) == [
+            ("I", len("Часть ".encode("utf-8"))),
+            ("II", len("Часть I\nЧасть ".encode("utf-8"))),
+        ]
+
+    def test_handle_file_input(self, tmp_path, monkeypatch, capsys):
+        """Режим 3 печатает уникальные числа из файла"""
+        path = tmp_path / "text.txt"
+        path.write_text("II, I, II и XIV", encoding="utf-8")
+        monkeypatch.setattr("builtins.input", lambda _: str(path))
+        _handle_file_input()
+        assert capsys.readouterr().out.splitlines()[0] == "II = 2, I = 1, XIV = 14"
+
+
+class TestIterRomanMmap:
+    """Тесты сканирования через mmap iter_roman_mmap()"""
+
+    @pytest.mark.parametrize("text", [
+        "Глава IV, том xii.",
+        "VIIвторой IIпервый «IX» éIV IVé _XI XI_ ①IV",
+        "MMMCMXCIX — это 3999\nIIII VV XXXX",
+        "x" * 100 + " MCM",
+    ])
+    def test_same_as_stream(self, tmp_path, text):
+        """Результат совпадает с потоковым сканированием"""
+        path = tmp_path / "text.txt"
+        path.write_text(text, encoding="utf-8")
+        assert list(iter_roman_mmap(path)) == list(iter_roman_file(path))
+
+    def test_non_ascii_neighbours(self, tmp_path):
+        """Число, слитое с не-ASCII буквой, не находится, а с кавычками — находится"""
+        path = tmp_path / "text.txt"
+        path.write_text("IVв «XII»", encoding="utf-8")
+        assert list(iter_roman_mmap(path)) == [("XII", len("IVв «".encode("utf-8")))]
+
+    def test_empty_file(self, tmp_path):
+        """Пустой файл"""
+        path = tmp_path / "empty.txt"
+        path.write_bytes(b"")
+        assert list(iter_roman_mmap(path)) == []
+
+
+class TestScanPaths:
+    """Тесты параллельного сканирования файлов scan_paths() и команды scan"""
+
+    TEXTS = [
+        "Глава IV, том xii. VIIвторой «IX»",
+        "MMMCMXCIX — " * 50 + "IIII XIV",
+        "",
+    ]
+
+    @pytest.fixture
+    def corpus(self, tmp_path):
+        for index, text in enumerate(self.TEXTS):
+            (tmp_path / f"{index}.txt").write_text(text, encoding="utf-8")
+        (tmp_path / "skip.log").write_text("XL", encoding="utf-8")
+        return tmp_path
+
+    @pytest.mark.parametrize("unit_size", [1, 5, 1 << 20])
+    def test_same_as_single_file_scan(self, corpus, unit_size):
+        """Результат не зависит от разбиения файлов на единицы работы"""
+        paths = sorted(corpus.glob("*.txt"))
+        per_file, errors = scan_paths(paths, workers=2, unit_size=unit_size)
+        assert errors == {}
+        for path in paths:
+            expected = {}
+            for value, _ in iter_roman_file(path):
+                expected[value] = expected.get(value, 0) + 1
+            assert per_file[str(path)] == expected
+
+    def test_scan_command(self, corpus, capsys):
+        """Команда scan обходит каталог по маске и печатает общую статистику"""
+        with pytest.raises(SystemExit) as exit_info:
+            main(["scan", str(corpus), "--pattern", "*.txt", "--workers", "2", "--per-file"])
+        assert exit_info.value.code == 0
+        output = capsys.readouterr().out
+        assert "XL" not in output
+        assert "MMMCMXCIX = 3999" in output
+        assert "Файлов: 3" in output
+
+    def test_scan_command_no_files(self, tmp_path, capsys):
+        """Нет подходящих файлов"""
+        with pytest.raises(SystemExit) as exit_info:
+            main(["scan", str(tmp_path / "*.txt")])
+        assert exit_info.value.code == 1
+        assert "Файлы не найдены" in capsys.readouterr().out
+
+
+class PagesHandler(BaseHTTPRequestHandler):
+    """Страницы /<номер>.html для тестов пакетной загрузки; считает одновременные запросы к хосту."""
+
+    PAGES = {
+        "/1.html": "<html><head><script>var v = 'MMXX';</script></head><body><p>Глава IV, том XII</p></body></html>",
+        "/2.html": "<html><body><p>Людовик XIV и XII</p><style>p {}</style></body></html>",
+        "/3.html": "<html><body>Без чисел</body></html>",
+        "/flaky.html": "<html><body><p>Том XII</p></body></html>",
+    }
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    lock = threading.Lock()
+    active = {}
+    peak = {}
+    connections = 0
+    failures = 0
+    version = 1
+    hits = {}
+    not_modified = 0
+
+    def setup(self):
+        super().setup()
+        with self.lock:
+            PagesHandler.connections += 1
+
+    def do_GET(self):
+        host = self.headers["Host"].split(":")[0]
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+        try:
+            time.sleep(0.05)
+            if self.path == "/flaky.html" and PagesHandler.failures:
+                PagesHandler.failures -= 1
+                self.send_error(503)
+                return
+            path = self.path.split("?")[0]
+            with self.lock:
+                self.hits[path] = self.hits.get(path, 0) + 1
+            if path in ("/etag.html", "/fresh.html"):
+                self.send_versioned(path)
+                return
+            page = self.PAGES.get(path)
+            if page is None:
+                self.send_error(404)
+                return
+            body = page.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with self.lock:
+                self.active[host] -= 1
+
+    def send_versioned(self, path):
+        """Страница с номером версии: /etag.html перепроверяется по ETag, /fresh.html свежа час."""
+        etag = f'"v{PagesHandler.version}"'
+        if path == "/etag.html" and self.headers.get("If-None-Match") == etag:
+            PagesHandler.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = f"<html><body><p>Версия {'I' * PagesHandler.version}</p></body></html>".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if path == "/etag.html":
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+        else:
+            self.send_header("Cache-Control", "public, max-age=3600")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def pages_server():
+    """Локальный сервер, доступный как 127.0.0.1 и 127.0.0.2; отдаёт номер порта."""
+    PagesHandler.active = {}
+    PagesHandler.peak = {}
+    PagesHandler.connections = 0
+    PagesHandler.failures = 0
+    PagesHandler.version = 1
+    PagesHandler.hits = {}
+    PagesHandler.not_modified = 0
+    server = ThreadingHTTPServer(("", 0), PagesHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+class TestScanUrls:
+    """Тесты пакетной загрузки страниц scan_urls() и команды urls"""
+
+    def test_counts_and_errors(self, pages_server):
+        """Счётчики совпадают с последовательным _read_url, ошибки собираются по URL"""
+        urls = [f"http://127.0.0.1:{pages_server}/{name}" for name in ("1.html", "2.html", "3.html", "missing.html")]
+        per_url, errors = scan_urls(urls, concurrency=4, per_host=2, workers=1)
+        assert set(per_url) == set(urls)
+        assert list(errors) == [urls[3]]
+        assert "Страница не найдена" in errors[urls[3]]
+        for url in urls[:3]:
+            expected = {}
+            for value in _iter_roman(_read_url(url)):
+                expected[value] = expected.get(value, 0) + 1
+            assert per_url[url] == expected
+        assert per_url[urls[0]] == {"IV": 1, "XII": 1}
+        assert per_url[urls[2]] == {}
+
+    def test_invalid_url(self):
+        """Некорректный URL попадает в ошибки, не прерывая остальные"""
+        per_url, errors = scan_urls(["not-a-url"], workers=1)
+        assert per_url == {"not-a-url": {}}
+        assert "not-a-url" in errors
+
+    def test_per_host_limit(self, pages_server):
+        """С одного хоста загружается не больше per_host страниц одновременно"""
+        urls = [
+            f"http://127.0.0.{host}:{pages_server}/{page}.html?copy={copy}"
+            for host in (1, 2) for page in (1, 2, 3) for copy in range(4)
+        ]
+        per_url, errors = scan_urls(urls, concurrency=8, per_host=2, workers=1)
+        assert errors == {}
+        assert len(per_url) == len(urls)
+        assert PagesHandler.peak == {"127.0.0.1": 2, "127.0.0.2": 2}
+
+    def test_urls_command(self, pages_server, tmp_path, capsys):
+        """Команда urls читает список из файла, пропуская пустые строки и комментарии"""
+        source = tmp_path / "urls.txt"
+        source.write_text(
+            f"# страницы\nhttp://127.0.0.1:{pages_server}/1.html\n\nhttp://127.0.0.1:{pages_server}/2.html\n",
+            encoding="utf-8",
+        )
+        with pytest.raises(SystemExit) as exit_info:
+            main(["urls", str(source), "--workers", "1"])
+        assert exit_info.value.code == 0
+        output = capsys.readouterr().out
+        assert "XII = 12" in output
+        assert "MMXX" not in output
+        assert "Страниц: 2 (с ошибками: 0)" in output
+
+    def test_urls_command_reports_errors(self, pages_server, tmp_path, capsys):
+        """Ошибочные страницы печатаются, код возврата — 1"""
+        source = tmp_path / "urls.txt"
+        source.write_text(f"http://127.0.0.1:{pages_server}/missing.html\n", encoding="utf-8")
+        with pytest.raises(SystemExit) as exit_info:
+            main(["urls", str(source), "--workers", "1"])
+        assert exit_info.value.code == 1
+        assert "Страница не найдена" in capsys.readouterr().out
+
+
+class TestSession:
+    """Тесты общей HTTP-сессии загрузок"""
+
+    def test_session_is_shared(self):
+        """Все загрузки идут через одну сессию с пулом соединений и повторами"""
+        session = _get_session()
+        assert _get_session() is session
+        adapter = session.get_adapter("https://example.com")
+        assert adapter.max_retries.total == 2
+        assert 503 in adapter.max_retries.status_forcelist
+
+    def test_connection_reused(self, pages_server):
+        """Повторные запросы к тому же сайту идут по одному keep-alive соединению"""
+        for _ in range(5):
+            assert "XII" in _read_url(f"http://127.0.0.1:{pages_server}/1.html")
+        assert PagesHandler.connections == 1
+
+    def test_retry_on_server_error(self, pages_server):
+        """Ответ 503 повторяется, и страница загружается со второй попытки"""
+        PagesHandler.failures = 1
+        assert "XII" in _read_url(f"http://127.0.0.1:{pages_server}/flaky.html")
+        assert PagesHandler.failures == 0
+
+    def test_retries_exhausted(self, pages_server):
+        """Если сервер отвечает ошибкой на все попытки, выдаётся HTTP-ошибка"""
+        PagesHandler.failures = 10
+        with pytest.raises(requests.HTTPError, match="503"):
+            _read_url(f"http://127.0.0.1:{pages_server}/flaky.html")
+
+
+class TestUrlCache:
+    """Тесты кэша страниц UrlCache и перепроверки по ETag/Last-Modified"""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        with UrlCache(tmp_path / "pages.sqlite3") as cache:
+            yield cache
+
+    def test_revalidated_with_etag(self, pages_server, cache):
+        """Повторное чтение — условный запрос с ответом 304 и текст из кэша"""
+        url = f"http://127.0.0.1:{pages_server}/etag.html"
+        first = _read_url(url, cache)
+        assert _read_url(url, cache) == first == "Версия I"
+        assert PagesHandler.hits["/etag.html"] == 2
+        assert PagesHandler.not_modified == 1
+
+    def test_changed_page_reloaded(self, pages_server, cache):
+        """Изменившаяся страница загружается заново и заменяет запись"""
+        url = f"http://127.0.0.1:{pages_server}/etag.html"
+        _read_url(url, cache)
+        PagesHandler.version = 2
+        assert _read_url(url, cache) == "Версия II"
+        assert cache.get(url).etag == '"v2"'
+        assert PagesHandler.not_modified == 0
+
+    def test_fresh_page_not_requested(self, pages_server, cache):
+        """Пока не истёк max-age, страница берётся из кэша без запроса"""
+        url = f"http://127.0.0.1:{pages_server}/fresh.html"
+        _read_url(url, cache)
+        PagesHandler.version = 2
+        assert _read_url(f"  {url} ", cache) == "Версия I"
+        assert PagesHandler.hits["/fresh.html"] == 1
+
+    def test_page_without_validators_not_stored(self, pages_server, cache):
+        """Страницу без ETag, Last-Modified и max-age хранить бесполезно"""
+        _read_url(f"http://127.0.0.1:{pages_server}/1.html", cache)
+        assert len(cache) == 0
+
+    def test_persists_between_runs(self, pages_server, tmp_path):
+        """Кэш сохраняется в файле между запусками"""
+        url = f"http://127.0.0.1:{pages_server}/etag.html"
+        with UrlCache(tmp_path / "pages.sqlite3") as cache:
+            _read_url(url, cache)
+        with UrlCache(tmp_path / "pages.sqlite3") as cache:
+            assert _read_url(url, cache) == "Версия I"
+        assert PagesHandler.not_modified == 1
+
+    def test_lru_eviction(self, tmp_path):
+        """При переполнении вытесняются давно не использованные страницы"""
+        with UrlCache(tmp_path / "pages.sqlite3", max_bytes=30) as cache:
+            for name in ("a", "b", "c"):
+                cache.put(name, CachedPage(name * 10, '"e"', None, None))
+            assert cache.get("a") is not None
+            cache.put("d", CachedPage("d" * 10, '"e"', None, None))
+            assert cache.get("b") is None
+            assert {name for name in "acd" if cache.get(name) is not None} == set("acd")
+            cache.put("big", CachedPage("x" * 31, '"e"', None, None))
+            assert cache.get("big") is None
+            assert len(cache) == 3
+
+    def test_scan_urls_uses_cache(self, pages_server, cache):
+        """Пакетная загрузка тоже сохраняет и перепроверяет страницы"""
+        urls = [f"http://127.0.0.1:{pages_server}/etag.html", f"http://127.0.0.1:{pages_server}/fresh.html"]
+        first, errors = scan_urls(urls, workers=1, cache=cache)
+        second, _ = scan_urls(urls, workers=1, cache=cache)
+        assert errors == {}
+        assert first == second == {url: {"I": 1} for url in urls}
+        assert PagesHandler.hits == {"/etag.html": 2, "/fresh.html": 1}
+        assert PagesHandler.not_modified == 1
+
+    def test_broken_cache_file(self, tmp_path):
+        """Повреждённый файл кэша — работа без кэша"""
+        path = tmp_path / "pages.sqlite3"
+        path.write_bytes(b"not a database" * 100)
+        assert _open_url_cache(path) is None
+
+
 class TestValidateUrl:
     """Тесты проверки валидности URL через _normalize_url()"""
 
@@ -343,7 +984,7 @@ class TestNormalizeUrl:
 class TestReadUrl:
     """Тесты для функции _read_url()"""
 
-    @patch('roman_checker.requests.get')
+    @patch('roman_checker.requests.Session.get')
     def test_successful_request(self, mock_get):
         """Тест успешного запроса"""
         mock_response = Mock()
@@ -359,14 +1000,14 @@ class TestReadUrl:
         assert "II" in result
         mock_get.assert_called_once()
 
-    @patch('roman_checker.requests.get')
+    @patch('roman_checker.requests.Session.get')
     def test_invalid_url(self, mock_get):
         """Тест невалидного URL"""
         with pytest.raises(ValueError, match="Некорректный URL"):
             _read_url("not-a-url")
         mock_get.assert_not_called()
 
-    @patch('roman_checker.requests.get')
+    @patch('roman_checker.requests.Session.get')
     def test_http_error_401(self, mock_get):
         """Тест ошибки 401"""
         mock_response = Mock()
@@ -377,7 +1018,7 @@ class TestReadUrl:
         with pytest.raises(requests.RequestException, match="Сайт требует авторизацию"):
             _read_url("https://example.com")
 
-    @patch('roman_checker.requests.get')
+    @patch('roman_checker.requests.Session.get')
     def test_http_error_403(self, mock_get):
         """Тест ошибки 403"""
         mock_response = Mock()
@@ -388,7 +1029,7 @@ class TestReadUrl:
         with pytest.raises(requests.RequestException, match="Доступ к сайту запрещён"):
             _read_url("https://example.com")
 
-    @patch('roman_checker.requests.get')
+    @patch('roman_checker.requests.Session.get')
     def test_http_error_404(self, mock_get):
         """Тест ошибки 404"""
         mock_response = Mock()
@@ -399,7 +1040,7 @@ class TestReadUrl:
         with pytest.raises(requests.RequestException, match="Страница не найдена"):
             _read_url("https://example.com")
 
-    @patch('roman_checker.requests.get')
+    @patch('roman_checker.requests.Session.get')
     def test_http_error_500(self, mock_get):
         """Тест ошибки 500"""
         mock_response = Mock()
@@ -410,7 +1051,7 @@ class TestReadUrl:
         with pytest.raises(requests.HTTPError):
             _read_url("https://example.com")
 
-    @patch('roman_checker.requests.get')
+    @patch('roman_checker.requests.Session.get')
     def test_connection_error(self, mock_get):
         """Тест ошибки соединения"""
         mock_get.side_effect = requests.ConnectionError("Connection failed")
@@ -418,7 +1059,7 @@ class TestReadUrl:
         with pytest.raises(requests.ConnectionError):
             _read_url("https://example.com")
 
-    @patch('roman_checker.requests.get')
+    @patch('roman_checker.requests.Session.get')
     def test_timeout_error(self, mock_get):
         """Тест ошибки таймаута"""
         mock_get.side_effect = requests.Timeout("Request timeout")
@@ -426,7 +1067,7 @@ class TestReadUrl:
         with pytest.raises(requests.Timeout):
             _read_url("https://example.com")
 
-    @patch('roman_checker.requests.get')
+    @patch('roman_checker.requests.Session.get')
     def test_html_extraction_integration(self, mock_get):
         """Тест интеграции с извлечением HTML"""
         mock_response = Mock()
@@ -451,7 +1092,7 @@ class TestReadUrl:
         assert "alert" not in result
         assert "color: red" not in result
 
-    @patch('roman_checker.requests.get')
+    @patch('roman_checker.requests.Session.get')
     def test_apparent_encoding_none(self, mock_get):
         """Тест когда apparent_encoding равен None (используется utf-8)"""
         mock_response = Mock()
@@ -465,7 +1106,7 @@ class TestReadUrl:
         assert "Текст" in result
         assert "I" in result
 
-    @patch('roman_checker.requests.get')
+    @patch('roman_checker.requests.Session.get')
     def test_http_error_other_codes(self, mock_get):
         """Тест других HTTP ошибок (не 401, 403, 404)"""
         mock_response = Mock()
@@ -476,7 +1117,7 @@ class TestReadUrl:
         with pytest.raises(requests.HTTPError):
             _read_url("https://example.com")
 
-    @patch('roman_checker.requests.get')
+    @patch('roman_checker.requests.Session.get')
     def test_url_without_scheme_normalized(self, mock_get):
         """URL без схемы нормализуется перед запросом"""
         mock_response = Mock()